@@ -23,6 +23,7 @@ __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
 from .crypt_utils import *
 from .mail import *
+from .off_loop import *
 from .params import *
 from .resp import *
 from .rest import *
@@ -20,6 +20,10 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import azure.functions as func
+import json
+from org.acmsl.licdata import ClientRepo
+from org.acmsl.licdata.infrastructure import accept_off_loop, rest, run_blocking
+from pythoneda.shared import Ports
 
 
 bp = func.Blueprint()
@@ -32,6 +36,8 @@ async def list_clients(
 ) -> func.HttpResponse:
     """
     Azure Function to list existing clients.
+    With the "limit" or "cursor" query parameters, a page of clients is
+    retrieved directly from the repository.
     :param req: The Azure Function HTTP request.
     :type req: azure.functions.HttpRequest
     :param context: The Azure Function context.
@@ -46,6 +52,20 @@ async def list_clients(
         HttpListClientsRequested,
     )
 
+    app = get_pythoneda_app()
+
+    params = dict(req.params)
+    if "limit" in params or "cursor" in params:
+        (status, body) = await run_blocking(
+            rest.list_page, params, Ports.instance().resolve_first(ClientRepo)
+        )
+
+        return func.HttpResponse(
+            json.dumps(body, default=str),
+            status_code=status,
+            mimetype="application/json",
+        )
+
     event = HttpListClientsRequested(
         httpMethod=HttpMethod.POST,
         queryStringParameters=req.params,
@@ -54,10 +74,8 @@ async def list_clients(
         body={},  # req.get_json(),
     ).to_event()
 
-    app = get_pythoneda_app()
-
     resulting_event = None
-    resulting_events = await app.accept(event)
+    resulting_events = await accept_off_loop(app, event)
 
     if len(resulting_events) > 0:
         resulting_event = resulting_events[0]
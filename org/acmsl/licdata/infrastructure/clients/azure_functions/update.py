@@ -39,6 +39,7 @@ async def update_client(
     :rtype: azure.functions.HttpResponse
     """
     from pythoneda.shared.infrastructure.azure.functions import get_pythoneda_app
+    from org.acmsl.licdata.infrastructure import accept_off_loop
     from pythoneda.shared.infrastructure.http import HttpMethod
     from org.acmsl.licdata.events.clients import (
         UpdateClientRequested,
@@ -59,7 +60,7 @@ async def update_client(
     app = get_pythoneda_app()
 
     resulting_event = None
-    resulting_events = await app.accept(event)
+    resulting_events = await accept_off_loop(app, event)
 
     if len(resulting_events) > 0:
         resulting_event = resulting_events[0]
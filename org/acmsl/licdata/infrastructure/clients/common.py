@@ -25,6 +25,7 @@ from org.acmsl.licdata.events.infrastructure.http.clients import (
     HttpInvalidNewClientRequest,
     HttpClientAlreadyExists,
 )
+from org.acmsl.licdata.events.clients import NewClientRequested
 import org.acmsl.licdata.infrastructure.rest as rest
 from pythoneda.shared import Event
 from typing import Dict, List, Type
@@ -81,3 +82,14 @@ def resource_already_exists_event_class() -> Type[Event]:
     :type: Type[Event]
     """
     return HttpClientAlreadyExists
+
+
+def build_new_requested(attributes: Dict) -> NewClientRequested:
+    """
+    Builds the event requesting a new client.
+    :param attributes: The client's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.clients.NewClientRequested
+    """
+    return NewClientRequested(**attributes)
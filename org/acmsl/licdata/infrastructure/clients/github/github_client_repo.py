@@ -32,7 +32,7 @@ from org.acmsl.licdata.events.clients import (
 )
 from org.acmsl.licdata.infrastructure.github import GithubRepo
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubClientRepo(ClientRepo):
@@ -64,15 +64,19 @@ class GithubClientRepo(ClientRepo):
         """
         return self._github_repo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the client matching given id.
         :param id: The client id.
         :type id: str
-        :return: The client.
+        :param fields: The attributes to retrieve, instead of the client.
+        :type fields: Optional[List[str]]
+        :return: The client, or its (requested) attributes.
         :rtype: Client from domain.client
         """
-        return self._github_repo.find_by_id(id, buildEntity=self.build_entity_from_dict)
+        return self._github_repo.find_by_id(
+            id, buildEntity=self.build_entity_from_dict, fields=fields
+        )
 
     def build_entity_from_dict(self, dict: Dict) -> Client:
         """
@@ -114,6 +118,18 @@ class GithubClientRepo(ClientRepo):
         """
         return self._github_repo.insert(newClientRequested, self._build_new_client)
 
+    def bulk_insert(
+        self, newClientRequests: List[NewClientRequested]
+    ) -> List[Optional[NewClientCreated]]:
+        """
+        Inserts many new Clients, in a few large commits.
+        :param newClientRequests: The events.
+        :type newClientRequests: List[org.acmsl.licdata.events.clients.NewClientRequested]
+        :return: The event of each new client, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.clients.NewClientCreated]]
+        """
+        return self._github_repo.bulk_insert(newClientRequests, self._build_new_client)
+
     def _build_new_client(
         self, newClientRequested: NewClientRequested
     ) -> Tuple[Client, NewClientCreated]:
@@ -144,6 +160,22 @@ class GithubClientRepo(ClientRepo):
             buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
         )
 
+    def bulk_delete(
+        self, deleteClientRequests: List[DeleteClientRequested]
+    ) -> List[Optional[ClientDeleted]]:
+        """
+        Deletes many Clients in a single commit.
+        :param deleteClientRequests: The events requesting the removal of each client.
+        :type deleteClientRequests: List[org.acmsl.licdata.events.clients.DeleteClientRequested]
+        :return: The outcome of each request: the client-deleted event, the invalid-delete-client-request event, or None if the client could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.clients.ClientDeleted]]
+        """
+        return self._github_repo.bulk_delete(
+            deleteEntityRequests=deleteClientRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
     def _create_client_deleted_event(
         self, deleteClientRequested: DeleteClientRequested
     ) -> ClientDeleted:
@@ -226,6 +258,45 @@ class GithubClientRepo(ClientRepo):
             buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
         )
 
+    def bulk_update(
+        self, updateClientRequests: List[UpdateClientRequested]
+    ) -> List[Optional[ClientUpdated]]:
+        """
+        Updates many Clients in a single commit.
+        :param updateClientRequests: The events requesting the update of each client.
+        :type updateClientRequests: List[org.acmsl.licdata.events.clients.UpdateClientRequested]
+        :return: The outcome of each request: the client-updated event, the invalid-update-client-request event, or None if the client could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.clients.ClientUpdated]]
+        """
+        return self._github_repo.bulk_update(
+            updateEntityRequests=updateClientRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_client_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_client_updated(
+        self, client: Client, updateClientRequested: UpdateClientRequested
+    ) -> ClientUpdated:
+        """
+        Builds the ClientUpdated event of given client.
+        :param client: The client.
+        :type client: org.acmsl.licdata.Client
+        :param updateClientRequested: The event requesting the update of the client.
+        :type updateClientRequested: org.acmsl.licdata.events.clients.UpdateClientRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.clients.ClientUpdated
+        """
+        return ClientUpdated(
+            entityId=client.id,
+            address=updateClientRequested.address,
+            contact=updateClientRequested.contact,
+            phone=updateClientRequested.phone,
+            previousEventIds=(
+                updateClientRequested.previous_event_ids + [updateClientRequested.id]
+            ),
+        )
+
     def build_invalid_update_entity_request_event(
         self, updateClientRequested: UpdateClientRequested
     ) -> InvalidUpdateClientRequest:
@@ -258,10 +329,31 @@ class GithubClientRepo(ClientRepo):
 
         return result
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Clients.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all clients.
         :rtype: List
         """
-        return self._github_repo.list()
+        return self._github_repo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Clients, loading only the data needed.
+        :param after: The position of the last Client already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Clients, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Clients, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._github_repo.iter_list(after, limit, fields)
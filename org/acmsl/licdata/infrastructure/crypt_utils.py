@@ -28,7 +28,7 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import os
 import struct
 import threading
-from typing import Tuple
+from typing import Iterable, Tuple
 
 
 AES_KEY_LEN = 32
@@ -286,6 +286,21 @@ def decrypt(encryptedText: str) -> str:
     return plaintext.decode("utf-8")
 
 
+def decrypt_stream(chunks: Iterable[bytes]) -> str:
+    """
+    Decrypts the raw (not base64-encoded) encrypted contents, read in chunks.
+    :param chunks: The chunks of the encrypted contents.
+    :type chunks: Iterable[bytes]
+    :return: The decrypted plaintext.
+    :rtype: str
+    """
+    decryptor = StreamDecryptor()
+    for chunk in chunks:
+        decryptor.update(chunk)
+
+    return decryptor.finalize()
+
+
 def encrypt(plaintext: str) -> str:
     """
     Encrypts a plaintext string.
@@ -338,6 +353,59 @@ class AesCtrDecryptor:
         return self.decryptor.update(data)
 
 
+class StreamDecryptor:
+    HEADER_LEN = 22  # preamble (10 bytes) + nonce (12 bytes)
+
+    def __init__(self):
+        """
+        Initialize the decryptor. The AES-CTR state is created once the
+        header, which carries the nonce, has been read.
+        """
+        self.aes_key, self.hmac_key = get_key()
+        self.header = bytearray()
+        self.nonce = None
+        self.aes = None
+        self.hmac_state = None
+        self.plaintext = bytearray()
+
+    def update(self, data: bytes):
+        """
+        Decrypt the next chunk of the encrypted contents.
+        :param data: The chunk (bytes)
+        :type data: bytes
+        """
+        if self.aes is None:
+            self.header += data
+            if len(self.header) < self.HEADER_LEN:
+                return
+            data = bytes(self.header[self.HEADER_LEN :])
+            self.nonce = bytes(self.header[10 : self.HEADER_LEN])
+            self.header = None
+            self.aes = AesCtrDecryptor(self.aes_key, self.nonce + b"\x00\x00\x00\x00")
+            self.hmac_state = HmacSha1State(self.hmac_key)
+        chunk = self.aes.process(data)
+        self.hmac_state.add(chunk)
+        self.plaintext += chunk
+
+    def finalize(self) -> str:
+        """
+        Verify the HMAC and return the plaintext.
+        :return: The decrypted plaintext.
+        :rtype: str
+        """
+        if self.aes is None:
+            raise ValueError("Decryption failed: truncated header")
+        computed_nonce = self.hmac_state.get()[:12]
+        if computed_nonce != self.nonce:
+            raise ValueError(
+                f"Decryption failed: HMAC mismatch! ({self.nonce} != {computed_nonce})"
+            )
+        result = self.plaintext.decode("utf-8")
+        self.plaintext = None
+
+        return result
+
+
 class AesCtrEncryptor:
     def __init__(self, key, nonce):
         """
@@ -0,0 +1,357 @@
+"""
+org/acmsl/licdata/infrastructure/filesystem/filesystem_adapter.py
+
+This file defines the FilesystemAdapter class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+from contextlib import contextmanager
+import hashlib
+from org.acmsl.licdata.infrastructure.crypt_utils import decrypt, encrypt
+from org.acmsl.licdata.infrastructure.github.content_cache import (
+    CachedContent,
+    ContentCache,
+)
+from org.acmsl.licdata.infrastructure.github.github_adapter import GithubAdapter
+from org.acmsl.licdata.infrastructure.github.github_raw import GithubConflictError
+from org.acmsl.licdata.infrastructure.github.payload_codec import (
+    decode_payload,
+    encode_payload,
+)
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+class FilesystemNotFoundError(FileNotFoundError):
+    """
+    Raised when a file does not exist in the local directory.
+
+    Class name: FilesystemNotFoundError
+
+    Responsibilities:
+        - Carry a 404 status, so it's handled as Github's "not found" errors.
+
+    Collaborators:
+        - None
+    """
+
+    status = 404
+
+    def __init__(self, path: str):
+        """
+        Creates a new FilesystemNotFoundError instance.
+        :param path: The path.
+        :type path: str
+        """
+        super().__init__(f"{path} not found")
+
+
+class FilesystemAdapter(GithubAdapter):
+    """
+    Adapter storing collections in a local directory, with the same layout
+    and encryption as the Github repository.
+
+    Class name: FilesystemAdapter
+
+    Responsibilities:
+        - Read and write {path}/{id}/data.json, the summaries and the _events/ files under FILESYSTEM_ROOT.
+        - Replace files atomically, and check the expected shas under a lock.
+
+    Collaborators:
+        - GithubAdapter: Provides all operations on top of the storage.
+        - ContentCache: Keeps the decrypted files.
+    """
+
+    _singleton = None
+
+    def __init__(self, root: str = None):
+        """
+        Creates a new FilesystemAdapter instance.
+        :param root: The local directory. Defaults to the one in FILESYSTEM_ROOT.
+        :type root: str
+        """
+        super().__init__()
+        if root is None:
+            root = os.environ.get("FILESYSTEM_ROOT", None)
+        if root is None:
+            raise ValueError("FILESYSTEM_ROOT environment variable not set")
+        self._root = os.path.abspath(root)
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> str:
+        """
+        Retrieves the local directory.
+        :return: Such directory.
+        :rtype: str
+        """
+        return self._root
+
+    def _local_path(self, path: str) -> str:
+        """
+        Retrieves the local file of given path.
+        :param path: The path, relative to the root.
+        :type path: str
+        :return: The local file.
+        :rtype: str
+        """
+        return os.path.join(self._root, *path.split("/"))
+
+    @staticmethod
+    def blob_sha(data: bytes) -> str:
+        """
+        Computes the sha git would assign to given contents.
+        :param data: The contents.
+        :type data: bytes
+        :return: The sha.
+        :rtype: str
+        """
+        return hashlib.sha1(b"blob %d\x00" % len(data) + data).hexdigest()
+
+    def _get_cached(self, path: str) -> CachedContent:
+        """
+        Retrieves the decrypted contents of given path, using the content cache.
+        Cached entries are reused while the file keeps its inode, size and
+        modification time.
+        :param path: The path.
+        :type path: str
+        :return: The cached entry.
+        :rtype: org.acmsl.licdata.infrastructure.github.CachedContent
+        """
+        cache = ContentCache.instance()
+        local = self._local_path(path)
+
+        epoch = cache.epoch()
+        try:
+            stat = os.stat(local)
+        except FileNotFoundError:
+            raise FilesystemNotFoundError(path)
+        stamp = f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        entry = cache.get(local)
+        if entry is not None and entry.etag == stamp:
+            cache.record_hit()
+            return entry
+
+        try:
+            with open(local, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            raise FilesystemNotFoundError(path)
+
+        cache.record_miss()
+        try:
+            text = decode_payload(decrypt(base64.b64encode(data)))
+        except Exception as e:
+            text = None
+            print(f"Cannot decrypt {path}: {e}")
+        result = CachedContent(
+            local, FilesystemAdapter.blob_sha(data), text, etag=stamp
+        )
+
+        cache.put(result, epoch)
+
+        return result
+
+    def _existence_oracle(self) -> None:
+        """
+        Local files are checked directly, so no oracle is needed.
+        :return: None.
+        :rtype: None
+        """
+        return None
+
+    def _get_contents(self, path: str) -> Tuple[str, str]:
+        """
+        Retrieves the contents of given path in the local directory.
+        :param path: The path.
+        :type path: str
+        :return: A tuple of the contents and its hash.
+        :rtype: Tuple[str, str]
+        """
+        entry = self._get_cached(path)
+
+        return (entry.text, entry.sha)
+
+    def _get_json(self, path: str) -> Tuple[Any, str]:
+        """
+        Retrieves the parsed JSON contents of given path in the local directory.
+        The result is shared with the content cache, so it must not be modified.
+        :param path: The path.
+        :type path: str
+        :return: A tuple of the parsed contents (None if they cannot be decrypted) and its hash.
+        :rtype: Tuple[Any, str]
+        """
+        entry = self._get_cached(path)
+
+        result = None
+        if entry.text is not None:
+            result = entry.json
+
+        return (result, entry.sha)
+
+    def _current_sha(self, path: str) -> Optional[str]:
+        """
+        Retrieves the sha of given path.
+        :param path: The path.
+        :type path: str
+        :return: The sha, or None if the file does not exist.
+        :rtype: Optional[str]
+        """
+        try:
+            return self._get_cached(path).sha
+        except FilesystemNotFoundError:
+            return None
+
+    def _write(self, path: str, content: str):
+        """
+        Replaces the file on given path, compressed and encrypted, atomically.
+        :param path: The path.
+        :type path: str
+        :param content: The file contents.
+        :type content: str
+        """
+        local = self._local_path(path)
+        folder = os.path.dirname(local)
+        os.makedirs(folder, exist_ok=True)
+
+        (fd, temporary) = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(encrypt(encode_payload(content)))
+            os.replace(temporary, local)
+        except Exception:
+            os.unlink(temporary)
+            raise
+
+    def _remove(self, path: str):
+        """
+        Removes the file on given path, if it exists.
+        :param path: The path.
+        :type path: str
+        """
+        try:
+            os.remove(self._local_path(path))
+        except FileNotFoundError:
+            pass
+
+    def _lock_file(self) -> str:
+        """
+        Retrieves the file used to serialize writers across processes.
+        :return: Such file.
+        :rtype: str
+        """
+        return os.path.join(self._root, ".lock")
+
+    def _record(self, files: Dict[str, Optional[str]], message: str):
+        """
+        Called, while holding the lock, once given files have been written.
+        :param files: The contents of each file, indexed by path. A None value means the file was removed.
+        :type files: Dict[str, Optional[str]]
+        :param message: The commit message.
+        :type message: str
+        """
+        pass
+
+    @contextmanager
+    def _locked(self):
+        """
+        Serializes writers, both in this process and, where supported, in
+        other processes sharing the directory.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            lock_file = self._lock_file()
+            os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+            with open(lock_file, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _commit_files(
+        self,
+        files: Dict[str, Optional[str]],
+        message: str,
+        expectedShas: Dict[str, Optional[str]] = None,
+    ):
+        """
+        Writes several files in the local directory. The files with expected
+        shas (the summaries) are replaced last, so readers never find a
+        summary row whose entity file is missing.
+        :param files: The contents of each file, indexed by path. A None value removes the file.
+        :type files: Dict[str, Optional[str]]
+        :param message: The commit message.
+        :type message: str
+        :param expectedShas: The shas some files must still have (None if they must not exist).
+        :type expectedShas: Dict[str, Optional[str]]
+        :return: A description of the change, or None if it could not be written.
+        :rtype: Dict
+        :raises GithubConflictError: If the expected shas don't match.
+        """
+        result = None
+
+        expected_shas = expectedShas or {}
+        try:
+            with self._locked():
+                for path, expected in expected_shas.items():
+                    current = self._current_sha(path)
+                    if current != expected:
+                        raise GithubConflictError(
+                            f"{path} is at {current} instead of {expected}"
+                        )
+
+                for path in sorted(files, key=lambda path: path in expected_shas):
+                    if files[path] is None:
+                        self._remove(path)
+                    else:
+                        self._write(path, files[path])
+                self._record(files, message)
+
+                result = {"message": message, "files": list(files.keys())}
+        except GithubConflictError:
+            raise
+        except Exception as e:
+            result = None
+            print(f"Error writing files {', '.join(files.keys())}: {e}")
+        finally:
+            ContentCache.instance().invalidate_all(
+                [self._local_path(path) for path in files]
+            )
+
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
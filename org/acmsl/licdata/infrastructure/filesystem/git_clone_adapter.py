@@ -0,0 +1,565 @@
+"""
+org/acmsl/licdata/infrastructure/filesystem/git_clone_adapter.py
+
+This file defines the GitCloneAdapter class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import atexit
+import base64
+from .filesystem_adapter import FilesystemAdapter, FilesystemNotFoundError
+import json
+from org.acmsl.licdata.infrastructure.crypt_utils import decrypt
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_branch,
+    get_repository_name,
+    get_token,
+)
+from org.acmsl.licdata.infrastructure.github.payload_codec import decode_payload
+from org.acmsl.licdata.infrastructure.github.pending_write import PendingWrite
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class GitCommandError(Exception):
+    """
+    Raised when a git command fails.
+
+    Class name: GitCommandError
+
+    Responsibilities:
+        - Carry the output of the failed git command.
+
+    Collaborators:
+        - None
+    """
+
+    def __init__(self, message: str):
+        """
+        Creates a new GitCommandError instance.
+        :param message: The error message.
+        :type message: str
+        """
+        super().__init__(message)
+
+
+class GitCloneAdapter(FilesystemAdapter):
+    """
+    Adapter working on a local clone of GITHUB_REPO/GITHUB_BRANCH, which
+    pushes the accumulated commits in batches.
+
+    Since git-crypt is not involved, the clone holds the files encrypted,
+    as FilesystemAdapter expects them. Writes are committed locally and
+    pushed every GIT_PUSH_INTERVAL_MS milliseconds (1000 by default), or as
+    soon as GIT_PUSH_MAX_COMMITS commits (20 by default) are pending; with
+    nothing to push, the same background pass fast-forwards the clone every
+    GIT_FETCH_INTERVAL_MS milliseconds (30000 by default).
+    When GIT_PUSH_SYNC is enabled (by default on AWS Lambda, which freezes
+    background threads between invocations and discards its temporary
+    directory), each batch of writes is pushed before returning, and only
+    the writes that reached the remote branch are reported as committed.
+    Otherwise, the writes dropped after a conflict are logged, and available
+    through dropped_writes().
+
+    Class name: GitCloneAdapter
+
+    Responsibilities:
+        - Keep a working clone in GIT_CLONE_DIR (under the temporary directory by default).
+        - Commit each batch of writes locally, and push them in batches.
+        - Rebase on top of the remote branch when the push is rejected, or re-apply the writes when the rebase conflicts.
+
+    Collaborators:
+        - FilesystemAdapter: Reads and writes the files of the clone.
+        - PendingWrite: The writes, kept until pushed.
+    """
+
+    _singleton = None
+
+    def __init__(self):
+        """
+        Creates a new GitCloneAdapter instance.
+        """
+        self._repository = get_repository_name()
+        self._branch = get_branch()
+        self._url = os.environ.get(
+            "GIT_CLONE_URL", f"https://github.com/{self._repository}.git"
+        )
+        super().__init__(
+            os.environ.get(
+                "GIT_CLONE_DIR",
+                os.path.join(
+                    tempfile.gettempdir(),
+                    "licdata-"
+                    + re.sub(
+                        r"[^A-Za-z0-9_.-]", "_", f"{self._repository}-{self._branch}"
+                    ),
+                ),
+            )
+        )
+        self._sync_lock = threading.RLock()
+        self._unpushed: List[List[PendingWrite]] = []
+        self._dropped: List[PendingWrite] = []
+        self._fetched = 0.0
+        self._synchronous = os.environ.get(
+            "GIT_PUSH_SYNC",
+            "true" if "AWS_LAMBDA_FUNCTION_NAME" in os.environ else "false",
+        ).lower() in ["true", "1", "yes"]
+        self._pending = threading.local()
+        self._ensure_clone()
+        self._stop = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+        self._syncer.start()
+        atexit.register(self.close)
+
+    @property
+    def branch(self) -> str:
+        """
+        Retrieves the branch.
+        :return: Such branch.
+        :rtype: str
+        """
+        return self._branch
+
+    def _git(
+        self, *args: str, check: bool = True, binary: bool = False
+    ) -> subprocess.CompletedProcess:
+        """
+        Runs a git command. The commands reaching the remote repository are
+        authenticated with a pooled Github token when using https.
+        :param args: The command and its arguments.
+        :type args: str
+        :param check: Whether to raise an error if the command fails.
+        :type check: bool
+        :param binary: Whether the output is binary (e.g. encrypted blobs).
+        :type binary: bool
+        :return: The outcome of the command.
+        :rtype: subprocess.CompletedProcess
+        :raises GitCommandError: If the command fails, and check is True.
+        """
+        command = [
+            "git",
+            "-c",
+            "user.name=licdata",
+            "-c",
+            "user.email=licdata@localhost",
+        ]
+        if self._url.startswith("https://") and args[0] in ["clone", "fetch", "push"]:
+            credentials = base64.b64encode(
+                f"x-access-token:{get_token()}".encode("utf-8")
+            ).decode("ascii")
+            command += ["-c", f"http.extraHeader=Authorization: Basic {credentials}"]
+        if args[0] != "clone":
+            command += ["-C", self._root]
+
+        result = subprocess.run(
+            command + list(args),
+            capture_output=True,
+            text=not binary,
+            env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+        )
+        if check and result.returncode != 0:
+            stderr = result.stderr
+            if binary:
+                stderr = stderr.decode("utf-8", "replace")
+            raise GitCommandError(
+                f"git {args[0]} failed ({result.returncode}): {stderr.strip()}"
+            )
+
+        return result
+
+    def _ensure_clone(self):
+        """
+        Clones the branch, unless the local directory already holds the clone.
+        """
+        if not os.path.isdir(os.path.join(self._root, ".git")):
+            os.makedirs(os.path.dirname(self._root), exist_ok=True)
+            self._git(
+                "clone",
+                "-q",
+                "--single-branch",
+                "-b",
+                self._branch,
+                self._url,
+                self._root,
+            )
+
+    def _lock_file(self) -> str:
+        """
+        Retrieves the file used to serialize writers across processes,
+        outside the working tree.
+        :return: Such file.
+        :rtype: str
+        """
+        return os.path.join(self._root, ".git", "licdata.lock")
+
+    def _record(self, files: Dict[str, Optional[str]], message: str):
+        """
+        Commits given files locally. If the commit fails, the working tree
+        is restored.
+        :param files: The contents of each file, indexed by path. A None value means the file was removed.
+        :type files: Dict[str, Optional[str]]
+        :param message: The commit message.
+        :type message: str
+        """
+        try:
+            written = [path for path in files if files[path] is not None]
+            removed = [path for path in files if files[path] is None]
+            if written:
+                self._git("add", "--", *written)
+            if removed:
+                self._git("rm", "-q", "--cached", "--ignore-unmatch", "--", *removed)
+            if self._git("diff", "--cached", "--quiet", check=False).returncode != 0:
+                self._git("commit", "-q", "-m", message or "Updated licdata")
+                self._unpushed.append(list(getattr(self._pending, "writes", [])))
+        except Exception:
+            self._git("reset", "-q", "--hard", "HEAD", check=False)
+            raise
+
+    def _apply(
+        self,
+        writes: List[PendingWrite],
+        summaries: Optional[List[Tuple[str, List[Dict], str]]] = None,
+    ) -> List[bool]:
+        """
+        Applies given writes on the clone, remembering them until pushed.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param summaries: The summaries affected, if just read.
+        :type summaries: Optional[List[Tuple[str, List[Dict], str]]]
+        :return: Whether each write got committed locally.
+        :rtype: List[bool]
+        """
+        self._pending.writes = writes
+        try:
+            return super().apply_writes(writes, summaries)
+        finally:
+            self._pending.writes = []
+
+    def apply_writes(
+        self,
+        writes: List[PendingWrite],
+        summaries: Optional[List[Tuple[str, List[Dict], str]]] = None,
+    ) -> List[bool]:
+        """
+        Applies given writes on the clone, and pushes them right away when
+        synchronous, or if enough commits are pending otherwise.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param summaries: The summaries affected, if just read.
+        :type summaries: Optional[List[Tuple[str, List[Dict], str]]]
+        :return: Whether each write got pushed when synchronous, or committed locally otherwise.
+        :rtype: List[bool]
+        """
+        if not self._synchronous:
+            result = self._apply(writes, summaries)
+            if len(self._unpushed) >= int(
+                os.environ.get("GIT_PUSH_MAX_COMMITS", "20")
+            ):
+                self.flush()
+            return result
+
+        with self._sync_lock:
+            result = self._apply(writes, summaries)
+            if not any(result):
+                return result
+            (synced, dropped) = self._sync()
+            if not synced:
+                # nothing local survives the invocation: forget what wasn't pushed
+                with self._locked():
+                    self._git("reset", "-q", "--hard", "FETCH_HEAD")
+                    self._unpushed = []
+                return [False for _ in writes]
+            lost = {GitCloneAdapter._key(write) for write in dropped}
+            return [
+                applied and GitCloneAdapter._key(write) not in lost
+                for write, applied in zip(writes, result)
+            ]
+
+    @staticmethod
+    def _key(write: PendingWrite) -> Tuple[str, str, str]:
+        """
+        Identifies a write, regardless of it being rebased.
+        :param write: The write.
+        :type write: org.acmsl.licdata.infrastructure.github.PendingWrite
+        :return: Its kind, summary file and id.
+        :rtype: Tuple[str, str, str]
+        """
+        return (write.kind, write.file, write.id)
+
+    def dropped_writes(self) -> List[PendingWrite]:
+        """
+        Retrieves, and forgets, the writes that were reported as committed
+        but got dropped after a conflict.
+        :return: Such writes.
+        :rtype: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        """
+        with self._sync_lock:
+            result = self._dropped
+            self._dropped = []
+
+        return result
+
+    def flush(self) -> bool:
+        """
+        Pushes the local commits. If the push is rejected, rebases them on
+        the remote branch and retries; if the rebase conflicts, resets the
+        clone to the remote branch and applies the pending writes again,
+        rebasing replacements on the remote entities and logging the writes
+        that no longer apply.
+        With nothing to push, fast-forwards the clone.
+        :return: True if the clone and the remote branch are in sync.
+        :rtype: bool
+        """
+        return self._sync()[0]
+
+    def _sync(self) -> Tuple[bool, List[PendingWrite]]:
+        """
+        Pushes the local commits, as described in flush().
+        :return: Whether the clone and the remote branch are in sync, and the writes dropped meanwhile.
+        :rtype: Tuple[bool, List[org.acmsl.licdata.infrastructure.github.PendingWrite]]
+        """
+        retries = int(os.environ.get("GITHUB_WRITE_RETRIES", "5"))
+        dropped = []
+
+        with self._sync_lock:
+            for attempt in range(retries + 1):
+                writes = []
+                with self._locked():
+                    self._git("fetch", "-q", "origin", self._branch)
+                    self._fetched = time.monotonic()
+                    ahead = int(
+                        self._git(
+                            "rev-list", "--count", "FETCH_HEAD..HEAD"
+                        ).stdout.strip()
+                    )
+                    if ahead == 0:
+                        self._git("reset", "-q", "--hard", "FETCH_HEAD")
+                        self._unpushed = []
+                        return (True, dropped)
+                    if (
+                        self._git("rebase", "-q", "FETCH_HEAD", check=False).returncode
+                        == 0
+                    ):
+                        push = self._git(
+                            "push",
+                            "-q",
+                            "origin",
+                            f"HEAD:refs/heads/{self._branch}",
+                            check=False,
+                        )
+                        if push.returncode == 0:
+                            GitCloneAdapter.logger().debug(
+                                f"Pushed {ahead} commits to {self._branch}"
+                            )
+                            self._unpushed = []
+                            return (True, dropped)
+                        GitCloneAdapter.logger().debug(
+                            f"Push to {self._branch} rejected: {push.stderr.strip()}"
+                        )
+                        continue
+                    self._git("rebase", "--abort", check=False)
+                    # the commit the local writes were read from
+                    base = self._git("merge-base", "HEAD", "FETCH_HEAD").stdout.strip()
+                    self._git("reset", "-q", "--hard", "FETCH_HEAD")
+                    writes = [write for batch in self._unpushed for write in batch]
+                    self._unpushed = []
+
+                GitCloneAdapter.logger().info(
+                    f"Applying {len(writes)} writes again on top of {self._branch}"
+                )
+                if writes:
+                    lost = self._reapply(writes, base)
+                    dropped += lost
+                    if not self._synchronous:
+                        self._dropped += lost
+
+        GitCloneAdapter.logger().error(
+            f"Could not push to {self._branch} after {retries + 1} attempts"
+        )
+        return (False, dropped)
+
+    def _reapply(self, writes: List[PendingWrite], base: str) -> List[PendingWrite]:
+        """
+        Applies given writes again on top of the remote branch, after their
+        commits conflicted. Replacements are rebased on the entity as it's
+        now, and the writes that no longer apply are reported.
+        :param writes: The writes, already reported as committed.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param base: The commit the writes were originally made on.
+        :type base: str
+        :return: The writes dropped.
+        :rtype: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        """
+        result = []
+        rebased = []
+        for write in writes:
+            if write.kind == PendingWrite.REPLACE:
+                replacement = self._rebase_replace(write, base)
+                if replacement is None:
+                    self._report_dropped(write, "the entity was removed remotely")
+                    result.append(write)
+                    continue
+                write = replacement
+            rebased.append(write)
+
+        for write, applied in zip(rebased, self._apply(rebased)):
+            if not applied:
+                self._report_dropped(write, "it conflicts with the remote branch")
+                result.append(write)
+
+        return result
+
+    def _report_dropped(self, write: PendingWrite, reason: str):
+        """
+        Reports a write that was acknowledged, but got lost after a conflict.
+        :param write: The write.
+        :type write: org.acmsl.licdata.infrastructure.github.PendingWrite
+        :param reason: Why it no longer applies.
+        :type reason: str
+        """
+        GitCloneAdapter.logger().error(
+            f"Dropped the {write.kind} of {write.id} in {write.file} "
+            f"on {self._branch}, since {reason}"
+        )
+
+    def _show(self, commit: str, path: str) -> Optional[str]:
+        """
+        Retrieves the decrypted contents of a file in given commit.
+        :param commit: The commit.
+        :type commit: str
+        :param path: The path.
+        :type path: str
+        :return: The contents, or None if the file didn't exist.
+        :rtype: Optional[str]
+        """
+        result = self._git("show", f"{commit}:{path}", check=False, binary=True)
+        if result.returncode != 0:
+            return None
+
+        return decode_payload(decrypt(base64.b64encode(result.stdout)))
+
+    def _rebase_replace(
+        self, write: PendingWrite, base: str
+    ) -> Optional[PendingWrite]:
+        """
+        Rebases a replacement on the entity as it's now in the clone: the
+        attributes it changed from the original version are applied on the
+        current one, so remote updates of other attributes are kept.
+        :param write: The replacement.
+        :type write: org.acmsl.licdata.infrastructure.github.PendingWrite
+        :param base: The commit the replacement was originally made on.
+        :type base: str
+        :return: The rebased replacement, or None if the entity no longer exists.
+        :rtype: Optional[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        """
+        suffix = f"/{write.id}/data.json"
+        entity_file = next((file for file in write.files if file.endswith(suffix)), None)
+        if entity_file is None or write.files[entity_file] is None:
+            return write
+        path = entity_file[: -len(suffix)]
+        if os.path.exists(self._local_path(f"{path}/{write.id}.deleted")):
+            return None
+
+        try:
+            (current, _) = self._get_json(entity_file)
+        except FilesystemNotFoundError:
+            return None
+        original_text = self._show(base, entity_file)
+        if current is None or original_text is None:
+            return write
+        original = json.loads(original_text)
+        if current == original:
+            return write
+
+        ours = json.loads(write.files[entity_file])
+        changed = {
+            name: value
+            for name, value in ours.items()
+            if original.get(name, None) != value
+        }
+        row = next(
+            (
+                x
+                for x in self._read_summary(write.file)[0]
+                if x is not None and x.get("id", None) == write.id
+            ),
+            None,
+        )
+        if row is None:
+            return None
+
+        files = dict(write.files)
+        files[entity_file] = json.dumps({**current, **changed})
+        return PendingWrite(
+            PendingWrite.REPLACE,
+            write.file,
+            write.id,
+            row={
+                **row,
+                **{
+                    name: value
+                    for name, value in (write.row or {}).items()
+                    if name in changed
+                },
+            },
+            files=files,
+            message=write.message,
+        )
+
+    def _sync_loop(self):
+        """
+        Pushes the clone periodically, or fast-forwards it at a slower pace
+        when there's nothing to push.
+        """
+        interval = float(os.environ.get("GIT_PUSH_INTERVAL_MS", "1000")) / 1000
+        fetch_interval = (
+            float(os.environ.get("GIT_FETCH_INTERVAL_MS", "30000")) / 1000
+        )
+        while not self._stop.wait(interval):
+            idle = time.monotonic() - self._fetched
+            if not self._unpushed and idle < fetch_interval:
+                continue
+            try:
+                self.flush()
+            except Exception as err:
+                GitCloneAdapter.logger().error(f"Error syncing with {self._url}: {err}")
+
+    def close(self):
+        """
+        Stops the background synchronization, and pushes the pending commits.
+        """
+        self._stop.set()
+        if self._unpushed:
+            try:
+                self.flush()
+            except Exception as err:
+                GitCloneAdapter.logger().error(f"Error pushing to {self._url}: {err}")
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
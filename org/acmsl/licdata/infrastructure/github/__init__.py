@@ -21,10 +21,48 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
-from .github_access import get_repo, get_branch, get_repo_and_branch
+from .cache_warmer import warm_cache
+from .change_feed import ChangeFeed
+from .event_compactor import compact_events, read_history
+from .event_replay import replay_events
+from .collection_index import CollectionIndex
+from .collection_layout import CollectionLayout
+from .content_cache import CachedContent, ContentCache
+from .existence_oracle import ExistenceOracle
+from .github_access import (
+    get_branch,
+    get_credential,
+    get_github,
+    get_repo,
+    get_repo_and_branch,
+    reset_connections,
+    warm_up,
+)
 from .github_adapter import GithubAdapter
-from .github_raw import get_contents, create_file, update_file, delete_file
+from .github_raw import (
+    GithubConflictError,
+    GithubUnreadableError,
+    cache_stats,
+    commit_files,
+    get_contents,
+    get_json,
+    is_not_found,
+    create_file,
+    update_file,
+    delete_file,
+)
 from .github_repo import GithubRepo
+from .payload_codec import decode_payload, encode_payload
+from .pending_write import PendingWrite
+from .token_pool import TokenPool
+from .rate_limit_scheduler import (
+    RateLimitScheduler,
+    rate_limit_stats,
+    request_priority,
+)
+from .write_coalescer import WriteCoalescer
+from .write_metrics import WriteMetrics
+from .migrate_collection import migrate_to_shards
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
@@ -0,0 +1,56 @@
+"""
+org/acmsl/licdata/infrastructure/github/aws_lambda/compact_events.py
+
+This file provides an AWS Lambda handler to compact the events of each entity.
+
+Copyright (C) 2023-today ACM S.L. Licdata-Infrastructure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from org.acmsl.licdata.infrastructure.github.event_compactor import compact_events
+
+from typing import Dict
+
+
+def handler(event, context) -> Dict:
+    """
+    AWS Lambda handler to fold the events of each entity into its snapshot,
+    meant to be invoked by a scheduled event. The event, or its "detail",
+    can include "collections" (a list) and "minEvents" (a number).
+    :param event: The AWS Lambda event.
+    :type event: event
+    :param context: The AWS Lambda context.
+    :type context: context
+    :return: The outcome of the compaction.
+    :rtype: Dict
+    """
+    params = (event or {}).get("detail", None) or event or {}
+
+    min_events = params.get("minEvents", None)
+
+    return compact_events(
+        collections=params.get("collections", None),
+        minEvents=int(min_events) if min_events is not None else None,
+    )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
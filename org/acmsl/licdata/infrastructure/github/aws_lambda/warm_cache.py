@@ -0,0 +1,54 @@
+"""
+org/acmsl/licdata/infrastructure/github/aws_lambda/warm_cache.py
+
+This file provides an AWS Lambda handler to warm up the Github content cache.
+
+Copyright (C) 2023-today ACM S.L. Licdata-Infrastructure
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from org.acmsl.licdata.infrastructure.github.cache_warmer import warm_cache
+
+from typing import Dict
+
+
+def handler(event, context) -> Dict:
+    """
+    AWS Lambda handler to warm up the content cache, meant to be invoked by
+    a scheduled (keep-warm) event. The event, or its "detail", can include
+    "collections" (a list) and "entities" (a boolean).
+    :param event: The AWS Lambda event.
+    :type event: event
+    :param context: The AWS Lambda context.
+    :type context: context
+    :return: The outcome of the warm-up.
+    :rtype: Dict
+    """
+    params = (event or {}).get("detail", None) or event or {}
+
+    return warm_cache(
+        collections=params.get("collections", None),
+        entities=bool(params.get("entities", False)),
+    )
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
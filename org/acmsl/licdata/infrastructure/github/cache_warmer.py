@@ -0,0 +1,145 @@
+"""
+org/acmsl/licdata/infrastructure/github/cache_warmer.py
+
+This file provides the warm_cache function.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from org.acmsl.licdata.infrastructure.github.content_cache import ContentCache
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_repo_and_branch,
+)
+from org.acmsl.licdata.infrastructure.github.github_raw import _call, _get_cached
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+)
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+
+def is_summary_file(path: str) -> bool:
+    """
+    Checks whether given path holds collection-level data: the summary
+    ({collection}/data.json), its shards and its layout
+    ({collection}/_index/*.json).
+    :param path: The path.
+    :type path: str
+    :return: True in such case.
+    :rtype: bool
+    """
+    parts = path.split("/")
+    return (len(parts) == 2 and parts[1] == "data.json") or (
+        len(parts) == 3 and parts[1] == "_index" and parts[2].endswith(".json")
+    )
+
+
+def is_entity_file(path: str) -> bool:
+    """
+    Checks whether given path holds an entity ({collection}/{id}/data.json).
+    :param path: The path.
+    :type path: str
+    :return: True in such case.
+    :rtype: bool
+    """
+    parts = path.split("/")
+    return len(parts) == 3 and parts[2] == "data.json" and not parts[1].startswith("_")
+
+
+def warm_cache(
+    collections: Optional[List[str]] = None,
+    entities: bool = False,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Fills the content cache in advance, so the first requests of a
+    cold-started function are answered from memory (after a conditional
+    request that doesn't count against the rate limit).
+    The whole branch tree is fetched in a single request; then the files
+    whose blob isn't cached yet are downloaded and decrypted in parallel.
+    Calling it again (e.g. from a scheduled keep-warm event) downloads only
+    the files that changed since.
+    :param collections: The collections to warm up. Defaults to all of them.
+    :type collections: Optional[List[str]]
+    :param entities: Whether to load every {collection}/{id}/data.json too.
+    :type entities: bool
+    :param workers: The number of parallel downloads. Defaults to GITHUB_WARM_WORKERS, or 8.
+    :type workers: Optional[int]
+    :return: The tree sha, and the number of files found, downloaded, already cached and failed, and the elapsed time.
+    :rtype: Dict[str, Any]
+    """
+    started = time.monotonic()
+    (repo, branch) = get_repo_and_branch()
+    tree = _call(RateLimitScheduler.READ, repo.get_git_tree, branch, recursive=True)
+    if tree.raw_data.get("truncated", False):
+        print(f"The tree of {branch} is too large; only part of it will be cached")
+
+    cache = ContentCache.instance()
+    files = []
+    cached = 0
+    for element in tree.tree:
+        if element.type != "blob":
+            continue
+        if collections is not None and element.path.split("/")[0] not in collections:
+            continue
+        if not (
+            is_summary_file(element.path) or (entities and is_entity_file(element.path))
+        ):
+            continue
+        if cache.get(element.path, element.sha) is None:
+            files.append(element.path)
+        else:
+            cached += 1
+
+    failed = 0
+    if files:
+        if workers is None:
+            workers = int(os.environ.get("GITHUB_WARM_WORKERS", "8"))
+        contexts = [copy_context() for _ in files]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+            futures = [
+                pool.submit(context.run, _get_cached, file)
+                for context, file in zip(contexts, files)
+            ]
+            for file, future in zip(files, futures):
+                try:
+                    if future.result().text is None:
+                        failed += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Error warming up {file}: {e}")
+
+    return {
+        "tree": tree.sha,
+        "files": len(files) + cached,
+        "downloaded": len(files) - failed,
+        "cached": cached,
+        "failed": failed,
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,373 @@
+"""
+org/acmsl/licdata/infrastructure/github/change_feed.py
+
+This file defines the ChangeFeed class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from org.acmsl.licdata.infrastructure.github.content_cache import ContentCache
+from org.acmsl.licdata.infrastructure.github.existence_oracle import ExistenceOracle
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_repo_and_branch,
+)
+from org.acmsl.licdata.infrastructure.github.github_adapter import GithubAdapter
+from org.acmsl.licdata.infrastructure.github.github_raw import _call
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+)
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Receives the collection, the changed files (None if unknown) and the new head
+ChangeListener = Callable[[str, Optional[List[str]], str], None]
+
+
+class ChangeFeed(BaseObject):
+    """
+    Follows the commits of the branch, so that warm processes notice the
+    changes made by other ones.
+
+    The branch head is checked every GITHUB_CHANGE_FEED_SECONDS seconds
+    (5 by default). The files changed since the last head seen are taken
+    from the compare endpoint; only their cached copies are discarded, the
+    existence oracle is advanced, and the indexes on the changed summaries
+    are patched. When the changes cannot be listed (e.g. too many files),
+    the cached copies are checked against the whole tree instead.
+    While the feed keeps up, the content cache is used without
+    revalidating its entries.
+
+    Class name: ChangeFeed
+
+    Responsibilities:
+        - Remember the last branch head seen.
+        - Invalidate the cached files, and patch the indexes, changed since.
+        - Notify per-collection subscribers of the changed files.
+
+    Collaborators:
+        - ContentCache: Discards the changed files.
+        - ExistenceOracle: Follows the changes without comparing the commits again.
+        - GithubAdapter: Patches its indexes and layouts.
+    """
+
+    _singleton = None
+
+    def __init__(self):
+        """
+        Creates a new ChangeFeed instance.
+        """
+        super().__init__()
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._sha = None
+        self._listeners: Dict[Optional[str], List[ChangeListener]] = {}
+        self._thread = None
+        self._stopped = threading.Event()
+        self._polls = 0
+        self._changed_files = 0
+        self._invalidations = 0
+        self._full_syncs = 0
+        self._errors = 0
+
+    @classmethod
+    def instance(cls) -> "ChangeFeed":
+        """
+        Retrieves the instance.
+        :return: Such instance.
+        :rtype: org.acmsl.licdata.infrastructure.github.ChangeFeed
+        """
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
+    @classmethod
+    def interval(cls) -> float:
+        """
+        Retrieves how often the branch head is checked.
+        :return: The interval, in seconds (GITHUB_CHANGE_FEED_SECONDS, 5 by default).
+        :rtype: float
+        """
+        return float(os.environ.get("GITHUB_CHANGE_FEED_SECONDS", "5"))
+
+    @property
+    def sha(self) -> Optional[str]:
+        """
+        Retrieves the last branch head seen.
+        :return: Such sha, or None if the branch hasn't been checked yet.
+        :rtype: Optional[str]
+        """
+        return self._sha
+
+    def subscribe(self, collection: Optional[str], listener: ChangeListener):
+        """
+        Registers a listener for the changes of given collection.
+        :param collection: The relative path of the collection, or None for all of them.
+        :type collection: Optional[str]
+        :param listener: The listener, called with the collection, the changed files (None if unknown) and the new head.
+        :type listener: Callable[[str, Optional[List[str]], str], None]
+        """
+        with self._lock:
+            self._listeners.setdefault(collection, []).append(listener)
+
+    def unsubscribe(self, collection: Optional[str], listener: ChangeListener):
+        """
+        Unregisters a listener.
+        :param collection: The relative path of the collection, or None.
+        :type collection: Optional[str]
+        :param listener: The listener.
+        :type listener: Callable[[str, Optional[List[str]], str], None]
+        """
+        with self._lock:
+            listeners = self._listeners.get(collection, [])
+            if listener in listeners:
+                listeners.remove(listener)
+
+    @staticmethod
+    def _collection(path: str) -> str:
+        """
+        Retrieves the collection given file belongs to.
+        :param path: The path of the file.
+        :type path: str
+        :return: The relative path of the collection.
+        :rtype: str
+        """
+        return path.split("/", 1)[0]
+
+    def _changes_since(self, repo, base: str, head: str) -> Optional[Dict]:
+        """
+        Retrieves the files changed between two commits.
+        :param repo: The repository.
+        :type repo: github.Repository.Repository
+        :param base: The last head seen.
+        :type base: str
+        :param head: The branch head.
+        :type head: str
+        :return: The new blob sha of each changed file (None if removed), or None if they cannot be listed completely.
+        :rtype: Optional[Dict[str, Optional[str]]]
+        """
+        try:
+            comparison = _call(RateLimitScheduler.READ, repo.compare, base, head)
+        except Exception as err:
+            ChangeFeed.logger().info(f"Cannot compare {base}...{head}: {err}")
+            return None
+
+        files = comparison.files
+        if comparison.status not in ["ahead", "identical"] or (
+            len(files) >= ExistenceOracle.MAX_COMPARE_FILES
+        ):
+            return None
+
+        result = {}
+        for file in files:
+            if file.status == "renamed" and file.previous_filename:
+                result[file.previous_filename] = None
+            result[file.filename] = None if file.status == "removed" else file.sha
+
+        return result
+
+    def _sync(self, repo, head: str) -> List[str]:
+        """
+        Discards the cached files whose blob differs from the tree of given commit.
+        :param repo: The repository.
+        :type repo: github.Repository.Repository
+        :param head: The commit.
+        :type head: str
+        :return: The discarded files.
+        :rtype: List[str]
+        """
+        self._full_syncs += 1
+        cache = ContentCache.instance()
+        tree = _call(RateLimitScheduler.READ, repo.get_git_tree, head, recursive=True)
+        cached = cache.shas()
+        if tree.raw_data.get("truncated", False):
+            ChangeFeed.logger().warning(
+                f"The tree of {head} is too large; discarding the content cache"
+            )
+            result = list(cached.keys())
+        else:
+            shas = {
+                element.path: element.sha
+                for element in tree.tree
+                if element.type == "blob"
+            }
+            result = [path for path, sha in cached.items() if shas.get(path) != sha]
+        cache.invalidate_all(result)
+
+        return result
+
+    def _invalidate(self, changes: Dict[str, Optional[str]]) -> List[str]:
+        """
+        Discards the cached copies of given changed files, unless they
+        already hold the new blob (e.g. the change was made by this process).
+        :param changes: The new blob sha of each changed file (None if removed).
+        :type changes: Dict[str, Optional[str]]
+        :return: The discarded files.
+        :rtype: List[str]
+        """
+        cache = ContentCache.instance()
+        cached = cache.shas()
+        result = [
+            path
+            for path, sha in changes.items()
+            if path in cached and (sha is None or cached[path] != sha)
+        ]
+        cache.invalidate_all(result)
+
+        return result
+
+    def poll(self) -> Dict[str, Any]:
+        """
+        Checks the branch head, and applies the changes since the last head seen.
+        :return: The head, and the number of changed and discarded files (None if the changes couldn't be listed).
+        :rtype: Dict[str, Any]
+        """
+        with self._poll_lock:
+            (repo, branch) = get_repo_and_branch()
+            head = _call(
+                RateLimitScheduler.READ, repo.get_git_ref, f"heads/{branch}"
+            ).object.sha
+            base = self._sha
+            changes = None
+            if base == head:
+                changes = {}
+            elif base is not None:
+                changes = self._changes_since(repo, base, head)
+
+            if changes is None:
+                invalidated = self._sync(repo, head)
+            else:
+                invalidated = self._invalidate(changes)
+                if changes and ExistenceOracle.enabled():
+                    ExistenceOracle.instance().advance(
+                        base,
+                        head,
+                        [(path, sha is not None) for path, sha in changes.items()],
+                    )
+
+            # only patch the adapter if it's in use
+            adapter = GithubAdapter._singleton
+            if adapter is not None and (changes or invalidated):
+                adapter.apply_changes(list(changes or {}) + invalidated)
+
+            self._sha = head
+            self._polls += 1
+            self._changed_files += len(changes or {})
+            self._invalidations += len(invalidated)
+            if not self._stopped.is_set():
+                ContentCache.instance().validate_until(
+                    time.monotonic() + 2 * ChangeFeed.interval()
+                )
+
+        if base is not None and base != head:
+            self._notify(changes, head)
+
+        return {
+            "sha": head,
+            "changed": None if changes is None else len(changes),
+            "invalidated": len(invalidated),
+        }
+
+    def _notify(self, changes: Optional[Dict[str, Optional[str]]], head: str):
+        """
+        Notifies the listeners of the collections with changes.
+        :param changes: The changed files, or None if they're unknown.
+        :type changes: Optional[Dict[str, Optional[str]]]
+        :param head: The new branch head.
+        :type head: str
+        """
+        with self._lock:
+            listeners = {
+                collection: list(items)
+                for collection, items in self._listeners.items()
+                if items
+            }
+
+        paths_by_collection = {}
+        if changes is None:
+            paths_by_collection = {
+                collection: None for collection in listeners if collection is not None
+            }
+        else:
+            for path in changes:
+                paths_by_collection.setdefault(self._collection(path), []).append(path)
+
+        for collection, paths in paths_by_collection.items():
+            for listener in listeners.get(collection, []) + listeners.get(None, []):
+                try:
+                    listener(collection, paths, head)
+                except Exception as err:
+                    ChangeFeed.logger().error(
+                        f"Error notifying the changes of {collection}: {err}"
+                    )
+
+    def start(self):
+        """
+        Starts following the branch in the background, unless already started.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops following the branch. The content cache goes back to
+        revalidating its entries.
+        """
+        self._stopped.set()
+        ContentCache.instance().validate_until(0.0)
+
+    def _run(self):
+        """
+        Polls the branch until stopped.
+        """
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as err:
+                self._errors += 1
+                ChangeFeed.logger().error(f"Cannot follow the branch: {err}")
+            self._stopped.wait(ChangeFeed.interval())
+
+    def stats(self) -> Dict:
+        """
+        Retrieves the last head seen and the counters.
+        :return: Such metrics.
+        :rtype: Dict
+        """
+        return {
+            "sha": self._sha,
+            "polls": self._polls,
+            "changedFiles": self._changed_files,
+            "invalidations": self._invalidations,
+            "fullSyncs": self._full_syncs,
+            "errors": self._errors,
+        }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,239 @@
+"""
+org/acmsl/licdata/infrastructure/github/collection_index.py
+
+This file defines the CollectionIndex class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+from pythoneda.shared import BaseObject
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class CollectionIndex(BaseObject):
+    """
+    In-memory hash indexes on the summary rows of a collection.
+
+    Class name: CollectionIndex
+
+    Responsibilities:
+        - Map attribute values to the rows having them, for each indexed attribute set.
+        - Follow the changes of the collection incrementally, using its sha.
+
+    Collaborators:
+        - GithubAdapter: Uses it to answer equality lookups.
+    """
+
+    def __init__(self, path: str, attributeSets: List[List[str]]):
+        """
+        Creates a new CollectionIndex instance.
+        :param path: The path of the collection.
+        :type path: str
+        :param attributeSets: The attribute names of each index.
+        :type attributeSets: List[List[str]]
+        """
+        super().__init__()
+        self._path = path
+        self._attribute_sets = []
+        for attribute_set in attributeSets:
+            self.add_attribute_set(attribute_set)
+        self._sha = None
+        self._tracking = False
+        self._rows_by_id = {}
+        self._positions = {}
+        self._buckets = {}
+        self._lock = threading.RLock()
+
+    @property
+    def path(self) -> str:
+        """
+        Retrieves the path of the collection.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def sha(self) -> Optional[str]:
+        """
+        Retrieves the sha of the indexed version of the collection.
+        :return: Such sha.
+        :rtype: Optional[str]
+        """
+        return self._sha
+
+    @property
+    def attribute_sets(self) -> List[Tuple[str, ...]]:
+        """
+        Retrieves the attribute names of each index.
+        :return: Such names.
+        :rtype: List[Tuple[str, ...]]
+        """
+        return self._attribute_sets
+
+    def add_attribute_set(self, attributeNames: List[str]):
+        """
+        Declares a new index on given attributes.
+        :param attributeNames: The attribute names.
+        :type attributeNames: List[str]
+        """
+        attribute_set = tuple(sorted(attributeNames))
+        if len(attribute_set) > 0 and attribute_set not in self._attribute_sets:
+            self._attribute_sets.append(attribute_set)
+            # force a rebuild on next refresh
+            self._sha = None
+
+    @staticmethod
+    def key_for(value: Any) -> Hashable:
+        """
+        Normalizes given attribute value so that it can be used as dictionary key.
+        :param value: The value.
+        :type value: Any
+        :return: The key.
+        :rtype: Hashable
+        """
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return json.dumps(value, sort_keys=True, default=str)
+
+    def _row_key(self, row: Dict, attributeSet: Tuple[str, ...]) -> Tuple:
+        """
+        Builds the key of given row in the index on given attributes.
+        :param row: The row.
+        :type row: Dict
+        :param attributeSet: The attribute names.
+        :type attributeSet: Tuple[str, ...]
+        :return: The key.
+        :rtype: Tuple
+        """
+        return tuple(
+            CollectionIndex.key_for(row.get(name, None)) for name in attributeSet
+        )
+
+    def _add(self, row: Dict):
+        """
+        Adds given row to all indexes.
+        :param row: The row.
+        :type row: Dict
+        """
+        for attribute_set in self._attribute_sets:
+            bucket = self._buckets.setdefault(attribute_set, {})
+            bucket.setdefault(self._row_key(row, attribute_set), []).append(row)
+
+    def _remove(self, row: Dict):
+        """
+        Removes given row from all indexes.
+        :param row: The row.
+        :type row: Dict
+        """
+        for attribute_set in self._attribute_sets:
+            bucket = self._buckets.get(attribute_set, {})
+            key = self._row_key(row, attribute_set)
+            rows = bucket.get(key, [])
+            remaining = [x for x in rows if x is not row]
+            if remaining:
+                bucket[key] = remaining
+            else:
+                bucket.pop(key, None)
+
+    def refresh(self, rows: List[Dict], sha: str):
+        """
+        Brings the indexes up to date with given version of the collection.
+        Only rows added, removed or modified since the indexed version are
+        reindexed.
+        :param rows: The rows of the collection.
+        :type rows: List[Dict]
+        :param sha: The sha of the collection.
+        :type sha: str
+        """
+        with self._lock:
+            if sha is not None and sha == self._sha:
+                return
+            rows_by_id = {}
+            for row in rows:
+                row_id = row.get("id", None)
+                if row_id is None or row_id in rows_by_id:
+                    # cannot follow changes without unique ids
+                    rows_by_id = None
+                    break
+                rows_by_id[row_id] = row
+
+            if rows_by_id is None or self._sha is None or not self._tracking:
+                self._buckets = {}
+                for row in rows:
+                    self._add(row)
+            else:
+                for row_id, row in self._rows_by_id.items():
+                    new_row = rows_by_id.get(row_id, None)
+                    if new_row is None or new_row != row:
+                        self._remove(row)
+                for row_id, row in rows_by_id.items():
+                    old_row = self._rows_by_id.get(row_id, None)
+                    if old_row is None or old_row != row:
+                        self._add(row)
+                    elif old_row is not row:
+                        # same values, new object: keep the old one indexed
+                        rows_by_id[row_id] = old_row
+
+            self._tracking = rows_by_id is not None
+            self._rows_by_id = rows_by_id or {}
+            self._positions = {
+                row.get("id", None): position for position, row in enumerate(rows)
+            }
+            self._sha = sha
+
+    def lookup(self, filter: Dict) -> Optional[List[Dict]]:
+        """
+        Retrieves the rows whose values for the indexed attributes match given filter.
+        The rows still need to be checked against the attributes of the filter
+        not covered by the chosen index.
+        :param filter: The attribute filter.
+        :type filter: Dict
+        :return: The candidate rows in collection order, or None if no index covers the filter.
+        :rtype: Optional[List[Dict]]
+        """
+        with self._lock:
+            if self._sha is None:
+                return None
+            usable = [
+                attribute_set
+                for attribute_set in self._attribute_sets
+                if all(name in filter for name in attribute_set)
+            ]
+            if not usable:
+                return None
+            attribute_set = max(usable, key=len)
+            key = self._row_key(filter, attribute_set)
+            result = list(self._buckets.get(attribute_set, {}).get(key, []))
+
+        if len(result) > 1:
+            result.sort(key=lambda row: self._positions.get(row.get("id", None), 0))
+
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
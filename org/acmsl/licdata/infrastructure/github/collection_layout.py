@@ -0,0 +1,184 @@
+"""
+org/acmsl/licdata/infrastructure/github/collection_layout.py
+
+This file defines the CollectionLayout class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+from pythoneda.shared import BaseObject
+from typing import Dict, List, Optional
+
+
+class CollectionLayout(BaseObject):
+    """
+    Locates the files holding the summary rows of a collection.
+
+    Class name: CollectionLayout
+
+    Responsibilities:
+        - Know whether a collection uses a single {path}/data.json, or
+          {path}/_index/{prefix}.json shards.
+        - Map a row (or a primary-key filter) to the file it belongs to.
+
+    Collaborators:
+        - GithubAdapter: Reads and writes the files it points to.
+    """
+
+    LAYOUT_FILE = "_index/_layout.json"
+
+    def __init__(self, path: str, prefixLength: int = 0, primaryKey: List = None):
+        """
+        Creates a new CollectionLayout instance.
+        :param path: The path of the collection.
+        :type path: str
+        :param prefixLength: The number of hex digits of the shard prefixes. 0 means no sharding.
+        :type prefixLength: int
+        :param primaryKey: The names of the attributes the shards are computed from.
+        :type primaryKey: List
+        """
+        super().__init__()
+        self._path = path
+        self._prefix_length = prefixLength
+        self._primary_key = list(primaryKey or [])
+
+    @classmethod
+    def from_dict(cls, path: str, layout: Optional[Dict]) -> "CollectionLayout":
+        """
+        Builds the layout of given collection from the contents of its layout file.
+        :param path: The path of the collection.
+        :type path: str
+        :param layout: The contents of the layout file, or None if there's none.
+        :type layout: Optional[Dict]
+        :return: The layout.
+        :rtype: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        """
+        if layout is None:
+            return cls(path)
+        return cls(
+            path, int(layout.get("prefixLength", 0)), layout.get("primaryKey", [])
+        )
+
+    def to_dict(self) -> Dict:
+        """
+        Retrieves the contents of the layout file.
+        :return: Such contents.
+        :rtype: Dict
+        """
+        return {"prefixLength": self._prefix_length, "primaryKey": self._primary_key}
+
+    @property
+    def path(self) -> str:
+        """
+        Retrieves the path of the collection.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def sharded(self) -> bool:
+        """
+        Checks whether the collection is sharded.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._prefix_length > 0
+
+    @property
+    def layout_file(self) -> str:
+        """
+        Retrieves the path of the layout file.
+        :return: Such path.
+        :rtype: str
+        """
+        return f"{self._path}/{CollectionLayout.LAYOUT_FILE}"
+
+    @property
+    def legacy_file(self) -> str:
+        """
+        Retrieves the path of the single-file summary.
+        :return: Such path.
+        :rtype: str
+        """
+        return f"{self._path}/data.json"
+
+    @property
+    def files(self) -> List[str]:
+        """
+        Retrieves the paths of all files holding summary rows.
+        :return: Such paths.
+        :rtype: List[str]
+        """
+        if not self.sharded:
+            return [self.legacy_file]
+        return [
+            self.shard_file(f"{prefix:0{self._prefix_length}x}")
+            for prefix in range(16**self._prefix_length)
+        ]
+
+    @staticmethod
+    def unsharded_path(file: str) -> Optional[str]:
+        """
+        Retrieves the collection whose single-file summary is given file.
+        :param file: The path of a summary file.
+        :type file: str
+        :return: The path of the collection, or None if the file is a shard.
+        :rtype: Optional[str]
+        """
+        if "/_index/" in file or not file.endswith("/data.json"):
+            return None
+        return file[: -len("/data.json")]
+
+    def shard_file(self, prefix: str) -> str:
+        """
+        Retrieves the path of the shard with given prefix.
+        :param prefix: The prefix.
+        :type prefix: str
+        :return: Such path.
+        :rtype: str
+        """
+        return f"{self._path}/_index/{prefix}.json"
+
+    def file_for(self, values: Dict) -> Optional[str]:
+        """
+        Retrieves the file containing the rows with given attribute values.
+        :param values: The attribute values (a row, or a filter).
+        :type values: Dict
+        :return: The path of the file, or None if the values don't include the whole primary key.
+        :rtype: Optional[str]
+        """
+        if not self.sharded:
+            return self.legacy_file
+        if not all(name in values for name in self._primary_key):
+            return None
+        key = json.dumps(
+            [values.get(name, None) for name in self._primary_key], default=str
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.shard_file(digest[: self._prefix_length])
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,377 @@
+"""
+org/acmsl/licdata/infrastructure/github/content_cache.py
+
+This file defines the ContentCache class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+import json
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class CachedContent:
+    """
+    A decrypted file, as cached by ContentCache.
+
+    Class name: CachedContent
+
+    Responsibilities:
+        - Hold the decrypted text of a file, its blob sha, and its parsed JSON.
+
+    Collaborators:
+        - None
+    """
+
+    # parsed JSON takes several times the size of its text
+    JSON_OVERHEAD = 4
+
+    def __init__(self, path: str, sha: str, text: str, etag: str = None):
+        """
+        Creates a new CachedContent instance.
+        :param path: The path.
+        :type path: str
+        :param sha: The blob sha.
+        :type sha: str
+        :param text: The decrypted text.
+        :type text: str
+        :param etag: The ETag of the response, used to revalidate the entry.
+        :type etag: str
+        """
+        self._path = path
+        self._sha = sha
+        self._text = text
+        self._etag = etag
+        self._json = None
+        self._json_parsed = False
+        self._size = CachedContent.estimate_size(text)
+
+    @property
+    def path(self) -> str:
+        """
+        Retrieves the path.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def sha(self) -> str:
+        """
+        Retrieves the blob sha.
+        :return: Such sha.
+        :rtype: str
+        """
+        return self._sha
+
+    @property
+    def text(self) -> str:
+        """
+        Retrieves the decrypted text.
+        :return: Such text.
+        :rtype: str
+        """
+        return self._text
+
+    @property
+    def etag(self) -> Optional[str]:
+        """
+        Retrieves the ETag of the response, if any.
+        :return: Such ETag.
+        :rtype: Optional[str]
+        """
+        return self._etag
+
+    @property
+    def json(self) -> Any:
+        """
+        Retrieves the parsed contents. Callers must not modify it.
+        :return: The parsed JSON.
+        :rtype: Any
+        """
+        if not self._json_parsed:
+            self._json = json.loads(self._text)
+            self._json_parsed = True
+        return self._json
+
+    @staticmethod
+    def estimate_size(text: Optional[str]) -> int:
+        """
+        Estimates the memory taken by given text, and by its parsed JSON
+        if it looks like JSON (parsed lazily, so it's reserved upfront).
+        :param text: The text.
+        :type text: Optional[str]
+        :return: The approximate number of bytes.
+        :rtype: int
+        """
+        if text is None:
+            return 0
+
+        result = len(text.encode("utf-8"))
+        if text[:1] in ["[", "{"]:
+            result += result * CachedContent.JSON_OVERHEAD
+
+        return result
+
+    @property
+    def size(self) -> int:
+        """
+        Retrieves the approximate number of bytes accounted for this entry:
+        the encoded text and the parsed JSON.
+        :return: Such size.
+        :rtype: int
+        """
+        return self._size
+
+
+class ContentCache(BaseObject):
+    """
+    LRU cache of decrypted Github files, bounded by a byte budget.
+
+    Class name: ContentCache
+
+    Responsibilities:
+        - Keep decrypted files and their parsed JSON, keyed by path and blob sha.
+        - Evict the least-recently-used entries when the byte budget is exceeded.
+        - Keep hit/miss counters.
+        - Tell whether its entries are known to be current, without revalidating them.
+        - Drop the entries read before their path was last invalidated.
+
+    Collaborators:
+        - CachedContent: The cached entries.
+    """
+
+    _singleton = None
+
+    def __init__(self, maxBytes: int = None):
+        """
+        Creates a new ContentCache instance.
+        :param maxBytes: The byte budget. Defaults to GITHUB_CACHE_MAX_BYTES, or 64 MiB.
+        :type maxBytes: int
+        """
+        super().__init__()
+        if maxBytes is None:
+            maxBytes = int(os.environ.get("GITHUB_CACHE_MAX_BYTES", str(64 << 20)))
+        self._max_bytes = maxBytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._validated_until = 0.0
+        self._epoch = 0
+        self._invalidated_at: Dict[str, int] = {}
+        self._floor = 0
+        self._stale_puts = 0
+
+    @classmethod
+    def instance(cls) -> "ContentCache":
+        """
+        Retrieves the instance.
+        :return: Such instance.
+        :rtype: org.acmsl.licdata.infrastructure.github.ContentCache
+        """
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        Retrieves the byte budget.
+        :return: Such budget.
+        :rtype: int
+        """
+        return self._max_bytes
+
+    def get(self, path: str, sha: str = None) -> Optional[CachedContent]:
+        """
+        Retrieves the entry for given path, if cached.
+        :param path: The path.
+        :type path: str
+        :param sha: The expected blob sha, if known.
+        :type sha: str
+        :return: The entry, or None if it's not cached (or its sha differs).
+        :rtype: Optional[org.acmsl.licdata.infrastructure.github.CachedContent]
+        """
+        with self._lock:
+            result = self._entries.get(path, None)
+            if result is not None and sha is not None and result.sha != sha:
+                result = None
+            if result is not None:
+                self._entries.move_to_end(path)
+            return result
+
+    def epoch(self) -> int:
+        """
+        Retrieves the current invalidation epoch, to be taken before reading
+        a file and passed to put() afterwards.
+        :return: Such epoch.
+        :rtype: int
+        """
+        with self._lock:
+            return self._epoch
+
+    def put(self, entry: CachedContent, epoch: int = None):
+        """
+        Stores given entry, evicting older ones if needed.
+        :param entry: The entry.
+        :type entry: org.acmsl.licdata.infrastructure.github.CachedContent
+        :param epoch: The epoch taken before the entry was read. If its path was invalidated since, the entry could be stale and it's dropped.
+        :type epoch: int
+        """
+        if entry.text is None or entry.size > self._max_bytes:
+            self.invalidate(entry.path)
+            return
+        with self._lock:
+            if epoch is not None and epoch < max(
+                self._floor, self._invalidated_at.get(entry.path, 0)
+            ):
+                self._stale_puts += 1
+                return
+            previous = self._entries.pop(entry.path, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[entry.path] = entry
+            self._bytes += entry.size
+            while self._bytes > self._max_bytes and len(self._entries) > 1:
+                (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def invalidate(self, path: str):
+        """
+        Discards the entry for given path.
+        :param path: The path.
+        :type path: str
+        """
+        with self._lock:
+            self._epoch += 1
+            self._invalidated_at[path] = self._epoch
+            if len(self._invalidated_at) > max(1024, 4 * len(self._entries)):
+                # forget the paths, and drop any read started before now
+                self._invalidated_at.clear()
+                self._floor = self._epoch
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry.size
+                self._invalidations += 1
+
+    def invalidate_all(self, paths: List[str]):
+        """
+        Discards the entries for given paths.
+        :param paths: The paths.
+        :type paths: List[str]
+        """
+        for path in paths:
+            self.invalidate(path)
+
+    def shas(self) -> Dict[str, str]:
+        """
+        Retrieves the blob sha of each cached path.
+        :return: The shas, indexed by path.
+        :rtype: Dict[str, str]
+        """
+        with self._lock:
+            return {path: entry.sha for path, entry in self._entries.items()}
+
+    def clear(self):
+        """
+        Discards all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._epoch += 1
+            self._invalidated_at.clear()
+            self._floor = self._epoch
+
+    def validate_until(self, deadline: float):
+        """
+        Annotates that the entries are known to be current (e.g. because
+        the changes of the branch are being followed) until given time.
+        :param deadline: The time, as returned by time.monotonic().
+        :type deadline: float
+        """
+        with self._lock:
+            self._validated_until = deadline
+
+    def is_validated(self) -> bool:
+        """
+        Checks whether the entries can be used without revalidating them.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return time.monotonic() < self._validated_until
+
+    def record_hit(self):
+        """
+        Annotates a request served from the cache.
+        """
+        with self._lock:
+            self._hits += 1
+
+    def record_miss(self):
+        """
+        Annotates a request that needed to download the file.
+        """
+        with self._lock:
+            self._misses += 1
+
+    def record_revalidation(self):
+        """
+        Annotates a conditional request answered with "304 Not Modified".
+        """
+        with self._lock:
+            self._revalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retrieves the cache counters.
+        :return: The counters.
+        :rtype: Dict[str, int]
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "revalidations": self._revalidations,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "stalePuts": self._stale_puts,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self._max_bytes,
+                "validated": self.is_validated(),
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,309 @@
+"""
+org/acmsl/licdata/infrastructure/github/event_compactor.py
+
+This file provides the job that folds the events of each entity into a snapshot.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import gzip
+import json
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_repo_and_branch,
+)
+from org.acmsl.licdata.infrastructure.github.github_raw import (
+    GithubConflictError,
+    _call,
+    _stream_blob,
+    commit_files,
+)
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+    request_priority,
+)
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_FILE = "_snapshot.json"
+EVENTS_DIR = "_events"
+HISTORY_DIR = "_history"
+
+
+def event_order(name: str) -> Tuple[float, str]:
+    """
+    Retrieves the sort key of an event file ({timestamp}-{name}.json).
+    :param name: The name of the file.
+    :type name: str
+    :return: Its timestamp, and the name itself to break ties.
+    :rtype: Tuple[float, str]
+    """
+    try:
+        timestamp = float(name.split("-", 1)[0])
+    except ValueError:
+        timestamp = float("inf")
+
+    return (timestamp, name)
+
+
+def read_history(content: str) -> List[Dict[str, Any]]:
+    """
+    Reads an archive written by the compaction.
+    :param content: The (decrypted) contents of the archive.
+    :type content: str
+    :return: The events, in order, as {"name": file name, "event": payload}.
+    :rtype: List[Dict[str, Any]]
+    """
+    return json.loads(gzip.decompress(base64.b64decode(content)).decode("utf-8"))
+
+
+def _write_history(events: List[Dict[str, Any]]) -> str:
+    """
+    Writes an archive: gzip'd JSON, as base64 text since every file gets
+    encrypted as text.
+    :param events: The events, as {"name": file name, "event": payload}.
+    :type events: List[Dict[str, Any]]
+    :return: The contents of the archive.
+    :rtype: str
+    """
+    return base64.b64encode(
+        gzip.compress(json.dumps(events, separators=(",", ":")).encode("utf-8"))
+    ).decode("ascii")
+
+
+def _entities(tree, collections: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Groups the files of the tree that matter to the compaction by entity.
+    :param tree: The recursive tree of the branch.
+    :type tree: github.GitTree.GitTree
+    :param collections: The collections to compact, or None for all of them.
+    :type collections: Optional[List[str]]
+    :return: The event files (name, sha), the data sha and the snapshot sha of each entity ({path}/{id}).
+    :rtype: Dict[str, Dict[str, Any]]
+    """
+    result = {}
+    for element in tree.tree:
+        if element.type != "blob":
+            continue
+        parts = element.path.split("/")
+        if collections is not None and parts[0] not in collections:
+            continue
+        if len(parts) == 4 and parts[2] == EVENTS_DIR:
+            key = "events"
+        elif len(parts) == 3 and parts[2] in ["data.json", SNAPSHOT_FILE]:
+            key = parts[2]
+        else:
+            continue
+        if parts[1].startswith("_"):
+            continue
+        entity = result.setdefault(
+            f"{parts[0]}/{parts[1]}",
+            {"events": [], "data.json": None, SNAPSHOT_FILE: None},
+        )
+        if key == "events":
+            entity["events"].append((parts[3], element.sha))
+        else:
+            entity[key] = element.sha
+
+    return result
+
+
+def _fold(entity: str, info: Dict[str, Any], commit: str) -> Dict[str, Optional[str]]:
+    """
+    Folds all events of an entity into its snapshot. The blobs come from a
+    single commit, in which the data file already reflects every event.
+    :param entity: The entity ({path}/{id}).
+    :type entity: str
+    :param info: The event files, data sha and snapshot sha of the entity.
+    :type info: Dict[str, Any]
+    :param commit: The commit the blobs were listed from.
+    :type commit: str
+    :return: The files to write (None for the event files to remove).
+    :rtype: Dict[str, Optional[str]]
+    """
+    events = sorted(info["events"], key=lambda event: event_order(event[0]))
+    history = [
+        {"name": name, "event": json.loads(_stream_blob(sha))} for name, sha in events
+    ]
+
+    previous = {}
+    if info[SNAPSHOT_FILE] is not None:
+        previous = json.loads(_stream_blob(info[SNAPSHOT_FILE]))
+    state = None
+    if info["data.json"] is not None:
+        state = json.loads(_stream_blob(info["data.json"]))
+
+    high_water_mark = events[-1][0]
+    stem = high_water_mark.rsplit(".json", 1)[0]
+    archive = f"{entity}/{HISTORY_DIR}/{stem}.json.gz"
+
+    result = {f"{entity}/{EVENTS_DIR}/{name}": None for name, _ in events}
+    result[archive] = _write_history(history)
+    result[f"{entity}/{SNAPSHOT_FILE}"] = json.dumps(
+        {
+            "highWaterMark": high_water_mark,
+            "events": previous.get("events", 0) + len(events),
+            "history": previous.get("history", []) + [archive],
+            "state": state,
+            "commit": commit,
+        }
+    )
+
+    return result
+
+
+def _commit(
+    files: Dict[str, Optional[str]],
+    expectedShas: Dict[str, Optional[str]],
+    message: str,
+) -> bool:
+    """
+    Commits a batch of snapshots, retrying while the branch moves.
+    :param files: The files to write (None for the ones to remove).
+    :type files: Dict[str, Optional[str]]
+    :param expectedShas: The snapshot shas the compaction started from.
+    :type expectedShas: Dict[str, Optional[str]]
+    :param message: The commit message.
+    :type message: str
+    :return: True if the batch got committed.
+    :rtype: bool
+    """
+    retries = int(os.environ.get("GITHUB_WRITE_RETRIES", "5"))
+    backoff = float(os.environ.get("GITHUB_WRITE_BACKOFF_MS", "100")) / 1000
+    for attempt in range(retries + 1):
+        try:
+            return commit_files(files, message, expectedShas) is not None
+        except GithubConflictError as e:
+            print(f"Conflict compacting events (attempt {attempt + 1}): {e}")
+            time.sleep(random.uniform(0, min(backoff * 2**attempt, 5.0)))
+
+    return False
+
+
+def compact_events(
+    collections: Optional[List[str]] = None,
+    minEvents: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Folds the event files ({path}/{id}/_events/*.json) of each entity into
+    a snapshot ({path}/{id}/_snapshot.json) with the entity state, the
+    high-water mark (the last event folded), and the archives
+    ({path}/{id}/_history/{high-water mark}.json.gz) that keep the full
+    history, in order.
+    The branch tree is listed in a single request, and the blobs of each
+    entity are read from that commit in parallel, so the events and the
+    state of the snapshot are consistent. Writes can go on meanwhile: their
+    events are left in place for the next run, and the snapshots are
+    committed only if nobody else compacted the entity since.
+    :param collections: The collections to compact. Defaults to all of them.
+    :type collections: Optional[List[str]]
+    :param minEvents: The minimum number of event files an entity must have to be compacted. Defaults to GITHUB_COMPACT_MIN_EVENTS, or 10.
+    :type minEvents: Optional[int]
+    :param workers: The number of entities read in parallel. Defaults to GITHUB_COMPACT_WORKERS, or 8.
+    :type workers: Optional[int]
+    :return: The commit compacted, and the number of entities found, compacted and failed, of events folded and of commits, and the elapsed time.
+    :rtype: Dict[str, Any]
+    """
+    started = time.monotonic()
+    if minEvents is None:
+        minEvents = int(os.environ.get("GITHUB_COMPACT_MIN_EVENTS", "10"))
+    if workers is None:
+        workers = int(os.environ.get("GITHUB_COMPACT_WORKERS", "8"))
+    batch_size = max(1, int(os.environ.get("GITHUB_COMPACT_BATCH_SIZE", "50")))
+
+    # background job: below interactive and read traffic
+    with request_priority(RateLimitScheduler.WRITE):
+        (repo, branch) = get_repo_and_branch()
+        commit = _call(
+            RateLimitScheduler.READ, repo.get_git_ref, f"heads/{branch}"
+        ).object.sha
+        tree = _call(RateLimitScheduler.READ, repo.get_git_tree, commit, recursive=True)
+        if tree.raw_data.get("truncated", False):
+            print(
+                f"The tree of {branch} is too large; only part of it will be compacted"
+            )
+
+        candidates = [
+            (entity, info)
+            for entity, info in sorted(_entities(tree, collections).items())
+            if info["events"] and len(info["events"]) >= max(1, minEvents)
+        ]
+
+        compacted = 0
+        folded = 0
+        failed = 0
+        commits = 0
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(candidates) or 1))
+        ) as pool:
+            for start in range(0, len(candidates), batch_size):
+                batch = candidates[start : start + batch_size]
+                contexts = [copy_context() for _ in batch]
+                futures = [
+                    pool.submit(context.run, _fold, entity, info, commit)
+                    for context, (entity, info) in zip(contexts, batch)
+                ]
+                files = {}
+                expected_shas = {}
+                count = 0
+                events = 0
+                for (entity, info), future in zip(batch, futures):
+                    try:
+                        files.update(future.result())
+                    except Exception as e:
+                        failed += 1
+                        print(f"Error compacting the events of {entity}: {e}")
+                        continue
+                    expected_shas[f"{entity}/{SNAPSHOT_FILE}"] = info[SNAPSHOT_FILE]
+                    count += 1
+                    events += len(info["events"])
+                if not files:
+                    continue
+                if _commit(
+                    files,
+                    expected_shas,
+                    f"Compacted the events of {count} entities",
+                ):
+                    compacted += count
+                    folded += events
+                    commits += 1
+                else:
+                    failed += count
+
+    return {
+        "commit": commit,
+        "entities": len(candidates),
+        "compacted": compacted,
+        "events": folded,
+        "failed": failed,
+        "commits": commits,
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
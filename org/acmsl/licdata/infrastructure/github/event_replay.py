@@ -0,0 +1,413 @@
+"""
+org/acmsl/licdata/infrastructure/github/event_replay.py
+
+This file provides the job that rebuilds the entities of a collection from their events.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import hashlib
+import json
+from org.acmsl.licdata.infrastructure.crypt_utils import decrypt, encrypt
+from org.acmsl.licdata.infrastructure.github.collection_layout import (
+    CollectionLayout,
+)
+from org.acmsl.licdata.infrastructure.github.event_compactor import (
+    EVENTS_DIR,
+    HISTORY_DIR,
+    SNAPSHOT_FILE,
+    event_order,
+    read_history,
+)
+from org.acmsl.licdata.infrastructure.github.existence_oracle import ExistenceOracle
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_repo_and_branch,
+)
+from org.acmsl.licdata.infrastructure.github.github_raw import (
+    _call,
+    _stream_blob,
+    commit_files,
+)
+from org.acmsl.licdata.infrastructure.github.payload_codec import (
+    decode_payload,
+    encode_payload,
+)
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+)
+import os
+from pythoneda.shared import Entity, Event
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _new_entity() -> Dict[str, Any]:
+    """
+    Creates the listing of an entity.
+    :return: Its event files, archives, snapshot and data file, all empty.
+    :rtype: Dict[str, Any]
+    """
+    return {"events": [], "history": {}, "snapshot": None, "data": None}
+
+
+def _list_branch(path: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str], str]:
+    """
+    Lists the files of a collection in the branch head, in a single request.
+    Files are referenced by their blob sha.
+    :param path: The path of the collection.
+    :type path: str
+    :return: The files of each entity (by id), the sha of the collection-level files, and the commit.
+    :rtype: Tuple[Dict[str, Dict[str, Any]], Dict[str, str], str]
+    """
+    (repo, branch) = get_repo_and_branch()
+    commit = _call(
+        RateLimitScheduler.READ, repo.get_git_ref, f"heads/{branch}"
+    ).object.sha
+    tree = _call(RateLimitScheduler.READ, repo.get_git_tree, commit, recursive=True)
+    if tree.raw_data.get("truncated", False):
+        raise ValueError(f"The tree of {branch} is too large to be listed at once")
+
+    entities = {}
+    files = {}
+    prefix = f"{path}/"
+    for element in tree.tree:
+        if element.type != "blob" or not element.path.startswith(prefix):
+            continue
+        parts = element.path[len(prefix) :].split("/")
+        if parts[0].startswith("_") or len(parts) == 1:
+            files[element.path] = element.sha
+            continue
+        entity = entities.setdefault(parts[0], _new_entity())
+        if len(parts) == 3 and parts[1] == EVENTS_DIR:
+            entity["events"].append((parts[2], element.sha))
+        elif len(parts) == 3 and parts[1] == HISTORY_DIR:
+            entity["history"][element.path] = element.sha
+        elif len(parts) == 2 and parts[1] == SNAPSHOT_FILE:
+            entity["snapshot"] = element.sha
+        elif len(parts) == 2 and parts[1] == "data.json":
+            entity["data"] = element.sha
+
+    return (entities, files, commit)
+
+
+def _list_directory(
+    root: str, path: str
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Lists the files of a collection in a local copy of the repository (e.g.
+    a clone, or the FILESYSTEM_ROOT directory). Files are referenced by
+    their local path.
+    :param root: The local directory.
+    :type root: str
+    :param path: The path of the collection.
+    :type path: str
+    :return: The files of each entity (by id), and the local path of the collection-level files.
+    :rtype: Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]
+    """
+    entities = {}
+    files = {}
+    folder = os.path.join(root, *path.split("/"))
+    for name in os.listdir(folder):
+        local = os.path.join(folder, name)
+        if name.startswith("."):
+            continue
+        if os.path.isfile(local):
+            files[f"{path}/{name}"] = local
+            continue
+        if name.startswith("_"):
+            for parent, _, children in os.walk(local):
+                for child in children:
+                    relative = os.path.relpath(os.path.join(parent, child), root)
+                    files["/".join(relative.split(os.sep))] = os.path.join(
+                        parent, child
+                    )
+            continue
+        entity = entities.setdefault(name, _new_entity())
+        for child in os.listdir(local):
+            if child == EVENTS_DIR or child == HISTORY_DIR:
+                for file in os.listdir(os.path.join(local, child)):
+                    if child == EVENTS_DIR:
+                        entity["events"].append(
+                            (file, os.path.join(local, child, file))
+                        )
+                    else:
+                        entity["history"][f"{path}/{name}/{child}/{file}"] = (
+                            os.path.join(local, child, file)
+                        )
+            elif child == SNAPSHOT_FILE:
+                entity["snapshot"] = os.path.join(local, child)
+            elif child == "data.json":
+                entity["data"] = os.path.join(local, child)
+
+    return (entities, files)
+
+
+def _read_local(file: str) -> str:
+    """
+    Reads and decrypts a local file.
+    :param file: The local path.
+    :type file: str
+    :return: The decrypted contents.
+    :rtype: str
+    """
+    with open(file, "rb") as handle:
+        return decode_payload(decrypt(base64.b64encode(handle.read())))
+
+
+def _blob_sha(content: str) -> str:
+    """
+    Computes the sha of the blob given contents would be stored in.
+    Compression and encryption are deterministic, so unchanged files keep
+    their sha.
+    :param content: The contents.
+    :type content: str
+    :return: The sha.
+    :rtype: str
+    """
+    data = encrypt(encode_payload(content))
+    return hashlib.sha1(b"blob %d\x00" % len(data) + data).hexdigest()
+
+
+def _replay_entity(
+    id: str,
+    listing: Dict[str, Any],
+    read: Callable[[str], str],
+    buildEvent: Callable[[str, Dict], Optional[Event]],
+    buildEntity: Callable[[Event], Entity],
+) -> Tuple[Optional[Entity], bool, int]:
+    """
+    Rebuilds an entity from its archived and pending events, in timestamp order.
+    :param id: The id of the entity.
+    :type id: str
+    :param listing: The files of the entity.
+    :type listing: Dict[str, Any]
+    :param read: The function reading a file, given its reference.
+    :type read: Callable[[str], str]
+    :param buildEvent: A function to build the domain event of an event file, given its name and contents, or None to skip it.
+    :type buildEvent: Callable[[str, Dict], Optional[pythoneda.shared.Event]]
+    :param buildEntity: A function to build the entity from its first event.
+    :type buildEntity: Callable[[pythoneda.shared.Event], pythoneda.shared.Entity]
+    :return: The entity (None if no event creates it), whether it was deleted, and the number of events read.
+    :rtype: Tuple[Optional[pythoneda.shared.Entity], bool, int]
+    """
+    events = {}
+    if listing["snapshot"] is not None:
+        snapshot = json.loads(read(listing["snapshot"]))
+        for archive in snapshot.get("history", []):
+            if archive not in listing["history"]:
+                raise ValueError(f"{archive} is missing")
+            for item in read_history(read(listing["history"][archive])):
+                events[item["name"]] = item["event"]
+    for name, reference in listing["events"]:
+        events[name] = json.loads(read(reference))
+
+    entity = None
+    deleted = False
+    for name in sorted(events, key=event_order):
+        if name.endswith("deleted.json"):
+            deleted = True
+        event = buildEvent(name, events[name])
+        if event is None:
+            continue
+        if entity is None:
+            entity = buildEntity(event)
+        else:
+            entity.apply(event)
+
+    if entity is not None and str(entity.id) != id:
+        raise ValueError(f"Events of {id} rebuilt entity {entity.id}")
+
+    return (entity, deleted, len(events))
+
+
+def _write_local(root: str, files: Dict[str, str]):
+    """
+    Writes given files, compressed and encrypted, under a local directory.
+    :param root: The local directory.
+    :type root: str
+    :param files: The contents of each file, indexed by path.
+    :type files: Dict[str, str]
+    """
+    for path, content in files.items():
+        local = os.path.join(root, *path.split("/"))
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        with open(local, "wb") as handle:
+            handle.write(encrypt(encode_payload(content)))
+
+
+def replay_events(
+    path: str,
+    buildEvent: Callable[[str, Dict], Optional[Event]],
+    buildEntity: Callable[[Event], Entity],
+    source: Optional[str] = None,
+    output: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Rebuilds every entity of a collection from its events, and regenerates
+    the summary ({path}/data.json, or its shards), to recover from data
+    files that drifted from the events.
+    The events of each entity (the archives of its snapshot, if compacted,
+    and the _events files) are read in parallel across entities, sorted by
+    timestamp, and applied through the domain: the first event that builds
+    a domain event creates the entity, and the rest are applied to it.
+    The entities that cannot be replayed keep their current files and
+    summary rows.
+    :param path: The path of the collection.
+    :type path: str
+    :param buildEvent: A function to build the domain event of an event file, given its name and contents, or None to skip it (e.g. requests).
+    :type buildEvent: Callable[[str, Dict], Optional[pythoneda.shared.Event]]
+    :param buildEntity: A function to build the entity from its first event.
+    :type buildEntity: Callable[[pythoneda.shared.Event], pythoneda.shared.Entity]
+    :param source: A local copy of the repository to read the events from, which is much faster. Defaults to the branch head.
+    :type source: Optional[str]
+    :param output: A local directory to write the rebuilt files to. Defaults to committing the changed ones, in a single commit.
+    :type output: Optional[str]
+    :param workers: The number of entities replayed in parallel. Defaults to GITHUB_REPLAY_WORKERS, or 16.
+    :type workers: Optional[int]
+    :return: The number of entities and events replayed, of entities failed, of files written, the commit (if any), and the elapsed time.
+    :rtype: Dict[str, Any]
+    """
+    started = time.monotonic()
+    if workers is None:
+        workers = int(os.environ.get("GITHUB_REPLAY_WORKERS", "16"))
+
+    if source is None:
+        (entities, collection_files, head) = _list_branch(path)
+        read = _stream_blob
+    else:
+        (entities, collection_files) = _list_directory(source, path)
+        head = None
+        read = _read_local
+
+    layout_file = f"{path}/{CollectionLayout.LAYOUT_FILE}"
+    layout = CollectionLayout.from_dict(
+        path,
+        (
+            json.loads(read(collection_files[layout_file]))
+            if layout_file in collection_files
+            else None
+        ),
+    )
+
+    ids = sorted(entities)
+    contexts = [copy_context() for _ in ids]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ids) or 1))) as pool:
+        futures = [
+            pool.submit(
+                context.run,
+                _replay_entity,
+                id,
+                entities[id],
+                read,
+                buildEvent,
+                buildEntity,
+            )
+            for context, id in zip(contexts, ids)
+        ]
+
+        files = {}
+        current_shas = {}
+        rows = {file: [] for file in layout.files}
+        events = 0
+        failed_ids = set()
+        for id, future in zip(ids, futures):
+            try:
+                (entity, deleted, count) = future.result()
+            except Exception as e:
+                failed_ids.add(id)
+                print(f"Error replaying the events of {path}/{id}: {e}")
+                continue
+            events += count
+            if entity is None:
+                continue
+            data = entity.to_dict()
+            file = None
+            if not deleted:
+                file = layout.file_for(data)
+                if file is None:
+                    failed_ids.add(id)
+                    print(f"{path}/{id} lacks the primary key")
+                    continue
+            files[f"{path}/{id}/data.json"] = json.dumps(data)
+            current_shas[f"{path}/{id}/data.json"] = entities[id]["data"]
+            if file is not None:
+                rows[file].append(entity.to_dict_simplified())
+
+    failed = len(failed_ids)
+    if failed_ids:
+        # keep the current rows of the entities that couldn't be replayed
+        for file in rows:
+            if file in collection_files:
+                rows[file].extend(
+                    [
+                        row
+                        for row in json.loads(read(collection_files[file]))
+                        if row is not None and row.get("id", None) in failed_ids
+                    ]
+                )
+
+    for file, items in rows.items():
+        files[file] = json.dumps(items)
+        current_shas[file] = collection_files.get(file, None)
+
+    commit = None
+    if output is not None:
+        _write_local(output, files)
+    else:
+        if source is None:
+            # only the files that changed, and only if the summaries didn't
+            files = {
+                file: content
+                for file, content in files.items()
+                if current_shas[file] != _blob_sha(content)
+            }
+            expected_shas = {file: current_shas[file] for file in rows if file in files}
+        else:
+            expected_shas = None
+        if files:
+            commit = commit_files(
+                files,
+                f"Replayed {events} events of {len(ids)} {path}",
+                expected_shas,
+            )
+            if commit is None:
+                raise ValueError(f"Could not commit the replay of {path}")
+            if ExistenceOracle.enabled():
+                ExistenceOracle.instance().record(files)
+
+    return {
+        "head": head,
+        "entities": len(ids) - failed,
+        "events": events,
+        "failed": failed,
+        "files": len(files),
+        "commit": getattr(commit, "sha", None),
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
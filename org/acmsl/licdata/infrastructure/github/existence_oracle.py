@@ -0,0 +1,393 @@
+"""
+org/acmsl/licdata/infrastructure/github/existence_oracle.py
+
+This file defines the ExistenceOracle class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    get_repo_and_branch,
+)
+from org.acmsl.licdata.infrastructure.github.github_raw import _call
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+)
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ExistenceOracle(BaseObject):
+    """
+    Knows which entities exist ({path}/{id}/data.json) and which ones were
+    deleted ({path}/{id}.deleted), from the tree of the branch.
+
+    The tree is fetched once (recursively), and then kept up to date from
+    the files changed between the commit it reflects and the branch head
+    (compare endpoint), checking the head at most every GITHUB_TREE_TTL
+    seconds (2 by default). Tombstones are permanent, so deleted ids are
+    always answered locally; ids not found are only trusted while the tree
+    is fresh. The writes of this process are recorded as they're committed.
+
+    Class name: ExistenceOracle
+
+    Responsibilities:
+        - Keep the set of live and deleted entities of every collection.
+        - Refresh them incrementally from the branch head.
+
+    Collaborators:
+        - GithubAdapter: Skips the requests for missing or deleted entities.
+    """
+
+    LIVE = "live"
+    DELETED = "deleted"
+    MISSING = "missing"
+
+    MAX_COMPARE_FILES = 300
+
+    _singleton = None
+
+    def __init__(self):
+        """
+        Creates a new ExistenceOracle instance.
+        """
+        super().__init__()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sha = None
+        self._live: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._checked = None
+        self._recorded: Optional[List[Tuple[str, bool]]] = None
+        self._truncated = False
+        self._answers = 0
+        self._full_refreshes = 0
+        self._incremental_refreshes = 0
+
+    @classmethod
+    def instance(cls) -> "ExistenceOracle":
+        """
+        Retrieves the instance.
+        :return: Such instance.
+        :rtype: org.acmsl.licdata.infrastructure.github.ExistenceOracle
+        """
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Checks whether the oracle is enabled (GITHUB_EXISTENCE_ORACLE, true by default).
+        :return: True in such case.
+        :rtype: bool
+        """
+        return os.environ.get("GITHUB_EXISTENCE_ORACLE", "true").lower() not in [
+            "false",
+            "0",
+            "no",
+        ]
+
+    @property
+    def sha(self) -> Optional[str]:
+        """
+        Retrieves the commit the tree reflects.
+        :return: Such sha, or None if the tree is not loaded.
+        :rtype: Optional[str]
+        """
+        return self._sha
+
+    @staticmethod
+    def _entity(path: str) -> Tuple[Optional[str], bool]:
+        """
+        Retrieves the entity a file belongs to, if it's its data or its tombstone.
+        :param path: The path of the file.
+        :type path: str
+        :return: The entity ({path}/{id}), or None; and whether the file is a tombstone.
+        :rtype: Tuple[Optional[str], bool]
+        """
+        if path.endswith(".deleted"):
+            return (path[: -len(".deleted")], True)
+
+        if path.endswith("/data.json"):
+            entity = path[: -len("/data.json")]
+            if "/" in entity and not entity.rsplit("/", 1)[1].startswith("_"):
+                return (entity, False)
+
+        return (None, False)
+
+    def _apply(self, changes: Iterable[Tuple[str, bool]]):
+        """
+        Applies given file changes. Must be called holding the lock.
+        :param changes: The (path, exists) of the changed files.
+        :type changes: Iterable[Tuple[str, bool]]
+        """
+        for path, exists in changes:
+            (entity, tombstone) = self._entity(path)
+            if entity is None:
+                continue
+            target = self._deleted if tombstone else self._live
+            if exists:
+                target.add(entity)
+            else:
+                target.discard(entity)
+
+    def record(self, files: Dict[str, Optional[str]]):
+        """
+        Annotates the files of a commit of this process, so they're known
+        before the next refresh.
+        :param files: The contents of each file, indexed by path. A None value means the file was removed.
+        :type files: Dict[str, Optional[str]]
+        """
+        changes = [(path, content is not None) for path, content in files.items()]
+        with self._lock:
+            if self._recorded is not None:
+                self._recorded.extend(changes)
+            if self._sha is not None:
+                self._apply(changes)
+
+    def _is_stale(self) -> bool:
+        """
+        Checks whether the branch head must be checked again.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._checked is None or time.monotonic() - self._checked > float(
+            os.environ.get("GITHUB_TREE_TTL", "2")
+        )
+
+    def _changes_since(self, repo, base: str, head: str) -> Optional[List]:
+        """
+        Retrieves the files changed between two commits.
+        :param repo: The repository.
+        :type repo: github.Repository.Repository
+        :param base: The commit the tree reflects.
+        :type base: str
+        :param head: The branch head.
+        :type head: str
+        :return: The (path, exists) of the changed files, or None if they cannot be listed completely.
+        :rtype: Optional[List[Tuple[str, bool]]]
+        """
+        try:
+            comparison = _call(RateLimitScheduler.READ, repo.compare, base, head)
+        except Exception as err:
+            ExistenceOracle.logger().info(f"Cannot compare {base}...{head}: {err}")
+            return None
+
+        files = comparison.files
+        if comparison.status not in ["ahead", "identical"] or (
+            len(files) >= ExistenceOracle.MAX_COMPARE_FILES
+        ):
+            return None
+
+        result = []
+        for file in files:
+            if file.status == "renamed" and file.previous_filename:
+                result.append((file.previous_filename, False))
+            result.append((file.filename, file.status != "removed"))
+
+        return result
+
+    def refresh(self) -> bool:
+        """
+        Brings the tree up to date with the branch head: incrementally if
+        possible, or fetching the whole tree otherwise.
+        :return: True if the tree is complete and up to date.
+        :rtype: bool
+        """
+        with self._refresh_lock:
+            if self._truncated or not self._is_stale():
+                return self._sha is not None
+
+            (repo, branch) = get_repo_and_branch()
+            with self._lock:
+                self._recorded = []
+            try:
+                head = _call(
+                    RateLimitScheduler.READ, repo.get_git_ref, f"heads/{branch}"
+                ).object.sha
+                changes = None
+                if self._sha == head:
+                    changes = []
+                elif self._sha is not None:
+                    changes = self._changes_since(repo, self._sha, head)
+
+                if changes is not None:
+                    with self._lock:
+                        self._apply(changes)
+                        self._sha = head
+                    if changes:
+                        self._incremental_refreshes += 1
+                else:
+                    self._load(repo, head)
+                self._checked = time.monotonic()
+            finally:
+                with self._lock:
+                    self._recorded = None
+
+        return self._sha is not None
+
+    def advance(self, base: str, head: str, changes: List[Tuple[str, bool]]) -> bool:
+        """
+        Applies the files changed between two commits, already listed by
+        someone else (e.g. the ChangeFeed), if the tree reflects the first one.
+        :param base: The commit the changes start from.
+        :type base: str
+        :param head: The commit the changes lead to.
+        :type head: str
+        :param changes: The (path, exists) of the changed files.
+        :type changes: List[Tuple[str, bool]]
+        :return: True if the tree is now at head.
+        :rtype: bool
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if self._sha != base:
+                    return self._sha == head
+                self._apply(changes)
+                self._sha = head
+            if changes:
+                self._incremental_refreshes += 1
+            self._checked = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+        return True
+
+    def _load(self, repo, head: str):
+        """
+        Fetches the whole tree of given commit.
+        :param repo: The repository.
+        :type repo: github.Repository.Repository
+        :param head: The commit.
+        :type head: str
+        """
+        tree = _call(RateLimitScheduler.READ, repo.get_git_tree, head, recursive=True)
+        self._full_refreshes += 1
+        if tree.raw_data.get("truncated", False):
+            ExistenceOracle.logger().warning(
+                f"The tree of {head} is too large; existence checks disabled"
+            )
+            with self._lock:
+                self._sha = None
+                self._truncated = True
+            return
+
+        live = set()
+        deleted = set()
+        for element in tree.tree:
+            if element.type != "blob":
+                continue
+            (entity, tombstone) = self._entity(element.path)
+            if entity is not None:
+                (deleted if tombstone else live).add(entity)
+
+        with self._lock:
+            self._live = live
+            self._deleted = deleted
+            self._sha = head
+            # writes committed while the tree was being fetched
+            self._apply(self._recorded or [])
+
+    def lookup(self, path: str, id: str) -> Optional[str]:
+        """
+        Checks whether given entity exists, refreshing the tree if it's not
+        known and the tree is stale.
+        :param path: The relative path of the collection.
+        :type path: str
+        :param id: The id.
+        :type id: str
+        :return: LIVE, DELETED, MISSING, or None if it cannot be known.
+        :rtype: Optional[str]
+        """
+        entity = f"{path}/{id}"
+
+        result = self._known(entity)
+        if result is None and self._is_stale():
+            try:
+                self.refresh()
+            except Exception as err:
+                ExistenceOracle.logger().error(f"Cannot refresh the tree: {err}")
+                return None
+            result = self._known(entity)
+
+        if result is None and self._sha is not None:
+            result = ExistenceOracle.MISSING
+
+        if result in [ExistenceOracle.DELETED, ExistenceOracle.MISSING]:
+            with self._lock:
+                self._answers += 1
+
+        return result
+
+    def needs_refresh(self, path: str, id: str) -> bool:
+        """
+        Checks whether looking up given entity would need a network call.
+        :param path: The relative path of the collection.
+        :type path: str
+        :param id: The id.
+        :type id: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        return self._known(f"{path}/{id}") is None and self._is_stale()
+
+    def _known(self, entity: str) -> Optional[str]:
+        """
+        Checks whether given entity is known to be deleted, or to exist.
+        :param entity: The entity ({path}/{id}).
+        :type entity: str
+        :return: DELETED, LIVE, or None.
+        :rtype: Optional[str]
+        """
+        with self._lock:
+            if entity in self._deleted:
+                return ExistenceOracle.DELETED
+            if entity in self._live:
+                return ExistenceOracle.LIVE
+
+        return None
+
+    def stats(self) -> Dict:
+        """
+        Retrieves the size of the tree and the counters.
+        :return: Such metrics.
+        :rtype: Dict
+        """
+        with self._lock:
+            return {
+                "sha": self._sha,
+                "live": len(self._live),
+                "deleted": len(self._deleted),
+                "localAnswers": self._answers,
+                "fullRefreshes": self._full_refreshes,
+                "incrementalRefreshes": self._incremental_refreshes,
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -21,65 +21,288 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
 import threading
-from github import Auth, Github
+import time
+from github import Github
+import requests
+from .token_pool import TokenPool
+from typing import Any, Dict, Optional, Tuple
 
+_lock = threading.RLock()
+_clients: Dict[str, Github] = {}
+_sessions: Dict[str, requests.Session] = {}
+_repos: Dict[Tuple[str, str, str], object] = {}
+_refresher: Optional[threading.Thread] = None
 
-def get_repo():
+
+def get_credential() -> str:
     """
-    Retrieves the github repo under the thread-local attribute "repository_name".
-    :return: The repository.
-    :rtype: object
+    Picks the credential for the next requests: the one with the largest
+    remaining budget (see TokenPool).
+    :return: The name of the credential.
+    :rtype: str
+    """
+    pool = TokenPool.instance()
+    if len(pool.names) > 1 or any(
+        name.startswith("installation-") for name in pool.names
+    ):
+        start_refresher()
+
+    return pool.select()
+
+
+def get_token(credential: str = None) -> str:
+    """
+    Retrieves the token used to authenticate against Github.
+    Installation tokens are renewed when about to expire.
+    :param credential: The credential. Defaults to the one with the largest remaining budget.
+    :type credential: str
+    :return: The token.
+    :rtype: str
+    """
+    if credential is None:
+        credential = get_credential()
+
+    # installation tokens can only be requested once the client is bound
+    get_github(credential)
+
+    return TokenPool.instance().auth(credential).token
+
+
+def get_repository_name() -> str:
+    """
+    Retrieves the name of the github repository.
+    :return: The repository name.
+    :rtype: str
+    """
+    repository_name = os.environ.get("GITHUB_REPO", None)
+    if repository_name is None:
+        raise ValueError("GITHUB_REPO environment variable not set")
+    return repository_name
+
+
+def get_pool_size() -> int:
+    """
+    Retrieves the maximum number of keep-alive HTTP connections per client.
+    :return: The pool size.
+    :rtype: int
+    """
+    return int(os.environ.get("GITHUB_POOL_SIZE", "10"))
+
+
+def get_github(credential: str = None) -> Github:
+    """
+    Retrieves the process-wide authenticated client for given credential.
+    The client keeps its HTTP session (and its connection pool) alive,
+    so warm invocations reuse already-established connections.
+    :param credential: The credential. Defaults to the one with the largest remaining budget.
+    :type credential: str
+    :return: The client.
+    :rtype: github.Github
+    """
+    if credential is None:
+        credential = get_credential()
+
+    result = _clients.get(credential, None)
+    if result is None:
+        with _lock:
+            result = _clients.get(credential, None)
+            if result is None:
+                result = Github(
+                    auth=TokenPool.instance().auth(credential),
+                    pool_size=get_pool_size(),
+                )
+                _clients[credential] = result
+
+    return result
+
+
+def credential_of(requester: Any) -> Optional[str]:
+    """
+    Retrieves the credential of the client given requester belongs to.
+    :param requester: The requester of a PyGithub object.
+    :type requester: github.Requester.Requester
+    :return: The name of the credential, if known.
+    :rtype: Optional[str]
     """
-    local = threading.local()
+    for credential, client in list(_clients.items()):
+        if client.requester is requester:
+            return credential
 
-    if not hasattr(local, "repo"):
-        if not hasattr(local, "token"):
-            token = os.environ.get("GITHUB_TOKEN", None)
-            if token is None:
-                print("GITHUB_TOKEN environment variable not set")
-                raise ValueError("GITHUB_TOKEN environment variable not set")
-            local.token = token
+    return None
 
-        if not hasattr(local, "github"):
-            local.github = Github(auth=Auth.Token(local.token))
 
-        if not hasattr(local, "repository_name"):
-            repository_name = os.environ.get("GITHUB_REPO", None)
-            if repository_name is None:
-                raise ValueError("GITHUB_REPO environment variable not set")
-            local.repository_name = repository_name
+def get_api_url() -> str:
+    """
+    Retrieves the base URL of the Github API.
+    :return: The URL, from GITHUB_API_URL (https://api.github.com by default).
+    :rtype: str
+    """
+    return os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
 
-        local.repo = local.github.get_repo(local.repository_name)
+def get_http_session() -> requests.Session:
+    """
+    Retrieves the process-wide HTTP session, for the requests PyGithub
+    cannot stream (e.g. raw blobs). Requests carry their own Authorization
+    header (see auth_headers()).
+    :return: The session.
+    :rtype: requests.Session
+    """
+    result = _sessions.get("default", None)
+    if result is None:
+        with _lock:
+            result = _sessions.get("default", None)
+            if result is None:
+                result = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=get_pool_size()
+                )
+                result.mount("https://", adapter)
+                result.mount("http://", adapter)
+                result.headers.update({"X-GitHub-Api-Version": "2022-11-28"})
+                _sessions["default"] = result
 
-    return local.repo
+    return result
+
+
+def auth_headers(credential: str) -> Dict[str, str]:
+    """
+    Builds the headers authenticating a request with given credential.
+    :param credential: The credential.
+    :type credential: str
+    :return: The headers.
+    :rtype: Dict[str, str]
+    """
+    return {"Authorization": f"Bearer {get_token(credential)}"}
+
+
+def get_repo(credential: str = None):
+    """
+    Retrieves the github repository, reusing the handle already created for
+    the same (credential, repository, branch) in this process.
+    :param credential: The credential. Defaults to the one with the largest remaining budget.
+    :type credential: str
+    :return: The repository.
+    :rtype: github.Repository.Repository
+    """
+    if credential is None:
+        credential = get_credential()
+    key = (credential, get_repository_name(), get_branch())
+
+    result = _repos.get(key, None)
+    if result is None:
+        with _lock:
+            result = _repos.get(key, None)
+            if result is None:
+                result = get_github(credential).get_repo(key[1])
+                _repos[key] = result
+
+    return result
 
 
 def get_branch():
     """
-    Retrieves the github repo under the thread-local attribute "branch".
+    Retrieves the github branch.
     :return: The branch.
     :rtype: str
     """
-    local = threading.local()
-
-    if not hasattr(local, "branch"):
-        branch = os.environ.get("GITHUB_BRANCH", None)
-        if branch is None:
-            raise ValueError("GITHUB_BRANCH environment variable not set")
-        local.branch = branch
+    branch = os.environ.get("GITHUB_BRANCH", None)
+    if branch is None:
+        raise ValueError("GITHUB_BRANCH environment variable not set")
 
-    return local.branch
+    return branch
 
 
 def get_repo_and_branch():
     """
-    Retrieves the github repo and branch using thread-local storage.
+    Retrieves the github repo and branch.
     :return: The repository and branch.
     :rtype: tuple
     """
     return (get_repo(), get_branch())
 
 
+def warm_up():
+    """
+    Creates the client and the repository handle in advance, so that the
+    first request of a cold-started function does not pay for them.
+    :return: The repository and branch.
+    :rtype: tuple
+    """
+    return get_repo_and_branch()
+
+
+def refresh_credentials():
+    """
+    Renews the installation tokens about to expire, and updates the budget
+    of each credential from the (free) /rate_limit endpoint.
+    """
+    # imported here since the scheduler imports this module
+    from .rate_limit_scheduler import RateLimitScheduler
+
+    scheduler = RateLimitScheduler.instance()
+    for credential in TokenPool.instance().names:
+        try:
+            response = get_http_session().get(
+                f"{get_api_url()}/rate_limit", headers=auth_headers(credential)
+            )
+            if response.status_code == 200:
+                core = response.json().get("resources", {}).get("core", {})
+                scheduler.update(
+                    core.get("remaining", None),
+                    core.get("limit", None),
+                    core.get("reset", None),
+                    credential=credential,
+                )
+            else:
+                scheduler.observe(
+                    response.status_code, response.headers, credential=credential
+                )
+        except Exception as e:
+            TokenPool.logger().warning(f"Error refreshing {credential}: {e}")
+
+
+def start_refresher():
+    """
+    Starts refreshing the credentials every GITHUB_TOKEN_REFRESH_SECONDS
+    seconds (60 by default) in the background, unless already started.
+    """
+    global _refresher
+
+    if _refresher is not None and _refresher.is_alive():
+        return
+
+    with _lock:
+        if _refresher is not None and _refresher.is_alive():
+            return
+        interval = float(os.environ.get("GITHUB_TOKEN_REFRESH_SECONDS", "60"))
+
+        def refresh_loop():
+            while True:
+                refresh_credentials()
+                time.sleep(interval)
+
+        _refresher = threading.Thread(target=refresh_loop, daemon=True)
+        _refresher.start()
+
+
+def reset_connections():
+    """
+    Discards all pooled clients and repository handles.
+    """
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                print(f"Error closing Github client: {e}")
+        for session in _sessions.values():
+            session.close()
+        _clients.clear()
+        _sessions.clear()
+        _repos.clear()
+
+
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
 # mode: python
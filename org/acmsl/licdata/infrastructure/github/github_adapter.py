@@ -19,13 +19,36 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import bisect
+from .collection_index import CollectionIndex
+from .collection_layout import CollectionLayout
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime
-from .github_raw import get_contents, create_file, update_file, delete_file
+from .existence_oracle import ExistenceOracle
+from .github_raw import (
+    GithubConflictError,
+    GithubUnreadableError,
+    commit_files,
+    get_contents,
+    get_json,
+    create_file,
+    update_file,
+    delete_file,
+    is_not_found,
+)
+import hashlib
 import json
+import os
+from .pending_write import PendingWrite
+import random
+import time
 from org.acmsl.licdata.infrastructure.crypt_utils import encrypt
 from pythoneda.shared import BaseObject, camel_to_snake, Entity, Event
 from uuid import uuid4
-from typing import Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .write_coalescer import WriteCoalescer
+from .write_metrics import WriteMetrics
 
 
 class GithubAdapter(BaseObject):
@@ -48,6 +71,16 @@ class GithubAdapter(BaseObject):
         Creates a new GithubAdapter instance.
         """
         super().__init__()
+        self._index_attributes = {}
+        self._indexes = {}
+        self._layouts = {}
+        self._write_metrics = WriteMetrics()
+        self._coalescer = None
+        window = float(os.environ.get("GITHUB_COALESCE_WINDOW_MS", "0")) / 1000
+        if window > 0:
+            self._coalescer = self._build_coalescer(
+                window, int(os.environ.get("GITHUB_COALESCE_MAX_ITEMS", "50"))
+            )
 
     @classmethod
     def instance(cls) -> "GithubAdapter":
@@ -60,6 +93,69 @@ class GithubAdapter(BaseObject):
             cls._singleton = cls()
         return cls._singleton
 
+    def _build_coalescer(self, window: float, maxItems: int) -> WriteCoalescer:
+        """
+        Creates the coalescer batching concurrent writes.
+        :param window: How long, in seconds, to wait for more writes before flushing.
+        :type window: float
+        :param maxItems: How many writes trigger a flush before the window ends.
+        :type maxItems: int
+        :return: The coalescer.
+        :rtype: org.acmsl.licdata.infrastructure.github.WriteCoalescer
+        """
+        return WriteCoalescer(self.apply_writes, window, maxItems)
+
+    def _get_contents(self, path: str) -> Tuple[str, str]:
+        """
+        Retrieves the contents of given path in the storage.
+        :param path: The path.
+        :type path: str
+        :return: A tuple of the contents and its hash.
+        :rtype: Tuple[str, str]
+        """
+        return get_contents(path)
+
+    def _get_json(self, path: str) -> Tuple[Any, str]:
+        """
+        Retrieves the parsed JSON contents of given path in the storage.
+        The result is shared with the content cache, so it must not be modified.
+        :param path: The path.
+        :type path: str
+        :return: A tuple of the parsed contents and its hash.
+        :rtype: Tuple[Any, str]
+        """
+        return get_json(path)
+
+    def _commit_files(
+        self,
+        files: Dict[str, Optional[str]],
+        message: str,
+        expectedShas: Dict[str, Optional[str]] = None,
+    ):
+        """
+        Writes several files at once in the storage.
+        :param files: The contents of each file, indexed by path. A None value removes the file.
+        :type files: Dict[str, Optional[str]]
+        :param message: The commit message.
+        :type message: str
+        :param expectedShas: The shas some files must still have (None if they must not exist).
+        :type expectedShas: Dict[str, Optional[str]]
+        :return: The commit, or None if it could not be created.
+        :rtype: github.GitCommit.GitCommit
+        :raises GithubConflictError: If the expected shas don't match.
+        """
+        return commit_files(files, message, expectedShas)
+
+    def _existence_oracle(self) -> Optional[ExistenceOracle]:
+        """
+        Retrieves the oracle telling which entities exist, if enabled.
+        :return: The oracle, or None.
+        :rtype: Optional[org.acmsl.licdata.infrastructure.github.ExistenceOracle]
+        """
+        if ExistenceOracle.enabled():
+            return ExistenceOracle.instance()
+        return None
+
     def new_id(self) -> str:
         """
         Creates a new id.
@@ -68,17 +164,389 @@ class GithubAdapter(BaseObject):
         """
         return str(uuid4())
 
+    def register_indexes(self, path: str, attributeSets: List[List]):
+        """
+        Declares the attributes to index for given collection.
+        :param path: The relative path.
+        :type path: str
+        :param attributeSets: The attributes (or their properties) of each index.
+        :type attributeSets: List[List]
+        """
+        attribute_sets = self._index_attributes.setdefault(path, [])
+        for attribute_set in attributeSets:
+            names = [self.get_property_name(attr) for attr in attribute_set]
+            attribute_sets.append(names)
+            for file, index in self._indexes.items():
+                if file.startswith(f"{path}/"):
+                    index.add_attribute_set(names)
+
+    def _find_candidates(
+        self, filter: Dict, path: str, file: str, items: List[Dict], sha: str
+    ):
+        """
+        Retrieves the items that might match given filter, using the indexes
+        of the collection if any covers it.
+        :param filter: The attribute filter.
+        :type filter: Dict
+        :param path: The relative path.
+        :type path: str
+        :param file: The summary file the items come from.
+        :type file: str
+        :param items: All items in the summary file.
+        :type items: List[Dict]
+        :param sha: The checksum of the summary file.
+        :type sha: str
+        :return: The candidate items.
+        :rtype: List[Dict]
+        """
+        result = None
+
+        index = self._indexes.get(file, None)
+        if index is None and path in self._index_attributes:
+            index = CollectionIndex(file, self._index_attributes[path])
+            self._indexes[file] = index
+        if index is not None and sha is not None:
+            index.refresh(items, sha)
+            result = index.lookup(filter)
+
+        if result is None:
+            result = items
+
+        return result
+
+    def layout(self, path: str) -> CollectionLayout:
+        """
+        Retrieves the layout of the summary files of given collection.
+        Layouts are kept for GITHUB_LAYOUT_TTL seconds (60 by default).
+        :param path: The relative path.
+        :type path: str
+        :return: The layout.
+        :rtype: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        :raises GithubUnreadableError: If the layout file exists but cannot be read.
+        """
+        result = self._cached_layout(path)
+
+        if result is None:
+            file = f"{path}/{CollectionLayout.LAYOUT_FILE}"
+            try:
+                (layout, sha) = self._get_json(file)
+            except Exception as err:
+                if not is_not_found(err):
+                    raise
+                (layout, sha) = (None, None)
+            if layout is None and sha is not None:
+                # the rows would be looked for in the legacy summary
+                raise GithubUnreadableError(f"Cannot read {file} at {sha}")
+            result = self._store_layout(path, layout)
+
+        return result
+
+    def _cached_layout(self, path: str) -> Optional[CollectionLayout]:
+        """
+        Retrieves the layout of given collection, if it's known and not expired.
+        :param path: The relative path.
+        :type path: str
+        :return: The layout, or None if it must be read again.
+        :rtype: Optional[org.acmsl.licdata.infrastructure.github.CollectionLayout]
+        """
+        (result, loaded) = self._layouts.get(path, (None, 0))
+
+        if result is not None and time.monotonic() - loaded > float(
+            os.environ.get("GITHUB_LAYOUT_TTL", "60")
+        ):
+            result = None
+
+        return result
+
+    def _store_layout(self, path: str, layout: Optional[Dict]) -> CollectionLayout:
+        """
+        Remembers the layout of given collection.
+        :param path: The relative path.
+        :type path: str
+        :param layout: The contents of the layout file, or None if there's none.
+        :type layout: Optional[Dict]
+        :return: The layout.
+        :rtype: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        """
+        result = CollectionLayout.from_dict(path, layout)
+        self._layouts[path] = (result, time.monotonic())
+        return result
+
+    def apply_changes(self, paths: List[str]):
+        """
+        Brings the layouts and indexes up to date with files changed by
+        other processes. The layouts of the collections involved are read
+        again on next use, and the indexes on the changed summary files are
+        patched with their new rows.
+        :param paths: The changed files.
+        :type paths: List[str]
+        """
+        for path in list(self._layouts.keys()):
+            if f"{path}/{CollectionLayout.LAYOUT_FILE}" in paths:
+                self._layouts.pop(path, None)
+
+        files = [file for file in paths if file in self._indexes]
+        if not files:
+            return
+        for file, rows, sha in self._read_summaries(files):
+            if sha is None:
+                self._indexes.pop(file, None)
+            else:
+                self._indexes[file].refresh(rows, sha)
+
+    def _read_summary(self, file: str) -> Tuple[List[Dict], str]:
+        """
+        Reads the summary rows in given file.
+        The result is shared with the content cache, so it must not be modified.
+        :param file: The summary file.
+        :type file: str
+        :return: A tuple of the rows (empty if the file doesn't exist) and the checksum.
+        :rtype: Tuple[List[Dict], str]
+        :raises GithubUnreadableError: If the file exists but cannot be read.
+        """
+        try:
+            (rows, sha) = self._get_json(file)
+        except Exception as err:
+            if not is_not_found(err):
+                raise
+            (rows, sha) = (None, None)
+
+        if rows is None:
+            if sha is not None:
+                # writing on top of it would wipe the collection
+                raise GithubUnreadableError(f"Cannot read {file} at {sha}")
+            rows = []
+
+        return (rows, sha)
+
+    def _read_summaries(self, files: List[str]) -> List[Tuple[str, List[Dict], str]]:
+        """
+        Reads the summary rows of several files, in parallel. The workers
+        run in copies of the caller's context, so they keep its request
+        priority.
+        :param files: The summary files.
+        :type files: List[str]
+        :return: A list of tuples (file, rows, checksum), in the same order.
+        :rtype: List[Tuple[str, List[Dict], str]]
+        """
+        if len(files) == 1:
+            return [(files[0],) + self._read_summary(files[0])]
+
+        contexts = [copy_context() for _ in files]
+        workers = int(os.environ.get("GITHUB_SHARD_WORKERS", "16"))
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+            return [
+                (file,) + summary
+                for file, summary in zip(
+                    files,
+                    pool.map(
+                        lambda context, file: context.run(self._read_summary, file),
+                        contexts,
+                        files,
+                    ),
+                )
+            ]
+
+    def _combined_sha(self, shas: List[str]) -> str:
+        """
+        Combines the checksums of several summary files.
+        :param shas: The checksums.
+        :type shas: List[str]
+        :return: The checksum of all of them.
+        :rtype: str
+        """
+        if len(shas) == 1:
+            return shas[0]
+        return hashlib.sha1(
+            "".join([sha or "-" for sha in shas]).encode("ascii")
+        ).hexdigest()
+
+    def write_metrics(self) -> Dict:
+        """
+        Retrieves the counters of the write loop, including the conflict rate.
+        :return: The counters.
+        :rtype: Dict
+        """
+        return self._write_metrics.to_dict()
+
+    def apply_writes(
+        self,
+        writes: List[PendingWrite],
+        summaries: Optional[List[Tuple[str, List[Dict], str]]] = None,
+    ) -> List[bool]:
+        """
+        Applies given writes on the latest summaries, and commits them along
+        with their files in a single commit. If the summaries change meanwhile,
+        re-reads them, re-applies the writes and retries with jittered
+        exponential backoff (GITHUB_WRITE_BACKOFF_MS, 100 by default), up to
+        GITHUB_WRITE_RETRIES times (5 by default). Writes to single-file
+        summaries also require the collection not to be sharded; if it got
+        sharded meanwhile, they're not committed.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param summaries: The (file, rows, checksum) of the summaries affected, if just read. They're used in the first attempt.
+        :type summaries: Optional[List[Tuple[str, List[Dict], str]]]
+        :return: Whether each write got committed.
+        :rtype: List[bool]
+        """
+        message = "\n\n".join([write.message for write in writes if write.message])
+        attempt = 0
+
+        while True:
+            if summaries is None:
+                summaries = self._read_summaries(
+                    list(dict.fromkeys([write.file for write in writes]))
+                )
+            (result, files, expected_shas) = self._prepare_commit(writes, summaries)
+            if not files:
+                return result
+
+            self._write_metrics.record_attempt()
+            try:
+                commit = self._commit_files(files, message, expected_shas)
+            except GithubConflictError as err:
+                if self._resharded(writes):
+                    return [False for _ in writes]
+                delay = self._conflict_delay(attempt, err)
+                if delay is None:
+                    return [False for _ in writes]
+                time.sleep(delay)
+                attempt += 1
+                summaries = None
+                continue
+
+            if commit is None:
+                return [False for _ in writes]
+
+            self._write_metrics.record_commit()
+            oracle = self._existence_oracle()
+            if oracle is not None:
+                oracle.record(files)
+            return result
+
+    def _prepare_commit(
+        self, writes: List[PendingWrite], summaries: List[Tuple[str, List[Dict], str]]
+    ) -> Tuple[List[bool], Dict[str, Optional[str]], Dict[str, Optional[str]]]:
+        """
+        Applies given writes on a copy of given summaries, and collects the
+        files to commit.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param summaries: The (file, rows, checksum) tuples of the summaries affected.
+        :type summaries: List[Tuple[str, List[Dict], str]]
+        :return: Whether each write applies, the files to commit, and the shas the summaries must still have.
+        :rtype: Tuple[List[bool], Dict[str, Optional[str]], Dict[str, Optional[str]]]
+        """
+        rows = {}
+        expected_shas = {}
+        for file, items, sha in summaries:
+            rows[file] = list(items)
+            expected_shas[file] = sha
+
+        lookups = {file: {} for file in rows}
+        result = [
+            write.apply(rows[write.file], lookups[write.file]) for write in writes
+        ]
+
+        files = {}
+        changed = []
+        for write, applied in zip(writes, result):
+            if applied:
+                files.update(write.files)
+                changed.append(write.file)
+        for file in dict.fromkeys(changed):
+            files[file] = json.dumps([x for x in rows[file] if x is not None])
+            path = CollectionLayout.unsharded_path(file)
+            if path is not None:
+                # fails if the collection got sharded after its layout was read
+                expected_shas[f"{path}/{CollectionLayout.LAYOUT_FILE}"] = None
+
+        return (result, files, expected_shas)
+
+    def _resharded(self, writes: List[PendingWrite]) -> bool:
+        """
+        Checks whether any collection given writes target as unsharded got
+        sharded meanwhile. Their layouts are read again.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :return: True in such case; the writes no longer apply.
+        :rtype: bool
+        """
+        result = False
+
+        for path in dict.fromkeys(
+            [CollectionLayout.unsharded_path(write.file) for write in writes]
+        ):
+            if path is None:
+                continue
+            self._layouts.pop(path, None)
+            if self.layout(path).sharded:
+                GithubAdapter.logger().error(
+                    f"{path} collection got sharded; its pending writes are dropped"
+                )
+                result = True
+
+        return result
+
+    def _conflict_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Accounts for a conflicting commit, and computes how long to wait before retrying.
+        :param attempt: The number of attempts already retried.
+        :type attempt: int
+        :param error: The conflict.
+        :type error: Exception
+        :return: The delay, in seconds, or None if the retry budget is exhausted.
+        :rtype: Optional[float]
+        """
+        retries = int(os.environ.get("GITHUB_WRITE_RETRIES", "5"))
+        backoff = float(os.environ.get("GITHUB_WRITE_BACKOFF_MS", "100")) / 1000
+
+        self._write_metrics.record_conflict()
+        if attempt >= retries:
+            self._write_metrics.record_exhausted()
+            GithubAdapter.logger().error(
+                f"Giving up after {attempt + 1} attempts: {error}"
+            )
+            return None
+
+        GithubAdapter.logger().debug(f"Retrying after conflict: {error}")
+        return random.uniform(0, min(backoff * 2**attempt, 5.0))
+
+    def submit_writes(self, path: str, writes: List[PendingWrite]) -> List[bool]:
+        """
+        Applies given writes, batching them with concurrent writes on the same
+        collection when write coalescing is enabled (GITHUB_COALESCE_WINDOW_MS
+        and GITHUB_COALESCE_MAX_ITEMS).
+        :param path: The relative path.
+        :type path: str
+        :param writes: The writes, which are applied together.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :return: Whether each write got committed.
+        :rtype: List[bool]
+        """
+        if self._coalescer is None:
+            return self.apply_writes(writes)
+        return self._coalescer.submit(path, writes).result()
+
     def find_by_id(
-        self, id: str, path: str, buildEntity: Callable[[Dict], Entity]
+        self,
+        id: str,
+        path: str,
+        buildEntity: Callable[[Dict], Entity] = None,
+        fields: Optional[List[str]] = None,
     ) -> Tuple[Dict, str]:
         """
         Finds an item matching given id (using the path structure in github).
+        Ids the existence oracle knows to be missing or deleted are answered
+        without requests.
         :param id: The id.
         :type id: str
         :param path: The relative path.
         :type path: str
-        :param buildEntity: A function to build the entity.
+        :param buildEntity: A function to build the entity. If None, the attributes are returned.
         :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :param fields: The attributes to retrieve, instead of the entity.
+        :type fields: Optional[List[str]]
         :return: The tuple (item, sha)
         :rtype: Tuple[Dict, str]
         """
@@ -87,17 +555,73 @@ class GithubAdapter(BaseObject):
         data = None
         sha = None
 
+        oracle = self._existence_oracle()
+        if oracle is not None and oracle.lookup(path, id) in [
+            ExistenceOracle.DELETED,
+            ExistenceOracle.MISSING,
+        ]:
+            return (None, None)
+
         try:
-            (data, sha) = get_contents(f"{path}/{id}/data.json")
+            (data, sha) = self._get_contents(f"{path}/{id}/data.json")
         except Exception as err:
             GithubAdapter.logger().error(err)
             data = None
 
         if data:
-            result = buildEntity(json.loads(data))
+            result = self._build_item(data, buildEntity, fields)
 
         return (result, sha)
 
+    @staticmethod
+    def project(item: Dict, fields: Optional[List[str]]) -> Dict:
+        """
+        Retrieves given attributes of an item. The id is always included.
+        :param item: The item.
+        :type item: Dict
+        :param fields: The attribute names, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: A new dictionary with such attributes, if present.
+        :rtype: Dict
+        """
+        if fields is None:
+            return item
+
+        result = {}
+        if "id" in item:
+            result["id"] = item["id"]
+        for name in fields:
+            if name in item:
+                result[name] = item[name]
+
+        return result
+
+    @staticmethod
+    def _build_item(
+        data: str,
+        buildEntity: Callable[[Dict], Entity],
+        fields: Optional[List[str]],
+    ) -> Any:
+        """
+        Builds the outcome of find_by_id from the contents of data.json.
+        :param data: The contents.
+        :type data: str
+        :param buildEntity: A function to build the entity, or None to return the attributes.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :param fields: The attributes to retrieve, instead of the entity.
+        :type fields: Optional[List[str]]
+        :return: The entity, or its (requested) attributes.
+        :rtype: Any
+        """
+        item = json.loads(data)
+
+        if fields is not None:
+            return GithubAdapter.project(item, fields)
+        if buildEntity is None:
+            return item
+
+        return buildEntity(item)
+
     def find_all_by_attributes(self, filter: Dict, path: str) -> Tuple[List[Dict], str]:
         """
         Retrieves all items matching given attribute values.
@@ -108,24 +632,48 @@ class GithubAdapter(BaseObject):
         :return: A tuple of the items and the checksum.
         :rtype: Tuple[List[Dict], str]
         """
-        result = []
-        sha = None
-
         try:
-            (all_items, sha) = get_contents(f"{path}/data.json")
+            layout = self.layout(path)
+            file = layout.file_for(filter)
+            summaries = self._read_summaries(layout.files if file is None else [file])
         except Exception as err:
             GithubAdapter.logger().error(err)
-            all_items = None
-        if all_items is not None:
-            all_items_content = json.loads(all_items)
-            item = {}
-            for key in filter:
-                item[key] = filter[key]
-            result = [
-                x
-                for x in all_items_content
-                if self._attributes_match(x, item, filter.keys())
-            ]
+            summaries = []
+
+        return self._filter_summaries(filter, path, summaries)
+
+    def _filter_summaries(
+        self, filter: Dict, path: str, summaries: List[Tuple[str, List[Dict], str]]
+    ) -> Tuple[List[Dict], str]:
+        """
+        Retrieves the rows of given summaries matching given attribute values.
+        :param filter: The attribute filter.
+        :type filter: Dict
+        :param path: The relative path.
+        :type path: str
+        :param summaries: The (file, rows, checksum) tuples of the summaries to check.
+        :type summaries: List[Tuple[str, List[Dict], str]]
+        :return: A tuple of the items and the checksum.
+        :rtype: Tuple[List[Dict], str]
+        """
+        result = []
+        sha = None
+
+        item = {}
+        for key in filter:
+            item[key] = filter[key]
+        for file, all_items_content, file_sha in summaries:
+            result.extend(
+                [
+                    x
+                    for x in self._find_candidates(
+                        filter, path, file, all_items_content, file_sha
+                    )
+                    if self._attributes_match(x, item, filter.keys())
+                ]
+            )
+        if summaries:
+            sha = self._combined_sha([file_sha for _, _, file_sha in summaries])
 
         return (result, sha)
 
@@ -195,6 +743,33 @@ class GithubAdapter(BaseObject):
 
         return (result, sha)
 
+    def find_by_pk(
+        self, pk: Dict, path: str, buildEntity: Callable[[Dict], Entity]
+    ) -> Tuple[Entity, str]:
+        """
+        Finds the item matching given primary key.
+        :param pk: The primary key.
+        :type pk: Dict
+        :param path: The relative path.
+        :type path: str
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :return: The tuple (item, sha)
+        :rtype: Tuple[pythoneda.shared.Entity, str]
+        """
+        result = None
+        sha = None
+
+        if hasattr(pk, "to_dict"):
+            pk = pk.to_dict()
+
+        (summary, _) = self.find_by_attributes(pk, path)
+
+        if summary is not None:
+            (result, sha) = self.find_by_id(summary.get("id", None), path, buildEntity)
+
+        return (result, sha)
+
     def insert(
         self,
         newEntityRequested: Event,
@@ -209,71 +784,219 @@ class GithubAdapter(BaseObject):
         :type buildNewEntity: callable[[pythoneda.shared.Event], Tuple[pythoneda.shared.Entity, pythoneda.shared.Event]]
         :param path: The relative path.
         :type path: str
-        :return: The event representing the new entity has been created.
+        :return: The event representing the new entity has been created, or None if it could not be committed.
         :rtype: pythoneda.shared.Event
         """
         entity, result = buildNewEntity(newEntityRequested)
 
-        data = None
-        sha = None
-        insert_new_file = False
+        file = self.layout(path).file_for(entity.to_dict())
+        (content, sha) = self._read_summary(file)
 
-        try:
-            (data, sha) = get_contents(f"{path}/data.json")
-        except Exception as err:
-            GithubAdapter.logger().error(err)
-            data = None
-        if data is None:
-            content = []
-            content.append(entity.to_dict_simplified())
-            create_file(
-                f"{path}/data.json",
-                json.dumps(content),
-                result.to_json(),
+        write = self._insert_write(
+            newEntityRequested, entity, result, path, file, content, sha
+        )
+        if write is None:
+            GithubAdapter.logger().info(
+                f"Not creating a new entity under {path} since another copy already exists"
             )
-            insert_new_file = True
         else:
-            content = json.loads(data)
-            entries = [
-                x
-                for x in content
-                if self._attributes_match(x, entity.to_dict(), primaryKey)
-            ]
-            if len(entries) == 0:
-                content.append(entity.to_dict_simplified())
-                update_file(
-                    f"{path}/data.json",
-                    json.dumps(content),
-                    result.to_json(),
-                    sha,
-                )
-                insert_new_file = True
-            else:
-                GithubAdapter.logger().info(
-                    f"Not creating a new entity under {path} since another copy already exists"
+            (inserted,) = self.submit_writes(path, [write])
+            if not inserted:
+                GithubAdapter.logger().error(
+                    f"Could not create a new entity under {path}"
                 )
-                insert_new_file = False
+                result = None
 
-        if insert_new_file:
-            create_file(
-                f"{path}/{entity.id}/data.json", entity.to_json(), result.to_json()
+        return result
+
+    def _insert_write(
+        self,
+        newEntityRequested: Event,
+        entity: Entity,
+        entityCreated: Event,
+        path: str,
+        file: str,
+        content: List[Dict],
+        sha: str,
+    ) -> Optional[PendingWrite]:
+        """
+        Builds the write appending a new entity, unless it already exists.
+        :param newEntityRequested: The event requesting the new entity.
+        :type newEntityRequested: pythoneda.shared.Event
+        :param entity: The new entity.
+        :type entity: pythoneda.shared.Entity
+        :param entityCreated: The event representing the new entity has been created.
+        :type entityCreated: pythoneda.shared.Event
+        :param path: The relative path.
+        :type path: str
+        :param file: The summary file the entity belongs to.
+        :type file: str
+        :param content: The rows of such summary file.
+        :type content: List[Dict]
+        :param sha: The checksum of such summary file.
+        :type sha: str
+        :return: The write, or None if another entity has the same primary key.
+        :rtype: Optional[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        """
+        result = None
+
+        target = entity.to_dict()
+        primary_key = [
+            self.get_property_name(attr) for attr in entity.__class__.primary_key()
+        ]
+        entries = [
+            x
+            for x in self._find_candidates(
+                {name: target.get(name, None) for name in primary_key},
+                path,
+                file,
+                content,
+                sha,
             )
+            if self._attributes_match(x, target, primary_key)
+        ]
+        if len(entries) == 0:
             entity_name = camel_to_snake(entity.__class__.__name__)
+            files = {}
+            files[f"{path}/{entity.id}/data.json"] = entity.to_json()
             timestamp = datetime.now().timestamp()
-            create_file(
-                f"{path}/{entity.id}/_events/{timestamp}-new_{entity_name}_requested.json",
-                newEntityRequested.to_json(),
-                newEntityRequested.to_json(),
-            )
+            files[
+                f"{path}/{entity.id}/_events/{timestamp}-new_{entity_name}_requested.json"
+            ] = newEntityRequested.to_json()
             timestamp = datetime.now().timestamp()
-            create_file(
-                f"{path}/{entity.id}/_events/{timestamp}-new_{entity_name}_created.json",
-                result.to_json(),
-                result.to_json(),
+            files[
+                f"{path}/{entity.id}/_events/{timestamp}-new_{entity_name}_created.json"
+            ] = entityCreated.to_json()
+            result = PendingWrite(
+                PendingWrite.APPEND,
+                file,
+                entity.id,
+                row=entity.to_dict_simplified(),
+                primaryKey={name: target.get(name, None) for name in primary_key},
+                files=files,
+                message=entityCreated.to_json(),
             )
 
         return result
 
+    def bulk_insert(
+        self,
+        newEntityRequests: List[Event],
+        buildNewEntity: Callable[[Event], Tuple[Entity, Event]],
+        path: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Optional[Event]]:
+        """
+        Inserts many new entities, in a few large commits.
+        The summaries are read once, and duplicates are checked against the
+        primary-key index; then the entities, their events and the summary
+        rows are committed in batches of GITHUB_BULK_BATCH_SIZE entities
+        (500 by default).
+        :param newEntityRequests: The events requesting the new entities.
+        :type newEntityRequests: List[pythoneda.shared.Event]
+        :param buildNewEntity: A function to create each entity and its new-entity-created event.
+        :type buildNewEntity: callable[[pythoneda.shared.Event], Tuple[pythoneda.shared.Entity, pythoneda.shared.Event]]
+        :param path: The relative path.
+        :type path: str
+        :param progress: A function notified with the number of requests processed, and the total, after each batch.
+        :type progress: Optional[Callable[[int, int], None]]
+        :return: The new-entity-created event of each request, or None if the entity was not persisted.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        result = [None for _ in newEntityRequests]
+
+        layout = self.layout(path)
+        built = []
+        for request in newEntityRequests:
+            (entity, created) = buildNewEntity(request)
+            built.append((request, entity, created, layout.file_for(entity.to_dict())))
+
+        summaries = self._read_summaries(
+            list(dict.fromkeys([file for (_, _, _, file) in built]))
+        )
+        contents = {file: (rows, sha) for (file, rows, sha) in summaries}
+
+        writes = []
+        for position, (request, entity, created, file) in enumerate(built):
+            (rows, sha) = contents[file]
+            write = self._insert_write(request, entity, created, path, file, rows, sha)
+            if write is not None:
+                writes.append((position, write))
+
+        batch_size = max(1, int(os.environ.get("GITHUB_BULK_BATCH_SIZE", "500")))
+        total = len(newEntityRequests)
+        for start in range(0, len(writes), batch_size):
+            batch = writes[start : start + batch_size]
+            files = {write.file for (_, write) in batch}
+            if summaries is not None:
+                summaries = [summary for summary in summaries if summary[0] in files]
+            outcomes = self.apply_writes([write for (_, write) in batch], summaries)
+            for (position, _), inserted in zip(batch, outcomes):
+                if inserted:
+                    result[position] = built[position][2]
+            # the summaries changed with this batch
+            summaries = None
+            processed = batch[-1][0] + 1 if start + batch_size < len(writes) else total
+            GithubAdapter.logger().info(
+                f"Inserted {len([x for x in result if x is not None])} new entities under {path} ({processed}/{total} processed)"
+            )
+            if progress is not None:
+                progress(processed, total)
+
+        if not writes and progress is not None:
+            progress(total, total)
+
+        return result
+
+    def _replace_writes(
+        self,
+        layout: CollectionLayout,
+        original: Dict,
+        entity: Entity,
+        files: Dict,
+        message: str,
+    ) -> List[PendingWrite]:
+        """
+        Builds the writes replacing the summary row of an updated entity.
+        :param layout: The layout of the collection.
+        :type layout: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        :param original: The attributes of the entity before the update.
+        :type original: Dict
+        :param entity: The updated entity.
+        :type entity: pythoneda.shared.Entity
+        :param files: The entity and event files.
+        :type files: Dict
+        :param message: The commit message.
+        :type message: str
+        :return: The writes.
+        :rtype: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        """
+        old_file = layout.file_for(original)
+        new_file = layout.file_for(entity.to_dict())
+        if old_file == new_file:
+            return [
+                PendingWrite(
+                    PendingWrite.REPLACE,
+                    new_file,
+                    entity.id,
+                    row=entity.to_dict_simplified(),
+                    files=files,
+                    message=message,
+                )
+            ]
+        # the primary key changed, and so did the shard
+        return [
+            PendingWrite(
+                PendingWrite.REMOVE, old_file, entity.id, files=files, message=message
+            ),
+            PendingWrite(
+                PendingWrite.APPEND,
+                new_file,
+                entity.id,
+                row=entity.to_dict_simplified(),
+            ),
+        ]
+
     def get_property_name(self, prop) -> str:
         """
         Retrieves the name of the property.
@@ -329,86 +1052,240 @@ class GithubAdapter(BaseObject):
         :rtype: pythoneda.shared.Event
         """
         result = None
-        now = datetime.now()
-        deleted = now.strftime("%Y-%m-%d %H:%M:%S")
-        timestamp = now.timestamp()
-        data = None
-        update_summary = False
 
         try:
             entity = None
-            sha = None
+            summary = None
             if deleteEntityRequested.entity_id is not None:
-                (entity, sha) = self.find_by_id(
+                (entity, summary) = self._read_for_delete(
                     deleteEntityRequested.entity_id, path, buildEntity
                 )
             elif deleteEntityRequested.entity_primary_key is not None:
-                (entity, sha) = self.find_by_pk(
+                (entity, _) = self.find_by_pk(
                     deleteEntityRequested.entity_primary_key, path, buildEntity
                 )
 
             if entity is None:
                 result = buildInvalidDeleteEntityRequestEvent(deleteEntityRequested)
             else:
-                entity_name = camel_to_snake(entity.__class__.__name__)
                 result = entity.delete(deleteEntityRequested)
                 if result is not None:
-                    update_file(
-                        f"{path}/{deleteEntityRequested.entity_id}/data.json",
-                        entity.to_json(),
-                        result.to_json(),
-                        sha,
-                    )
-                    create_file(
-                        f"{path}/{deleteEntityRequested.entity_id}/_events/{timestamp}-{entity_name}_deleted.json",
-                        result.to_json(),
-                        result.to_json(),
-                    )
-                    create_file(
-                        f"{path}/{deleteEntityRequested.entity_id}.deleted",
-                        "",
-                        result.to_json(),
-                    )
-                    update_summary = True
+                    write = self._delete_write(entity, result, path, self.layout(path))
+                    if summary is not None and summary[0] == write.file:
+                        (committed,) = self.apply_writes([write], [summary])
+                    else:
+                        (committed,) = self.submit_writes(path, [write])
+                    if not committed:
+                        GithubAdapter.logger().error(
+                            f"Could not delete {entity.id} from {path}"
+                        )
+                        result = None
         except Exception as err:
             GithubAdapter.logger().error(err)
-            update_summary = False
+            result = None
+
+        return result
+
+    def _read_for_delete(
+        self, id: str, path: str, buildEntity: Callable[[Dict], Entity]
+    ) -> Tuple[Entity, Optional[Tuple[str, List[Dict], str]]]:
+        """
+        Reads the entity to delete and, if the collection is not sharded,
+        its summary at the same time, so the deletion is committed after a
+        single round trip.
+        :param id: The id.
+        :type id: str
+        :param path: The relative path.
+        :type path: str
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :return: The entity (or None), and the (file, rows, checksum) of its summary if it was read.
+        :rtype: Tuple[pythoneda.shared.Entity, Optional[Tuple[str, List[Dict], str]]]
+        """
+        layout = self.layout(path)
+        oracle = self._existence_oracle()
+        if (
+            layout.sharded
+            or self._coalescer is not None
+            or (
+                oracle is not None
+                and oracle.lookup(path, id)
+                in [ExistenceOracle.DELETED, ExistenceOracle.MISSING]
+            )
+        ):
+            (entity, _) = self.find_by_id(id, path, buildEntity)
+            return (entity, None)
+
+        context = copy_context()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            summary = pool.submit(context.run, self._read_summary, layout.legacy_file)
+            (entity, _) = self.find_by_id(id, path, buildEntity)
+            (rows, sha) = summary.result()
+
+        return (entity, (layout.legacy_file, rows, sha))
 
-        if update_summary:
+    def _delete_write(
+        self,
+        entity: Entity,
+        entityDeleted: Event,
+        path: str,
+        layout: CollectionLayout,
+    ) -> PendingWrite:
+        """
+        Builds the write removing a deleted entity.
+        :param entity: The deleted entity.
+        :type entity: pythoneda.shared.Entity
+        :param entityDeleted: The event representing the entity has been deleted.
+        :type entityDeleted: pythoneda.shared.Event
+        :param path: The relative path.
+        :type path: str
+        :param layout: The layout of the collection.
+        :type layout: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        :return: The write.
+        :rtype: org.acmsl.licdata.infrastructure.github.PendingWrite
+        """
+        timestamp = datetime.now().timestamp()
+        entity_name = camel_to_snake(entity.__class__.__name__)
+        files = {}
+        files[f"{path}/{entity.id}/data.json"] = entity.to_json()
+        files[f"{path}/{entity.id}/_events/{timestamp}-{entity_name}_deleted.json"] = (
+            entityDeleted.to_json()
+        )
+        files[f"{path}/{entity.id}.deleted"] = ""
+
+        return PendingWrite(
+            PendingWrite.REMOVE,
+            layout.file_for(entity.to_dict()),
+            entity.id,
+            files=files,
+            message=entityDeleted.to_json(),
+        )
+
+    def bulk_delete(
+        self,
+        deleteEntityRequests: List[Event],
+        buildEntity: Callable[[Dict], Entity],
+        buildInvalidDeleteEntityRequestEvent: Callable[[Event], Event],
+        path: str,
+    ) -> List[Optional[Event]]:
+        """
+        Deletes many items in a single commit. The entities are read in
+        parallel, and their files, tombstones and summary rows are written
+        at once. Only the first request for each entity is applied.
+        :param deleteEntityRequests: The events requesting the removal of each entity.
+        :type deleteEntityRequests: List[pythoneda.shared.Event]
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :param buildInvalidDeleteEntityRequestEvent: A function to build the invalid-delete-entity-request event.
+        :type buildInvalidDeleteEntityRequestEvent: Callable[[pythoneda.shared.Event], pythoneda.shared.Event]
+        :param path: The relative path.
+        :type path: str
+        :return: The outcome of each request: the entity-deleted event, the invalid-delete-entity-request event if the entity was not found or already requested, or None if it could not be deleted.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        result = [None for _ in deleteEntityRequests]
+
+        layout = self.layout(path)
+        entities = self._find_entities(deleteEntityRequests, path, buildEntity)
+        writes = []
+        seen = set()
+        for position, (request, entity) in enumerate(
+            zip(deleteEntityRequests, entities)
+        ):
+            if entity is None or entity.id in seen:
+                result[position] = buildInvalidDeleteEntityRequestEvent(request)
+                continue
+            seen.add(entity.id)
+            entity_deleted = entity.delete(request)
+            if entity_deleted is not None:
+                writes.append(
+                    (
+                        position,
+                        entity_deleted,
+                        [self._delete_write(entity, entity_deleted, path, layout)],
+                    )
+                )
+
+        self._apply_bulk(writes, result)
+
+        return result
+
+    def _find_entities(
+        self,
+        requests: List[Event],
+        path: str,
+        buildEntity: Callable[[Dict], Entity],
+    ) -> List[Optional[Entity]]:
+        """
+        Finds the entities given events refer to, by id or by primary key,
+        reading them in parallel (up to GITHUB_READ_WORKERS at a time, 16 by
+        default). The workers run in copies of the caller's context, so they
+        keep its request priority.
+        :param requests: The events.
+        :type requests: List[pythoneda.shared.Event]
+        :param path: The relative path.
+        :type path: str
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :return: The entity of each event, or None if not found.
+        :rtype: List[Optional[pythoneda.shared.Entity]]
+        """
+
+        def find(request: Event) -> Optional[Entity]:
+            """
+            Finds the entity given event refers to.
+            :param request: The event.
+            :type request: pythoneda.shared.Event
+            :return: The entity, or None if not found.
+            :rtype: Optional[pythoneda.shared.Entity]
+            """
+            result = None
             try:
-                (data, sha) = get_contents(f"{path}/data.json")
+                if request.entity_id is not None:
+                    (result, _) = self.find_by_id(request.entity_id, path, buildEntity)
+                elif request.entity_primary_key is not None:
+                    (result, _) = self.find_by_pk(
+                        request.entity_primary_key, path, buildEntity
+                    )
             except Exception as err:
                 GithubAdapter.logger().error(err)
-                data = None
-
-            if data is not None:
-                content = json.loads(data)
-                summary = any(
-                    [
-                        x
-                        for x in content
-                        if x.get("id", None) == deleteEntityRequested.entity_id
-                    ]
+            return result
+
+        contexts = [copy_context() for _ in requests]
+        workers = int(os.environ.get("GITHUB_READ_WORKERS", "16"))
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(requests)))
+        ) as pool:
+            return list(
+                pool.map(
+                    lambda context, request: context.run(find, request),
+                    contexts,
+                    requests,
                 )
-                if summary:
-                    update_file(
-                        f"{path}/data.json",
-                        json.dumps(
-                            [
-                                x
-                                for x in content
-                                if x.get("id", None) != deleteEntityRequested.entity_id
-                            ]
-                        ),
-                        result.to_json(),
-                        sha,
-                    )
-                else:
-                    GithubAdapter.logger().error(
-                        f"{path}/data.json does not contain {deleteEntityRequested.entity_id}"
-                    )
+            )
 
-        return result
+    def _apply_bulk(
+        self,
+        writes: List[Tuple[int, Event, List[PendingWrite]]],
+        result: List[Optional[Event]],
+    ):
+        """
+        Commits the writes of several requests at once, and annotates the
+        event of each request whose writes got committed.
+        :param writes: The position of each request, its event, and its writes.
+        :type writes: List[Tuple[int, pythoneda.shared.Event, List[org.acmsl.licdata.infrastructure.github.PendingWrite]]]
+        :param result: The outcome of each request, updated in place.
+        :type result: List[Optional[pythoneda.shared.Event]]
+        """
+        if not writes:
+            return
+
+        outcomes = iter(
+            self.apply_writes([write for (_, _, group) in writes for write in group])
+        )
+        for position, event, group in writes:
+            if all([next(outcomes) for _ in group]):
+                result[position] = event
 
     def delete_by_pk(
         self,
@@ -497,16 +1374,81 @@ class GithubAdapter(BaseObject):
 
         return result
 
-    def list(self, path: str) -> Tuple[List, str]:
+    def list(self, path: str, fields: Optional[List[str]] = None) -> Tuple[List, str]:
         """
         Retrieves all items.
         :param path: The relative path.
         :type path: str
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all items.
         :rtype: List
         """
-        (data, sha) = get_contents(f"{path}/data.json")
-        return (json.loads(data), sha)
+        summaries = self._read_summaries(self.layout(path).files)
+        result = []
+        for _, rows, _ in summaries:
+            if fields is None:
+                result.extend(rows)
+            else:
+                result.extend([GithubAdapter.project(row, fields) for row in rows])
+        return (result, self._combined_sha([sha for _, _, sha in summaries]))
+
+    def iter_list(
+        self,
+        path: str,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the items, reading one summary file at a time, and
+        only as far as needed.
+        The items of each file are sorted by id, so a position (the file
+        and the id of an item) keeps pointing at the same place while
+        other items get added or removed.
+        Unless projected, the rows are shared with the content cache, so
+        they must not be modified.
+        :param path: The relative path.
+        :type path: str
+        :param after: The position of the last item already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of items, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The items, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        :raises ValueError: If the position does not belong to the collection.
+        """
+        files = self.layout(path).files
+        first = 0
+        if after is not None:
+            if after["file"] not in files:
+                raise ValueError(f"Cursor out of date for {path} collection")
+            first = files.index(after["file"])
+
+        remaining = limit
+        for file in files[first:]:
+            if remaining is not None and remaining <= 0:
+                return
+            (rows, _) = self._read_summary(file)
+            rows = sorted(
+                [row for row in rows if row is not None],
+                key=lambda row: str(row.get("id", "")),
+            )
+            begin = 0
+            if after is not None and file == after["file"]:
+                begin = bisect.bisect_right(
+                    [str(row.get("id", "")) for row in rows], after["id"]
+                )
+            end = len(rows) if remaining is None else min(len(rows), begin + remaining)
+            for row in rows[begin:end]:
+                yield (
+                    GithubAdapter.project(row, fields),
+                    {"file": file, "id": str(row.get("id", ""))},
+                )
+            if remaining is not None:
+                remaining -= end - begin
 
     def update(
         self,
@@ -551,29 +1493,126 @@ class GithubAdapter(BaseObject):
                 result = buildInvalidUpdateEntityRequestEvent(updateEntityRequested)
             else:
                 result = buildEntityUpdatedEvent()
+                original = entity.to_dict()
                 entity.apply(result)
-                update_file(
-                    f"{path}/{entity.id}/data.json",
-                    json.dumps(entity.to_dict()),
-                    result.to_json(),
-                    sha,
-                )
-
-                entity_name = camel_to_snake(entity.__class__.__name__)
-                timestamp = datetime.now().timestamp()
-                create_file(
-                    f"{path}/{entity.id}/_events/{timestamp}-update_{entity_name}_requested.json",
-                    updateEntityRequested.to_json(),
-                    updateEntityRequested.to_json(),
-                )
-                timestamp = datetime.now().timestamp()
-                create_file(
-                    f"{path}/{entity.id}/_events/{timestamp}-{entity_name}_updated.json",
-                    result.to_json(),
+                writes = self._replace_writes(
+                    self.layout(path),
+                    original,
+                    entity,
+                    self._update_files(updateEntityRequested, entity, result, path),
                     result.to_json(),
                 )
+                if not all(self.submit_writes(path, writes)):
+                    GithubAdapter.logger().error(
+                        f"Could not update {entity.id} in {path}"
+                    )
+                    result = None
         except Exception as err:
             GithubAdapter.logger().error(err)
+            result = None
+
+        return result
+
+    def _update_files(
+        self,
+        updateEntityRequested: Event,
+        entity: Entity,
+        entityUpdated: Event,
+        path: str,
+    ) -> Dict[str, str]:
+        """
+        Builds the entity and event files of an update.
+        :param updateEntityRequested: The event requesting the update of an entity.
+        :type updateEntityRequested: pythoneda.shared.Event
+        :param entity: The updated entity.
+        :type entity: pythoneda.shared.Entity
+        :param entityUpdated: The event representing the entity has been updated.
+        :type entityUpdated: pythoneda.shared.Event
+        :param path: The relative path.
+        :type path: str
+        :return: The contents of each file, indexed by path.
+        :rtype: Dict[str, str]
+        """
+        entity_name = camel_to_snake(entity.__class__.__name__)
+        result = {}
+        result[f"{path}/{entity.id}/data.json"] = json.dumps(entity.to_dict())
+        timestamp = datetime.now().timestamp()
+        result[
+            f"{path}/{entity.id}/_events/{timestamp}-update_{entity_name}_requested.json"
+        ] = updateEntityRequested.to_json()
+        timestamp = datetime.now().timestamp()
+        result[f"{path}/{entity.id}/_events/{timestamp}-{entity_name}_updated.json"] = (
+            entityUpdated.to_json()
+        )
+        return result
+
+    def bulk_update(
+        self,
+        updateEntityRequests: List[Event],
+        buildEntity: Callable[[Dict], Entity],
+        buildEntityUpdatedEvent: Callable[[Entity, Event], Event],
+        buildInvalidUpdateEntityRequestEvent: Callable[[Event], Event],
+        path: str,
+    ) -> List[Optional[Event]]:
+        """
+        Updates many entities in a single commit. The entities are read in
+        parallel, each one gets its entity-updated event applied, and their
+        files and summary rows are written at once. Each entity can be
+        updated only once per call: the requests after the first one for
+        the same entity are rejected, since their summary rows would
+        replace one another.
+        :param updateEntityRequests: The events requesting the update of each entity.
+        :type updateEntityRequests: List[pythoneda.shared.Event]
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :param buildEntityUpdatedEvent: A function to create the entity-updated event of an entity, given the request.
+        :type buildEntityUpdatedEvent: Callable[[pythoneda.shared.Entity, pythoneda.shared.Event], pythoneda.shared.Event]
+        :param buildInvalidUpdateEntityRequestEvent: A function to build the invalid-update-entity-request event.
+        :type buildInvalidUpdateEntityRequestEvent: Callable[[pythoneda.shared.Event], pythoneda.shared.Event]
+        :param path: The relative path.
+        :type path: str
+        :return: The outcome of each request: the entity-updated event, the invalid-update-entity-request event if the entity was not found or already requested, or None if it could not be updated.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        result = [None for _ in updateEntityRequests]
+
+        layout = self.layout(path)
+        entities = self._find_entities(updateEntityRequests, path, buildEntity)
+        writes = []
+        seen = set()
+        for position, (request, entity) in enumerate(
+            zip(updateEntityRequests, entities)
+        ):
+            if entity is None or entity.id in seen:
+                if entity is not None:
+                    GithubAdapter.logger().warning(
+                        f"Rejected a second update of {entity.id} in {path} collection"
+                    )
+                result[position] = buildInvalidUpdateEntityRequestEvent(request)
+                continue
+            seen.add(entity.id)
+            try:
+                entity_updated = buildEntityUpdatedEvent(entity, request)
+                original = entity.to_dict()
+                entity.apply(entity_updated)
+            except Exception as err:
+                GithubAdapter.logger().error(err)
+                continue
+            writes.append(
+                (
+                    position,
+                    entity_updated,
+                    self._replace_writes(
+                        layout,
+                        original,
+                        entity,
+                        self._update_files(request, entity, entity_updated, path),
+                        entity_updated.to_json(),
+                    ),
+                )
+            )
+
+        self._apply_bulk(writes, result)
 
         return result
 
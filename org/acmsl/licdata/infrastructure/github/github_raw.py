@@ -19,8 +19,279 @@ You should have received a copy of the GNU General Public User
 along with this program.  If not, see <https://www.gnu.org/users/>.
 """
 
-from org.acmsl.licdata.infrastructure.crypt_utils import encrypt, decrypt
-from org.acmsl.licdata.infrastructure.github.github_access import get_repo_and_branch
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from github import GithubException, InputGitTreeElement
+from org.acmsl.licdata.infrastructure.crypt_utils import (
+    encrypt,
+    decrypt,
+    decrypt_stream,
+)
+from org.acmsl.licdata.infrastructure.github.content_cache import (
+    CachedContent,
+    ContentCache,
+)
+from org.acmsl.licdata.infrastructure.github.github_access import (
+    auth_headers,
+    credential_of,
+    get_api_url,
+    get_branch,
+    get_credential,
+    get_http_session,
+    get_repo_and_branch,
+    get_repository_name,
+)
+from org.acmsl.licdata.infrastructure.github.payload_codec import (
+    decode_payload,
+    encode_payload,
+)
+from org.acmsl.licdata.infrastructure.github.rate_limit_scheduler import (
+    RateLimitScheduler,
+)
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+BLOB_CHUNK_SIZE = 64 * 1024
+
+
+class GithubConflictError(Exception):
+    """
+    Raised when a write is rejected because the files changed concurrently.
+
+    Class name: GithubConflictError
+
+    Responsibilities:
+        - Tell conflicts (worth retrying) apart from other errors.
+
+    Collaborators:
+        - None
+    """
+
+    def __init__(self, message: str):
+        """
+        Creates a new GithubConflictError instance.
+        :param message: The error message.
+        :type message: str
+        """
+        super().__init__(message)
+
+
+class GithubUnreadableError(Exception):
+    """
+    Raised when a file exists but its contents cannot be read.
+
+    Class name: GithubUnreadableError
+
+    Responsibilities:
+        - Tell unreadable files apart from missing ones, so they're never taken as empty.
+
+    Collaborators:
+        - None
+    """
+
+    def __init__(self, message: str):
+        """
+        Creates a new GithubUnreadableError instance.
+        :param message: The error message.
+        :type message: str
+        """
+        super().__init__(message)
+
+
+def _is_conflict(error: Exception) -> bool:
+    """
+    Checks whether given error means the branch or the file changed concurrently.
+    :param error: The error.
+    :type error: Exception
+    :return: True in such case.
+    :rtype: bool
+    """
+    return getattr(error, "status", None) in [409, 422]
+
+
+def _call(priority: int, function: Callable, *args, **kwargs) -> Any:
+    """
+    Calls the Github API through PyGithub, once the scheduler allows it,
+    and updates the budget of the credential the method's object was
+    retrieved with, from the rate-limit headers of the response.
+    :param priority: The default priority of the request.
+    :type priority: int
+    :param function: The PyGithub method.
+    :type function: Callable
+    :param args: Its positional arguments.
+    :type args: List
+    :param kwargs: Its keyword arguments.
+    :type kwargs: Dict
+    :return: The outcome of the method.
+    :rtype: Any
+    """
+    requester = getattr(getattr(function, "__self__", None), "requester", None)
+    credential = credential_of(requester)
+    scheduler = RateLimitScheduler.instance()
+    scheduler.acquire(priority)
+    try:
+        result = function(*args, **kwargs)
+    except Exception as e:
+        scheduler.observe(
+            getattr(e, "status", None), getattr(e, "headers", None), credential
+        )
+        raise
+    if requester is not None:
+        scheduler.observe_requester(requester, credential)
+
+    return result
+
+
+def is_inlined(encoding: Optional[str], content: Optional[str], size: int) -> bool:
+    """
+    Checks whether the Contents API included the contents of a file.
+    Files over 1 MB come with an empty content, and "none" as encoding.
+    :param encoding: The encoding of the response.
+    :type encoding: Optional[str]
+    :param content: The content of the response.
+    :type content: Optional[str]
+    :param size: The size of the file.
+    :type size: int
+    :return: True in such case.
+    :rtype: bool
+    """
+    return encoding != "none" and (bool(content) or not size)
+
+
+def _stream_blob(sha: str) -> str:
+    """
+    Retrieves and decrypts a blob through the Git Data API, which (unlike
+    the Contents API) serves files up to 100 MB. The raw contents are
+    decrypted as they arrive, so no base64 or encrypted copy is kept.
+    Compressed contents are decompressed afterwards.
+    :param sha: The sha of the blob.
+    :type sha: str
+    :return: The decrypted contents.
+    :rtype: str
+    """
+    credential = get_credential()
+    scheduler = RateLimitScheduler.instance()
+    scheduler.acquire(RateLimitScheduler.READ)
+    with get_http_session().get(
+        f"{get_api_url()}/repos/{get_repository_name()}/git/blobs/{sha}",
+        headers={
+            "Accept": "application/vnd.github.raw+json",
+            **auth_headers(credential),
+        },
+        stream=True,
+    ) as response:
+        scheduler.observe(response.status_code, response.headers, credential)
+        response.raise_for_status()
+        return decode_payload(
+            decrypt_stream(response.iter_content(chunk_size=BLOB_CHUNK_SIZE))
+        )
+
+
+def _decrypt_contents(body: Dict[str, Any]) -> str:
+    """
+    Decrypts (and decompresses) the contents of a Contents API response,
+    fetching them as a blob if they weren't included.
+    :param body: The response.
+    :type body: Dict[str, Any]
+    :return: The decrypted contents.
+    :rtype: str
+    """
+    if is_inlined(
+        body.get("encoding", None), body.get("content", None), body.get("size", 0)
+    ):
+        return decode_payload(decrypt(body["content"]))
+
+    return _stream_blob(body["sha"])
+
+
+def _fetch_contents(
+    path: str, etag: Optional[str] = None
+) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Retrieves given path through the Contents API, conditionally if an
+    ETag is given. Each call sends its own If-None-Match header, so
+    concurrent revalidations of the same entry don't interfere.
+    :param path: The path.
+    :type path: str
+    :param etag: The ETag of the copy at hand, if any.
+    :type etag: Optional[str]
+    :return: The response and its ETag, or None if the copy is still current.
+    :rtype: Optional[Tuple[Dict[str, Any], Optional[str]]]
+    :raises github.GithubException: If the request fails (e.g. 404).
+    """
+    credential = get_credential()
+    headers = {"Accept": "application/vnd.github+json", **auth_headers(credential)}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+
+    scheduler = RateLimitScheduler.instance()
+    scheduler.acquire(RateLimitScheduler.READ)
+    response = get_http_session().get(
+        f"{get_api_url()}/repos/{get_repository_name()}/contents/{quote(path)}",
+        params={"ref": get_branch()},
+        headers=headers,
+    )
+    scheduler.observe(response.status_code, response.headers, credential)
+    if response.status_code == 304:
+        return None
+    if response.status_code >= 400:
+        raise GithubException(response.status_code, response.text, response.headers)
+
+    return (response.json(), response.headers.get("ETag", None))
+
+
+def _get_cached(path: str, revalidate: bool = False) -> CachedContent:
+    """
+    Retrieves the decrypted contents of given path, using the content cache.
+    Cached entries are revalidated with a conditional request (If-None-Match),
+    whose "304 Not Modified" responses don't count against the rate limit.
+    While the ChangeFeed follows the branch, they're used without revalidating them;
+    so a read that overlaps an invalidation of the path isn't cached.
+    :param path: The path.
+    :type path: str
+    :param revalidate: Whether to revalidate the entry even if the cache is known to be current.
+    :type revalidate: bool
+    :return: The cached entry.
+    :rtype: org.acmsl.licdata.infrastructure.github.CachedContent
+    """
+    cache = ContentCache.instance()
+
+    entry = cache.get(path)
+    if entry is not None and not revalidate and cache.is_validated():
+        cache.record_hit()
+        return entry
+
+    epoch = cache.epoch()
+    try:
+        response = _fetch_contents(path, None if entry is None else entry.etag)
+    except Exception:
+        if entry is not None:
+            cache.invalidate(path)
+        raise
+
+    if response is None:
+        cache.record_revalidation()
+        cache.record_hit()
+        return entry
+
+    (body, etag) = response
+    sha = body["sha"]
+    if entry is not None and entry.sha == sha:
+        cache.record_hit()
+        result = CachedContent(path, sha, entry.text, etag=etag)
+    else:
+        cache.record_miss()
+        try:
+            text = _decrypt_contents(body)
+        except Exception as e:
+            text = None
+            print(f"Cannot decrypt {path}: {e}")
+        result = CachedContent(path, sha, text, etag=etag)
+
+    cache.put(result, epoch)
+
+    return result
 
 
 def get_contents(path: str):
@@ -31,19 +302,47 @@ def get_contents(path: str):
     :return: A tuple of the contents and its hash.
     :rtype: tuple
     """
+    entry = _get_cached(path)
+
+    return (entry.text, entry.sha)
+
+
+def get_json(path: str) -> Tuple[Any, str]:
+    """
+    Retrieves the parsed JSON contents of given path.
+    The result is shared with the content cache, so it must not be modified.
+    :param path: The path.
+    :type path: str
+    :return: A tuple of the parsed contents (None if they cannot be decrypted) and its hash.
+    :rtype: Tuple[Any, str]
+    """
+    entry = _get_cached(path)
+
     result = None
+    if entry.text is not None:
+        result = entry.json
 
-    (repo, branch) = get_repo_and_branch()
+    return (result, entry.sha)
 
-    file = repo.get_contents(path, ref=branch)
 
-    try:
-        result = decrypt(file.content)
-    except Exception as e:
-        result = None
-        print(f"Cannot decrypt {path}: {e}")
+def is_not_found(error: Exception) -> bool:
+    """
+    Checks whether given error means the requested path does not exist.
+    :param error: The error.
+    :type error: Exception
+    :return: True in such case.
+    :rtype: bool
+    """
+    return getattr(error, "status", None) == 404
+
 
-    return (result, file.sha)
+def cache_stats() -> Dict[str, int]:
+    """
+    Retrieves the counters of the content cache.
+    :return: The hits, misses, revalidations, evictions and size of the cache.
+    :rtype: Dict[str, int]
+    """
+    return ContentCache.instance().stats()
 
 
 def create_file(path: str, content: str, message: str):
@@ -60,11 +359,15 @@ def create_file(path: str, content: str, message: str):
 
     (repo, branch) = get_repo_and_branch()
 
+    ContentCache.instance().invalidate(path)
+
     try:
-        result = repo.create_file(
+        result = _call(
+            RateLimitScheduler.WRITE,
+            repo.create_file,
             path,
             message,
-            encrypt(content),
+            encrypt(encode_payload(content)),
             branch=branch,
         )
     except Exception as e:
@@ -90,15 +393,21 @@ def update_file(path: str, content: str, message: str, hash: str):
 
     (repo, branch) = get_repo_and_branch()
 
+    ContentCache.instance().invalidate(path)
+
     try:
-        result = repo.update_file(
+        result = _call(
+            RateLimitScheduler.WRITE,
+            repo.update_file,
             path,
             message,
-            encrypt(content),
+            encrypt(encode_payload(content)),
             hash,
             branch=branch,
         )
     except Exception as e:
+        if _is_conflict(e):
+            raise GithubConflictError(f"{path} changed concurrently: {e}")
         result = None
         print(f"Error updating file {path}: {e}")
 
@@ -119,8 +428,11 @@ def delete_file(path: str, message: str):
 
     try:
         (result, hash) = get_contents(path)
+        ContentCache.instance().invalidate(path)
 
-        result = repo.delete_file(
+        result = _call(
+            RateLimitScheduler.WRITE,
+            repo.delete_file,
             path,
             message,
             hash,
@@ -133,6 +445,116 @@ def delete_file(path: str, message: str):
     return result
 
 
+def _create_blob(repo, content: str) -> str:
+    """
+    Uploads given content, compressed and encrypted, as a new blob.
+    :param repo: The repository.
+    :type repo: github.Repository.Repository
+    :param content: The file contents.
+    :type content: str
+    :return: The sha of the new blob.
+    :rtype: str
+    """
+    blob = _call(
+        RateLimitScheduler.WRITE,
+        repo.create_git_blob,
+        base64.b64encode(encrypt(encode_payload(content))).decode("ascii"),
+        "base64",
+    )
+    return blob.sha
+
+
+def _current_sha(path: str) -> Optional[str]:
+    """
+    Retrieves the sha of given path in the branch, revalidating the cached copy.
+    :param path: The path.
+    :type path: str
+    :return: The sha, or None if the file does not exist.
+    :rtype: Optional[str]
+    """
+    try:
+        return _get_cached(path, revalidate=True).sha
+    except Exception as e:
+        if is_not_found(e):
+            return None
+        raise
+
+
+def commit_files(
+    files: Dict[str, Optional[str]],
+    message: str,
+    expectedShas: Dict[str, Optional[str]] = None,
+):
+    """
+    Writes several files in a single commit, using the Git Data API.
+    All blobs are uploaded first, then a single tree is built on top of the
+    branch head, and the branch ref is advanced once (without forcing it).
+    :param files: The contents of each file, indexed by path. A None value removes the file.
+    :type files: Dict[str, Optional[str]]
+    :param message: The commit message.
+    :type message: str
+    :param expectedShas: The shas some files must still have (None if they must not exist).
+    :type expectedShas: Dict[str, Optional[str]]
+    :return: The new commit, or None if it could not be created.
+    :rtype: github.GitCommit.GitCommit
+    :raises GithubConflictError: If the expected shas don't match, or the branch moved meanwhile.
+    """
+    result = None
+
+    (repo, branch) = get_repo_and_branch()
+
+    try:
+        ref = _call(RateLimitScheduler.WRITE, repo.get_git_ref, f"heads/{branch}")
+        head = _call(RateLimitScheduler.WRITE, repo.get_git_commit, ref.object.sha)
+
+        # the branch was at head or later when checked, so if any of these
+        # files changed after head, either the check or the ref update fails.
+        for path, expected in (expectedShas or {}).items():
+            current = _current_sha(path)
+            if current != expected:
+                raise GithubConflictError(
+                    f"{path} is at {current} instead of {expected}"
+                )
+
+        paths = [path for path in files if files[path] is not None]
+        workers = int(os.environ.get("GITHUB_BLOB_WORKERS", "8"))
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(paths) or 1))
+        ) as pool:
+            blob_shas = dict(
+                zip(
+                    paths,
+                    pool.map(lambda path: _create_blob(repo, files[path]), paths),
+                )
+            )
+
+        elements = [
+            InputGitTreeElement(path, "100644", "blob", sha=blob_shas.get(path, None))
+            for path in files
+        ]
+        tree = _call(
+            RateLimitScheduler.WRITE, repo.create_git_tree, elements, head.tree
+        )
+        result = _call(
+            RateLimitScheduler.WRITE, repo.create_git_commit, message, tree, [head]
+        )
+        try:
+            _call(RateLimitScheduler.WRITE, ref.edit, result.sha, force=False)
+        except Exception as e:
+            if _is_conflict(e):
+                raise GithubConflictError(f"{branch} moved past {head.sha}: {e}")
+            raise
+    except GithubConflictError:
+        raise
+    except Exception as e:
+        result = None
+        print(f"Error committing files {', '.join(files.keys())}: {e}")
+    finally:
+        ContentCache.instance().invalidate_all(files.keys())
+
+    return result
+
+
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
 # mode: python
@@ -19,10 +19,13 @@ You should have received a copy of the GNU General Public User
 along with this program.  If not, see <https://www.gnu.org/users/>.
 """
 
+import importlib
 import inspect
 from .github_adapter import GithubAdapter
+import os
 from pythoneda.shared import BaseObject, Entity, Event
-from typing import Callable, Dict, List, Tuple, Type, Optional
+import re
+from typing import Callable, Dict, Iterator, List, Tuple, Type, Optional
 
 
 class GithubRepo(BaseObject):
@@ -36,9 +39,30 @@ class GithubRepo(BaseObject):
 
     Collaborators:
         - GithubAdapter from infrastructure.github.GithubAdapter.instance(): To simplify the use of the Github API.
+        - FilesystemAdapter, GitCloneAdapter, SqliteAdapter: Used instead of GithubAdapter when configured so.
 
     """
 
+    # the adapters available as backends, imported on demand
+    BACKENDS = {
+        "github": (
+            "org.acmsl.licdata.infrastructure.github.github_adapter",
+            "GithubAdapter",
+        ),
+        "filesystem": (
+            "org.acmsl.licdata.infrastructure.filesystem.filesystem_adapter",
+            "FilesystemAdapter",
+        ),
+        "git": (
+            "org.acmsl.licdata.infrastructure.filesystem.git_clone_adapter",
+            "GitCloneAdapter",
+        ),
+        "sqlite": (
+            "org.acmsl.licdata.infrastructure.sqlite.sqlite_adapter",
+            "SqliteAdapter",
+        ),
+    }
+
     def __init__(self, path: str, entityClass: Type):
         """
         Creates a new instance.
@@ -54,6 +78,44 @@ class GithubRepo(BaseObject):
         self._filter_attributes = entityClass.filter_attributes()
         self._attributes = entityClass.attributes()
         self._sensitive_attributes = entityClass.sensitive_attributes()
+        self._adapter = GithubRepo.adapter_for(path)
+        self._adapter.register_indexes(
+            path,
+            [self._primary_key]
+            + [[attribute] for attribute in self._primary_key]
+            + [[attribute] for attribute in self._filter_attributes],
+        )
+
+    @classmethod
+    def adapter_for(cls, path: str) -> GithubAdapter:
+        """
+        Retrieves the adapter configured for given collection: the one named
+        in LICDATA_BACKEND_{PATH} (e.g. LICDATA_BACKEND_PRODUCT_TYPES), or else
+        in LICDATA_BACKEND, or else "github".
+        :param path: The path of the collection.
+        :type path: str
+        :return: The adapter.
+        :rtype: org.acmsl.licdata.infrastructure.github.GithubAdapter
+        """
+        variable = "LICDATA_BACKEND_" + re.sub(r"[^A-Z0-9]", "_", path.upper())
+        backend = os.environ.get(
+            variable, os.environ.get("LICDATA_BACKEND", "github")
+        ).lower()
+        if backend not in cls.BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend} for {path}; expected one of {', '.join(cls.BACKENDS)}"
+            )
+        (module, name) = cls.BACKENDS[backend]
+        return getattr(importlib.import_module(module), name).instance()
+
+    @property
+    def adapter(self) -> GithubAdapter:
+        """
+        Retrieves the adapter used as backend.
+        :return: Such adapter.
+        :rtype: org.acmsl.licdata.infrastructure.github.GithubAdapter
+        """
+        return self._adapter
 
     def __str__(self):
         """
@@ -135,17 +197,24 @@ class GithubRepo(BaseObject):
         """
         return self._sensitive_attributes
 
-    def find_by_id(self, id: str, buildEntity: Callable[[Dict], Entity]) -> Entity:
+    def find_by_id(
+        self,
+        id: str,
+        buildEntity: Callable[[Dict], Entity] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Entity:
         """
         Finds the item matching given id.
         :param id: The id.
         :type id: str
-        :param buildEntity: A function to build the entity.
+        :param buildEntity: A function to build the entity. If None, the attributes are returned.
         :type buildEntity: callable[[Dict], Entity]
-        :return: The specific entity.
+        :param fields: The attributes to retrieve, instead of the entity.
+        :type fields: Optional[List[str]]
+        :return: The specific entity, or its (requested) attributes.
         :rtype: pythoneda.shared.Entity
         """
-        (result, _) = GithubAdapter.instance().find_by_id(id, self._path, buildEntity)
+        (result, _) = self._adapter.find_by_id(id, self._path, buildEntity, fields)
         return result
 
     def find_by_attribute(self, attributeName: str, attributeValue: str) -> Entity:
@@ -158,7 +227,7 @@ class GithubRepo(BaseObject):
         :return: The entity.
         :rtype: pythoneda.shared.Entity
         """
-        (result, _) = GithubAdapter.instance().find_by_attribute(
+        (result, _) = self._adapter.find_by_attribute(
             attributeValue, attributeName, self._path
         )
         return result
@@ -171,7 +240,7 @@ class GithubRepo(BaseObject):
         :return: The entities.
         :rtype: List[pythoneda.shared.Entity]
         """
-        (result, _) = GithubAdapter.instance().find_by_attributes(filter, self._path)
+        (result, _) = self._adapter.find_by_attributes(filter, self._path)
         return result
 
     def insert(
@@ -188,12 +257,36 @@ class GithubRepo(BaseObject):
         :return: The new-entity-created event if the entity gets persisted.
         :rtype: pythoneda.shared.Event
         """
-        return GithubAdapter.instance().insert(
+        return self._adapter.insert(
             newEntityRequested=newEntityRequested,
             buildNewEntity=buildNewEntity,
             path=self._path,
         )
 
+    def bulk_insert(
+        self,
+        newEntityRequests: List[Event],
+        buildNewEntity: Callable[[Event], Tuple[Entity, Event]],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Optional[Event]]:
+        """
+        Inserts many new entities, in a few large commits.
+        :param newEntityRequests: The events.
+        :type newEntityRequests: List[pythoneda.shared.Event]
+        :param buildNewEntity: A function to create each entity and its new-entity-created event.
+        :type buildNewEntity: callable[[pythoneda.shared.Event], Tuple[pythoneda.shared.Entity, pythoneda.shared.Event]]
+        :param progress: A function notified with the number of requests processed, and the total, after each batch.
+        :type progress: Optional[Callable[[int, int], None]]
+        :return: The new-entity-created event of each request, or None if the entity was not persisted.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        return self._adapter.bulk_insert(
+            newEntityRequests=newEntityRequests,
+            buildNewEntity=buildNewEntity,
+            path=self._path,
+            progress=progress,
+        )
+
     def delete(
         self,
         deleteEntityRequested: Event,
@@ -209,7 +302,7 @@ class GithubRepo(BaseObject):
         :return: The entity-deleted event if the entity gets removed.
         :rtype: pythoneda.shared.Event
         """
-        return GithubAdapter.instance().delete(
+        return self._adapter.delete(
             deleteEntityRequested=deleteEntityRequested,
             buildEntity=buildEntity,
             buildInvalidDeleteEntityRequestEvent=buildInvalidDeleteEntityRequestEvent,
@@ -236,7 +329,7 @@ class GithubRepo(BaseObject):
         :return: The entity-updated event if the entity gets removed.
         :rtype: pythoneda.shared.Event
         """
-        return GithubAdapter.instance().update(
+        return self._adapter.update(
             updateEntityRequested=updateEntityRequested,
             buildEntity=buildEntity,
             buildEntityUpdatedEvent=buildEntityUpdatedEvent,
@@ -244,6 +337,58 @@ class GithubRepo(BaseObject):
             path=self._path,
         )
 
+    def bulk_update(
+        self,
+        updateEntityRequests: List[Event],
+        buildEntity: Callable[[Dict], Entity],
+        buildEntityUpdatedEvent: Callable[[Entity, Event], Event],
+        buildInvalidUpdateEntityRequestEvent: Callable[[Event], Event],
+    ) -> List[Optional[Event]]:
+        """
+        Updates many items in a single commit.
+        :param updateEntityRequests: The events requesting the update of each entity.
+        :type updateEntityRequests: List[pythoneda.shared.Event]
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: Callable[[Dict], Entity]
+        :param buildEntityUpdatedEvent: A function to create the entity-updated event of an entity, given the request.
+        :type buildEntityUpdatedEvent: Callable[[Entity, Event], Event]
+        :param buildInvalidUpdateEntityRequestEvent: A function to build the invalid-update-entity-request event.
+        :type buildInvalidUpdateEntityRequestEvent: Callable[[pythoneda.shared.Event], pythoneda.shared.Event]
+        :return: The outcome of each request: the entity-updated event, the invalid-update-entity-request event, or None if the entity could not be updated.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        return self._adapter.bulk_update(
+            updateEntityRequests=updateEntityRequests,
+            buildEntity=buildEntity,
+            buildEntityUpdatedEvent=buildEntityUpdatedEvent,
+            buildInvalidUpdateEntityRequestEvent=buildInvalidUpdateEntityRequestEvent,
+            path=self._path,
+        )
+
+    def bulk_delete(
+        self,
+        deleteEntityRequests: List[Event],
+        buildEntity: Callable[[Dict], Entity],
+        buildInvalidDeleteEntityRequestEvent: Callable[[Event], Event],
+    ) -> List[Optional[Event]]:
+        """
+        Deletes many items in a single commit.
+        :param deleteEntityRequests: The events requesting the removal of each entity.
+        :type deleteEntityRequests: List[pythoneda.shared.Event]
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: Callable[[Dict], Entity]
+        :param buildInvalidDeleteEntityRequestEvent: A function to build the invalid-delete-entity-request event.
+        :type buildInvalidDeleteEntityRequestEvent: Callable[[pythoneda.shared.Event], pythoneda.shared.Event]
+        :return: The outcome of each request: the entity-deleted event, the invalid-delete-entity-request event, or None if the entity could not be deleted.
+        :rtype: List[Optional[pythoneda.shared.Event]]
+        """
+        return self._adapter.bulk_delete(
+            deleteEntityRequests=deleteEntityRequests,
+            buildEntity=buildEntity,
+            buildInvalidDeleteEntityRequestEvent=buildInvalidDeleteEntityRequestEvent,
+            path=self._path,
+        )
+
     def delete_by_pk(self, primaryKey: List) -> object:
         """
         Deletes an item.
@@ -252,7 +397,7 @@ class GithubRepo(BaseObject):
         :return: The deleted item, if the operation succeeds.
         :rtype: object
         """
-        return GithubAdapter.instance().delete(
+        return self._adapter.delete(
             primaryKey,
             self._path,
             self._primary_key,
@@ -268,18 +413,39 @@ class GithubRepo(BaseObject):
         :return: The item.
         :rtype: Optional[object]
         """
-        (result, _) = GithubAdapter.instance().find_by_attributes(pk, self._path)
+        (result, _) = self._adapter.find_by_attributes(pk, self._path)
         return result
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Retrieves all items.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of items.
         :rtype: List
         """
-        (result, _) = GithubAdapter.instance().list(self._path)
+        (result, _) = self._adapter.list(self._path, fields)
         return result
 
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the items, loading only the summary files needed.
+        :param after: The position of the last item already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of items, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The items, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._adapter.iter_list(self._path, after, limit, fields)
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
@@ -0,0 +1,145 @@
+"""
+org/acmsl/licdata/infrastructure/github/migrate_collection.py
+
+This file provides a tool to shard the summary of a collection.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+from org.acmsl.licdata.infrastructure.github.collection_layout import (
+    CollectionLayout,
+)
+from org.acmsl.licdata.infrastructure.github.github_raw import (
+    commit_files,
+    get_json,
+    GithubConflictError,
+)
+import os
+import random
+import time
+from typing import List
+
+
+def migrate_to_shards(
+    path: str, primaryKey: List[str], prefixLength: int = 1, keepLegacy: bool = False
+):
+    """
+    Splits {path}/data.json into {path}/_index/{prefix}.json shards, in a single commit.
+    The commit requires data.json not to have changed since it was read,
+    and the layout file not to exist; on conflicts, data.json is read again,
+    up to GITHUB_WRITE_RETRIES times (5 by default).
+    :param path: The path of the collection.
+    :type path: str
+    :param primaryKey: The names of the primary-key attributes.
+    :type primaryKey: List[str]
+    :param prefixLength: The number of hex digits of the shard prefixes (16 ** prefixLength shards).
+    :type prefixLength: int
+    :param keepLegacy: Whether to keep {path}/data.json after the migration.
+    :type keepLegacy: bool
+    :return: The commit, or None if it could not be created.
+    :rtype: github.GitCommit.GitCommit
+    """
+    if prefixLength < 1:
+        raise ValueError(f"Invalid prefix length: {prefixLength}")
+    if not primaryKey:
+        raise ValueError("The primary key is required to shard a collection")
+
+    layout = CollectionLayout(path, prefixLength, primaryKey)
+
+    retries = int(os.environ.get("GITHUB_WRITE_RETRIES", "5"))
+    backoff = float(os.environ.get("GITHUB_WRITE_BACKOFF_MS", "100")) / 1000
+    for attempt in range(retries + 1):
+        (rows, sha) = get_json(layout.legacy_file)
+        if rows is None:
+            raise ValueError(f"Cannot read {layout.legacy_file}")
+
+        shards = {}
+        for file in layout.files:
+            shards[file] = []
+        for row in rows:
+            file = layout.file_for(row)
+            if file is None:
+                raise ValueError(f"Row {row.get('id', None)} lacks the primary key")
+            shards[file].append(row)
+
+        files = {}
+        for file, shard in shards.items():
+            files[file] = json.dumps(shard)
+        files[layout.layout_file] = json.dumps(layout.to_dict())
+        if not keepLegacy:
+            files[layout.legacy_file] = None
+
+        try:
+            return commit_files(
+                files,
+                f"Sharded {layout.legacy_file} ({len(rows)} rows) into {len(shards)} files",
+                {layout.legacy_file: sha, layout.layout_file: None},
+            )
+        except GithubConflictError as err:
+            if attempt == retries:
+                raise
+            print(f"{layout.legacy_file} changed while migrating it; retrying: {err}")
+            time.sleep(random.uniform(0, backoff * (2**attempt)))
+
+
+def main():
+    """
+    Runs the migration from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Shards the data.json summary of a licdata collection"
+    )
+    parser.add_argument("path", help="The path of the collection, e.g. licenses")
+    parser.add_argument(
+        "--primary-key",
+        nargs="+",
+        required=True,
+        help="The attributes of the primary key",
+    )
+    parser.add_argument(
+        "--prefix-length",
+        type=int,
+        default=1,
+        help="The number of hex digits of the shard prefixes",
+    )
+    parser.add_argument(
+        "--keep-legacy",
+        action="store_true",
+        help="Do not remove data.json after the migration",
+    )
+    args = parser.parse_args()
+
+    commit = migrate_to_shards(
+        args.path, args.primary_key, args.prefix_length, args.keep_legacy
+    )
+    if commit is None:
+        raise SystemExit(f"Could not migrate {args.path}")
+    print(f"Migrated {args.path} in {commit.sha}")
+
+
+if __name__ == "__main__":
+    main()
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
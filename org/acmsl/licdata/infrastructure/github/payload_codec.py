@@ -0,0 +1,126 @@
+"""
+org/acmsl/licdata/infrastructure/github/payload_codec.py
+
+This file provides the functions to compress file contents before they
+get encrypted.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+NONE = "none"
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+# JSON never starts with these, so files written before the codec are
+# still told apart.
+MARKERS = {ZLIB: f"{ZLIB}:", ZSTD: f"{ZSTD}:"}
+
+
+def get_codec() -> str:
+    """
+    Retrieves the codec new files are written with.
+    :return: GITHUB_PAYLOAD_CODEC: none (by default), zlib or zstd.
+    :rtype: str
+    """
+    result = os.environ.get("GITHUB_PAYLOAD_CODEC", NONE).lower()
+    if result not in [NONE, ZLIB, ZSTD]:
+        raise ValueError(f"Unknown GITHUB_PAYLOAD_CODEC: {result}")
+    if result == ZSTD and zstandard is None:
+        raise ValueError("GITHUB_PAYLOAD_CODEC is zstd, but zstandard is missing")
+
+    return result
+
+
+def _level() -> int:
+    """
+    Retrieves the compression level.
+    :return: GITHUB_PAYLOAD_LEVEL, or 6 by default.
+    :rtype: int
+    """
+    return int(os.environ.get("GITHUB_PAYLOAD_LEVEL", "6"))
+
+
+def encode_payload(content: str, codec: str = None) -> str:
+    """
+    Compresses given contents, as marked base64 text since every file gets
+    encrypted as text. Contents that don't shrink are kept as they are.
+    :param content: The file contents.
+    :type content: str
+    :param codec: The codec. Defaults to get_codec().
+    :type codec: str
+    :return: The contents to encrypt.
+    :rtype: str
+    """
+    if codec is None:
+        codec = get_codec()
+    if codec == NONE:
+        return content
+
+    data = content.encode("utf-8")
+    if codec == ZSTD:
+        compressed = zstandard.ZstdCompressor(level=_level()).compress(data)
+    else:
+        compressed = zlib.compress(data, _level())
+
+    result = MARKERS[codec] + base64.b64encode(compressed).decode("ascii")
+    if len(result) >= len(data):
+        result = content
+
+    return result
+
+
+def decode_payload(content: str) -> str:
+    """
+    Decompresses given (decrypted) contents, if they're marked as compressed.
+    :param content: The decrypted contents.
+    :type content: str
+    :return: The file contents.
+    :rtype: str
+    """
+    if content.startswith(MARKERS[ZLIB]):
+        return zlib.decompress(
+            base64.b64decode(content[len(MARKERS[ZLIB]) :])
+        ).decode("utf-8")
+
+    if content.startswith(MARKERS[ZSTD]):
+        if zstandard is None:
+            raise ValueError("Cannot decompress zstd contents: zstandard is missing")
+        return (
+            zstandard.ZstdDecompressor()
+            .decompress(base64.b64decode(content[len(MARKERS[ZSTD]) :]))
+            .decode("utf-8")
+        )
+
+    return content
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,270 @@
+"""
+org/acmsl/licdata/infrastructure/github/pending_write.py
+
+This file defines the PendingWrite class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from pythoneda.shared import BaseObject
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class PendingWrite(BaseObject):
+    """
+    A change to the summary of a collection, and the files that come with it.
+
+    Class name: PendingWrite
+
+    Responsibilities:
+        - Re-apply an append, remove or replace on the latest summary rows.
+        - Carry the entity and event files to commit if the change applies.
+
+    Collaborators:
+        - GithubAdapter: Applies pending writes until they get committed.
+    """
+
+    APPEND = "append"
+    REMOVE = "remove"
+    REPLACE = "replace"
+
+    def __init__(
+        self,
+        kind: str,
+        file: str,
+        id: str,
+        row: Optional[Dict] = None,
+        primaryKey: Dict = None,
+        files: Dict[str, Optional[str]] = None,
+        message: str = None,
+    ):
+        """
+        Creates a new PendingWrite instance.
+        :param kind: The kind of change: PendingWrite.APPEND, REMOVE or REPLACE.
+        :type kind: str
+        :param file: The summary file affected.
+        :type file: str
+        :param id: The id of the entity.
+        :type id: str
+        :param row: The summary row to append or to replace with.
+        :type row: Optional[Dict]
+        :param primaryKey: For appends, the primary-key values identifying duplicates.
+        :type primaryKey: Dict
+        :param files: The entity and event files to commit along with the change.
+        :type files: Dict[str, Optional[str]]
+        :param message: The commit message.
+        :type message: str
+        """
+        super().__init__()
+        self._kind = kind
+        self._file = file
+        self._id = id
+        self._row = row
+        self._primary_key = dict(primaryKey or {})
+        self._files = dict(files or {})
+        self._message = message
+
+    @property
+    def kind(self) -> str:
+        """
+        Retrieves the kind of change.
+        :return: Such kind.
+        :rtype: str
+        """
+        return self._kind
+
+    @property
+    def file(self) -> str:
+        """
+        Retrieves the summary file affected.
+        :return: Such file.
+        :rtype: str
+        """
+        return self._file
+
+    @property
+    def id(self) -> str:
+        """
+        Retrieves the id of the entity.
+        :return: Such id.
+        :rtype: str
+        """
+        return self._id
+
+    @property
+    def row(self) -> Optional[Dict]:
+        """
+        Retrieves the summary row.
+        :return: Such row.
+        :rtype: Optional[Dict]
+        """
+        return self._row
+
+    @property
+    def primary_key(self) -> Dict:
+        """
+        Retrieves the primary-key values identifying duplicates, for appends.
+        :return: Such values.
+        :rtype: Dict
+        """
+        return self._primary_key
+
+    @property
+    def files(self) -> Dict[str, Optional[str]]:
+        """
+        Retrieves the entity and event files.
+        :return: Such files.
+        :rtype: Dict[str, Optional[str]]
+        """
+        return self._files
+
+    @property
+    def message(self) -> str:
+        """
+        Retrieves the commit message.
+        :return: Such message.
+        :rtype: str
+        """
+        return self._message
+
+    def apply(self, rows: List[Optional[Dict]], lookups: Optional[Dict] = None) -> bool:
+        """
+        Applies the change on given rows, in place.
+        Without lookups, removed rows are deleted from the list. With them,
+        rows are found by id or primary key without scanning the list, and
+        removed rows are left as None, for the caller to discard once all
+        changes are applied.
+        :param rows: The current summary rows.
+        :type rows: List[Optional[Dict]]
+        :param lookups: The positions of the rows by id, and their primary-key values. It's filled in as needed, and must be shared by all changes applied on the same rows.
+        :type lookups: Optional[Dict]
+        :return: False if the change must be discarded (the entity already exists, or it's not in the summary).
+        :rtype: bool
+        """
+        result = True
+
+        if self._kind == PendingWrite.APPEND:
+            if lookups is None:
+                duplicated = any(
+                    all(
+                        x.get(name, None) == value
+                        for name, value in self._primary_key.items()
+                    )
+                    for x in rows
+                )
+            else:
+                duplicated = tuple(self._primary_key.values()) in self._primary_keys(
+                    rows, lookups, tuple(self._primary_key.keys())
+                )
+            if self._primary_key and duplicated:
+                result = False
+            else:
+                rows.append(self._row)
+                if lookups is not None:
+                    for names, values in lookups.get("primaryKeys", {}).items():
+                        values.add(self._key(self._row, names))
+                    if "ids" in lookups:
+                        lookups["ids"].setdefault(self._id, []).append(len(rows) - 1)
+        else:
+            if lookups is None:
+                positions = [
+                    position
+                    for position, x in enumerate(rows)
+                    if x.get("id", None) == self._id
+                ]
+            else:
+                positions = self._positions(rows, lookups).get(self._id, [])
+            if not positions:
+                PendingWrite.logger().error(f"{self._file} does not contain {self._id}")
+                result = False
+            elif self._kind == PendingWrite.REMOVE and lookups is None:
+                for position in reversed(positions):
+                    del rows[position]
+            elif self._kind == PendingWrite.REMOVE:
+                for position in positions:
+                    rows[position] = None
+                del lookups["ids"][self._id]
+            else:
+                rows[positions[0]] = self._row
+            if result and lookups is not None:
+                # the primary keys of the rows changed
+                lookups.pop("primaryKeys", None)
+
+        return result
+
+    @staticmethod
+    def _key(row: Dict, names: Tuple[str, ...]) -> Tuple:
+        """
+        Retrieves the values of given attributes in a row.
+        :param row: The row.
+        :type row: Dict
+        :param names: The attribute names.
+        :type names: Tuple[str, ...]
+        :return: The values.
+        :rtype: Tuple
+        """
+        return tuple(row.get(name, None) for name in names)
+
+    @classmethod
+    def _primary_keys(
+        cls, rows: List[Optional[Dict]], lookups: Dict, names: Tuple[str, ...]
+    ) -> Set[Tuple]:
+        """
+        Retrieves the values of given attributes in the rows, building them if needed.
+        :param rows: The summary rows.
+        :type rows: List[Optional[Dict]]
+        :param lookups: The lookups of the rows.
+        :type lookups: Dict
+        :param names: The attribute names.
+        :type names: Tuple[str, ...]
+        :return: Such values.
+        :rtype: Set[Tuple]
+        """
+        primary_keys = lookups.setdefault("primaryKeys", {})
+        if names not in primary_keys:
+            primary_keys[names] = {cls._key(x, names) for x in rows if x is not None}
+
+        return primary_keys[names]
+
+    @staticmethod
+    def _positions(rows: List[Optional[Dict]], lookups: Dict) -> Dict[str, List[int]]:
+        """
+        Retrieves the positions of the rows by id, building them if needed.
+        :param rows: The summary rows.
+        :type rows: List[Optional[Dict]]
+        :param lookups: The lookups of the rows.
+        :type lookups: Dict
+        :return: Such positions.
+        :rtype: Dict[str, List[int]]
+        """
+        if "ids" not in lookups:
+            positions = {}
+            for position, x in enumerate(rows):
+                if x is not None:
+                    positions.setdefault(x.get("id", None), []).append(position)
+            lookups["ids"] = positions
+
+        return lookups["ids"]
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,395 @@
+"""
+org/acmsl/licdata/infrastructure/github/rate_limit_scheduler.py
+
+This file defines the RateLimitScheduler class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+import math
+import os
+from pythoneda.shared import BaseObject
+import threading
+from .token_pool import TokenPool
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+_priority: ContextVar[Optional[int]] = ContextVar("github_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Runs the enclosed Github requests, in this thread or task, with given
+    priority.
+    :param priority: The priority (RateLimitScheduler.INTERACTIVE, READ or WRITE).
+    :type priority: int
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitScheduler(BaseObject):
+    """
+    Throttles the requests to the Github API so they fit in the rate limit.
+
+    Requests take a token from a bucket holding up to GITHUB_RATE_BURST
+    tokens (20 by default). The bucket stays full while the credentials
+    have budget to spare; once one is down to its reserve
+    (GITHUB_RATE_RESERVE), the bucket is refilled at the pace that spreads
+    what's left (X-RateLimit-Remaining) until it's reset
+    (X-RateLimit-Reset). When Github asks a credential to back off
+    (Retry-After, or an exhausted budget), it's retired; requests wait only
+    when all credentials are. Waiting requests are served by priority, then
+    in arrival order. Threads share the same budget; coroutines (e.g. the
+    Azure Functions) reach it through worker threads.
+
+    Class name: RateLimitScheduler
+
+    Responsibilities:
+        - Track the rate-limit headers of the responses.
+        - Make requests wait for their turn.
+        - Expose the current budget and the queue depth.
+
+    Collaborators:
+        - TokenPool: Keeps the budget of each credential.
+    """
+
+    INTERACTIVE = 0
+    READ = 1
+    WRITE = 2
+
+    _singleton = None
+
+    def __init__(self, pool: TokenPool = None):
+        """
+        Creates a new RateLimitScheduler instance.
+        :param pool: The credentials. Defaults to TokenPool.instance().
+        :type pool: org.acmsl.licdata.infrastructure.github.TokenPool
+        """
+        super().__init__()
+        self._pool = pool
+        self._condition = threading.Condition()
+        self._capacity = max(1.0, float(os.environ.get("GITHUB_RATE_BURST", "20")))
+        self._tokens = self._capacity
+        self._refilled = time.monotonic()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._requests = 0
+        self._throttled = 0
+        self._waited = 0.0
+        self._backoffs = 0
+
+    @classmethod
+    def instance(cls) -> "RateLimitScheduler":
+        """
+        Retrieves the instance.
+        :return: Such instance.
+        :rtype: org.acmsl.licdata.infrastructure.github.RateLimitScheduler
+        """
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
+    @staticmethod
+    def current_priority(default: int) -> int:
+        """
+        Retrieves the priority of the requests of the current thread or task.
+        :param default: The priority if none was set with request_priority().
+        :type default: int
+        :return: The priority.
+        :rtype: int
+        """
+        result = _priority.get()
+        if result is None:
+            result = default
+
+        return result
+
+    @property
+    def pool(self) -> TokenPool:
+        """
+        Retrieves the credentials.
+        :return: Such pool.
+        :rtype: org.acmsl.licdata.infrastructure.github.TokenPool
+        """
+        if self._pool is None:
+            self._pool = TokenPool.instance()
+        return self._pool
+
+    def _rate(self, now: float) -> float:
+        """
+        Retrieves the pace the bucket is refilled at, in tokens per second.
+        :param now: The current time.
+        :type now: float
+        :return: Such pace (math.inf if unlimited).
+        :rtype: float
+        """
+        return self.pool.pace(now)
+
+    def _refill(self, now: float):
+        """
+        Adds the tokens earned since the last refill.
+        :param now: The current time.
+        :type now: float
+        """
+        monotonic = time.monotonic()
+        rate = self._rate(now)
+        if math.isinf(rate):
+            self._tokens = self._capacity
+        else:
+            self._tokens = min(
+                self._capacity, self._tokens + (monotonic - self._refilled) * rate
+            )
+        self._refilled = monotonic
+
+    def _take(self, ticket: Tuple[int, int]) -> Optional[float]:
+        """
+        Tries to take a token for given ticket. Must be called holding the lock.
+        :param ticket: The (priority, sequence) of the request.
+        :type ticket: Tuple[int, int]
+        :return: 0 if the token was taken, the seconds to wait before trying again, or None to wait for the requests ahead.
+        :rtype: Optional[float]
+        """
+        now = time.time()
+        available = self.pool.available_at(now)
+        if now < available:
+            return available - now
+        if self._queue[0] != ticket:
+            return None
+
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            heapq.heappop(self._queue)
+            self._condition.notify_all()
+            return 0
+
+        rate = self._rate(now)
+        if rate <= 0:
+            return max(0.05, (self.pool.next_reset(now) or now + 1) - now)
+
+        return (1 - self._tokens) / rate
+
+    def _enqueue(self, default: int) -> Tuple[int, int]:
+        """
+        Queues a new request. Must be called holding the lock.
+        :param default: The priority if none was set with request_priority().
+        :type default: int
+        :return: The ticket of the request.
+        :rtype: Tuple[int, int]
+        """
+        result = (self.current_priority(default), next(self._sequence))
+        heapq.heappush(self._queue, result)
+
+        return result
+
+    def _dequeue(self, ticket: Tuple[int, int]):
+        """
+        Removes an abandoned request from the queue. Must be called holding the lock.
+        :param ticket: The ticket of the request.
+        :type ticket: Tuple[int, int]
+        """
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def _record(self, waited: float):
+        """
+        Annotates a request that got its token. Must be called holding the lock.
+        :param waited: The seconds it waited.
+        :type waited: float
+        """
+        self._requests += 1
+        if waited > 0.001:
+            self._throttled += 1
+            self._waited += waited
+
+    def acquire(self, default: int = READ):
+        """
+        Waits until the current thread can send a request.
+        :param default: The priority if none was set with request_priority().
+        :type default: int
+        """
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(default)
+            try:
+                while True:
+                    delay = self._take(ticket)
+                    if delay == 0:
+                        break
+                    self._condition.wait(delay)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+            self._record(time.monotonic() - started)
+
+    @staticmethod
+    def _header(headers: Optional[Mapping], name: str) -> Optional[str]:
+        """
+        Retrieves a header, regardless of its case.
+        :param headers: The headers.
+        :type headers: Optional[Mapping]
+        :param name: The header name, in lowercase.
+        :type name: str
+        :return: The value, if present.
+        :rtype: Optional[str]
+        """
+        if not headers:
+            return None
+
+        for key, value in headers.items():
+            if key.lower() == name:
+                return value
+
+        return None
+
+    def observe(
+        self,
+        status: Optional[int],
+        headers: Optional[Mapping],
+        credential: Optional[str] = None,
+    ):
+        """
+        Updates the budget from the headers of a response.
+        :param status: The status of the response.
+        :type status: Optional[int]
+        :param headers: The headers of the response.
+        :type headers: Optional[Mapping]
+        :param credential: The credential of the request.
+        :type credential: Optional[str]
+        """
+        remaining = self._header(headers, "x-ratelimit-remaining")
+        limit = self._header(headers, "x-ratelimit-limit")
+        reset = self._header(headers, "x-ratelimit-reset")
+        retry_after = self._header(headers, "retry-after")
+        try:
+            remaining = None if remaining is None else int(float(remaining))
+            limit = None if limit is None else int(float(limit))
+            reset = None if reset is None else float(reset)
+            retry_after = None if retry_after is None else float(retry_after)
+        except ValueError:
+            return
+
+        self.update(remaining, limit, reset, status, retry_after, credential)
+
+    def update(
+        self,
+        remaining: Optional[int],
+        limit: Optional[int],
+        reset: Optional[float],
+        status: Optional[int] = None,
+        retryAfter: Optional[float] = None,
+        credential: Optional[str] = None,
+    ):
+        """
+        Updates the budget of a credential.
+        :param remaining: The requests left until the reset, if known.
+        :type remaining: Optional[int]
+        :param limit: The requests allowed per window, if known.
+        :type limit: Optional[int]
+        :param reset: The time (in seconds since the epoch) of the reset, if known.
+        :type reset: Optional[float]
+        :param status: The status of the response, if any.
+        :type status: Optional[int]
+        :param retryAfter: The seconds Github asked to wait, if any.
+        :type retryAfter: Optional[float]
+        :param credential: The credential. Can be omitted if there's just one.
+        :type credential: Optional[str]
+        """
+        now = time.time()
+        with self._condition:
+            self._refill(now)
+            retired = self.pool.update(
+                credential, remaining, limit, reset, status, retryAfter
+            )
+            if retired:
+                self._backoffs += 1
+            budgets = self.pool.stats()["credentials"].values()
+            self._tokens = min(
+                self._tokens, float(sum(budget["remaining"] for budget in budgets))
+            )
+            self._condition.notify_all()
+
+        available = self.pool.available_at(now)
+        if retired and available > now:
+            RateLimitScheduler.logger().warning(
+                f"Github rate limit hit on all credentials; pausing requests for {available - now:.1f}s"
+            )
+
+    def observe_requester(self, requester: Any, credential: Optional[str] = None):
+        """
+        Updates the budget from the last response PyGithub received.
+        :param requester: The requester of the client.
+        :type requester: github.Requester.Requester
+        :param credential: The credential of the client.
+        :type credential: Optional[str]
+        """
+        (remaining, limit) = getattr(requester, "rate_limiting", (-1, -1))
+        reset = getattr(requester, "rate_limiting_resettime", 0)
+        if limit > 0:
+            self.update(remaining, limit, reset or None, credential=credential)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retrieves the budget and the scheduling counters.
+        :return: The budget (remaining, limit, retirements, the budget of each credential, tokens, blockedFor), the queue depth, and the counters.
+        :rtype: Dict[str, Any]
+        """
+        now = time.time()
+        budget = self.pool.stats()
+        with self._condition:
+            self._refill(now)
+            rate = self._rate(now)
+            return {
+                **budget,
+                "tokens": round(self._tokens, 2),
+                "ratePerSecond": None if math.isinf(rate) else round(rate, 3),
+                "blockedFor": round(max(0.0, self.pool.available_at(now) - now), 3),
+                "queueDepth": len(self._queue),
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "waitedSeconds": round(self._waited, 3),
+                "backoffs": self._backoffs,
+            }
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    """
+    Retrieves the budget and the queue depth of the Github request scheduler.
+    :return: Such metrics.
+    :rtype: Dict[str, Any]
+    """
+    return RateLimitScheduler.instance().stats()
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,351 @@
+"""
+org/acmsl/licdata/infrastructure/github/token_pool.py
+
+This file defines the TokenPool class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from github import Auth
+import itertools
+import math
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class TokenPool(BaseObject):
+    """
+    The Github credentials available to this process, and the rate-limit
+    budget of each one.
+
+    Credentials come from GITHUB_TOKENS (a comma-separated list of personal
+    access or installation tokens), or GITHUB_TOKEN; and, if GITHUB_APP_ID,
+    GITHUB_APP_PRIVATE_KEY and GITHUB_APP_INSTALLATION_IDS are set, from
+    each installation of the Github App, whose tokens are renewed as they
+    expire.
+
+    Class name: TokenPool
+
+    Responsibilities:
+        - Build the authentication of each credential.
+        - Pick the credential with the largest remaining budget.
+        - Retire exhausted credentials until their budget is reset.
+
+    Collaborators:
+        - RateLimitScheduler: Paces the requests with the combined budget.
+    """
+
+    _singleton = None
+
+    def __init__(self, auths: Dict[str, Any] = None):
+        """
+        Creates a new TokenPool instance.
+        :param auths: The authentication of each credential, by name. Defaults to the ones configured in the environment.
+        :type auths: Dict[str, github.Auth.Auth]
+        """
+        super().__init__()
+        if auths is None:
+            auths = TokenPool._configured_auths()
+        self._auths = auths
+        self._lock = threading.Lock()
+        self._default_limit = int(os.environ.get("GITHUB_RATE_LIMIT", "5000"))
+        self._reserve = float(os.environ.get("GITHUB_RATE_RESERVE", "0.1"))
+        self._budgets = {
+            name: {"remaining": None, "limit": None, "reset": None, "retiredUntil": 0.0}
+            for name in auths
+        }
+        self._turns = itertools.count()
+        self._last_turn = {name: -1 for name in auths}
+        self._retirements = 0
+
+    @classmethod
+    def instance(cls) -> "TokenPool":
+        """
+        Retrieves the instance.
+        :return: Such instance.
+        :rtype: org.acmsl.licdata.infrastructure.github.TokenPool
+        """
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
+    @staticmethod
+    def _configured_auths() -> Dict[str, Any]:
+        """
+        Builds the authentication of each credential configured in the environment.
+        :return: The authentications, by name.
+        :rtype: Dict[str, github.Auth.Auth]
+        """
+        result = {}
+
+        tokens = [
+            token.strip()
+            for token in os.environ.get(
+                "GITHUB_TOKENS", os.environ.get("GITHUB_TOKEN", "")
+            ).split(",")
+            if token.strip()
+        ]
+        for index, token in enumerate(tokens):
+            result[f"token-{index + 1}"] = Auth.Token(token)
+
+        app_id = os.environ.get("GITHUB_APP_ID", None)
+        private_key = os.environ.get("GITHUB_APP_PRIVATE_KEY", None)
+        installations = os.environ.get("GITHUB_APP_INSTALLATION_IDS", "")
+        if app_id and private_key:
+            app = Auth.AppAuth(app_id, private_key.replace("\\n", "\n"))
+            for installation in installations.split(","):
+                if installation.strip():
+                    result[f"installation-{installation.strip()}"] = (
+                        app.get_installation_auth(int(installation))
+                    )
+
+        if not result:
+            print("GITHUB_TOKEN environment variable not set")
+            raise ValueError("GITHUB_TOKEN environment variable not set")
+
+        return result
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Retrieves the names of the credentials.
+        :return: Such names.
+        :rtype: List[str]
+        """
+        return list(self._auths.keys())
+
+    def auth(self, name: str) -> Any:
+        """
+        Retrieves the authentication of given credential.
+        :param name: The credential.
+        :type name: str
+        :return: Its authentication.
+        :rtype: github.Auth.Auth
+        """
+        return self._auths[name]
+
+    def _estimate(self, name: str, now: float) -> int:
+        """
+        Retrieves the requests given credential can still send. Must be called holding the lock.
+        :param name: The credential.
+        :type name: str
+        :param now: The current time.
+        :type now: float
+        :return: Such estimate.
+        :rtype: int
+        """
+        budget = self._budgets[name]
+        if (
+            budget["remaining"] is None
+            or budget["reset"] is None
+            or now >= budget["reset"]
+        ):
+            return budget["limit"] or self._default_limit
+
+        return budget["remaining"]
+
+    def select(self) -> str:
+        """
+        Picks the credential for the next request: among the ones not
+        retired, the one with the largest remaining budget, taking turns on
+        ties. If all of them are retired, the first one to come back.
+        :return: The name of the credential.
+        :rtype: str
+        """
+        now = time.time()
+        with self._lock:
+            active = [
+                name
+                for name in self._auths
+                if self._budgets[name]["retiredUntil"] <= now
+            ]
+            if not active:
+                return min(
+                    self._auths, key=lambda name: self._budgets[name]["retiredUntil"]
+                )
+            result = max(
+                active,
+                key=lambda name: (self._estimate(name, now), -self._last_turn[name]),
+            )
+            self._last_turn[result] = next(self._turns)
+            budget = self._budgets[result]
+            if budget["remaining"] is not None and budget["remaining"] > 0:
+                budget["remaining"] -= 1
+
+        return result
+
+    def update(
+        self,
+        name: Optional[str],
+        remaining: Optional[int],
+        limit: Optional[int],
+        reset: Optional[float],
+        status: Optional[int] = None,
+        retryAfter: Optional[float] = None,
+    ) -> bool:
+        """
+        Updates the budget of given credential, retiring it if Github asked
+        to back off, or if it's exhausted.
+        :param name: The credential. Defaults to the only one, if there's just one.
+        :type name: Optional[str]
+        :param remaining: The requests left until the reset, if known.
+        :type remaining: Optional[int]
+        :param limit: The requests allowed per window, if known.
+        :type limit: Optional[int]
+        :param reset: The time (in seconds since the epoch) of the reset, if known.
+        :type reset: Optional[float]
+        :param status: The status of the response, if any.
+        :type status: Optional[int]
+        :param retryAfter: The seconds Github asked to wait, if any.
+        :type retryAfter: Optional[float]
+        :return: True if the credential got retired.
+        :rtype: bool
+        """
+        if name is None:
+            if len(self._auths) != 1:
+                return False
+            name = next(iter(self._auths))
+
+        now = time.time()
+        result = False
+        with self._lock:
+            budget = self._budgets.get(name, None)
+            if budget is None:
+                return False
+            if limit is not None and limit > 0:
+                budget["limit"] = limit
+            if reset is not None and reset > 0:
+                budget["reset"] = reset
+            if remaining is not None and remaining >= 0:
+                budget["remaining"] = remaining
+
+            until = 0.0
+            if status in [403, 429] and retryAfter is not None:
+                until = now + retryAfter
+            elif remaining == 0 and budget["reset"] is not None:
+                until = budget["reset"]
+            if until > budget["retiredUntil"] and until > now:
+                budget["retiredUntil"] = until
+                self._retirements += 1
+                result = True
+
+        if result:
+            TokenPool.logger().warning(
+                f"Github credential {name} retired for {until - now:.1f}s"
+            )
+
+        return result
+
+    def pace(self, now: float) -> float:
+        """
+        Retrieves the combined pace, in requests per second, the active
+        credentials can sustain until their reset. Requests are only paced
+        once a credential is down to its reserve (GITHUB_RATE_RESERVE, a
+        fraction of its limit, 0.1 by default), which then gets spread
+        until the reset; above it, or before its budget is known, a
+        credential doesn't limit the pace.
+        :param now: The current time.
+        :type now: float
+        :return: Such pace (math.inf if unlimited).
+        :rtype: float
+        """
+        result = 0.0
+        with self._lock:
+            for name, budget in self._budgets.items():
+                if budget["retiredUntil"] > now:
+                    continue
+                if (
+                    budget["remaining"] is None
+                    or budget["reset"] is None
+                    or now >= budget["reset"]
+                    or budget["remaining"]
+                    > (budget["limit"] or self._default_limit) * self._reserve
+                ):
+                    return math.inf
+                result += max(budget["remaining"], 0) / max(budget["reset"] - now, 1.0)
+
+        return result
+
+    def available_at(self, now: float) -> float:
+        """
+        Retrieves when the first credential will be available.
+        :param now: The current time.
+        :type now: float
+        :return: Such time (now, or earlier, if any is available already).
+        :rtype: float
+        """
+        with self._lock:
+            return min(budget["retiredUntil"] for budget in self._budgets.values())
+
+    def next_reset(self, now: float) -> Optional[float]:
+        """
+        Retrieves the next time a credential's budget gets reset.
+        :param now: The current time.
+        :type now: float
+        :return: Such time, if known.
+        :rtype: Optional[float]
+        """
+        with self._lock:
+            resets = [
+                budget["reset"]
+                for budget in self._budgets.values()
+                if budget["reset"] is not None and budget["reset"] > now
+            ]
+
+        return min(resets) if resets else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retrieves the combined budget, and the budget of each credential.
+        :return: Such budgets.
+        :rtype: Dict[str, Any]
+        """
+        now = time.time()
+        with self._lock:
+            credentials = {
+                name: {
+                    "remaining": self._estimate(name, now),
+                    "limit": budget["limit"] or self._default_limit,
+                    "reset": budget["reset"],
+                    "retiredFor": round(max(0.0, budget["retiredUntil"] - now), 3),
+                }
+                for name, budget in self._budgets.items()
+            }
+            retirements = self._retirements
+
+        return {
+            "remaining": sum(
+                credential["remaining"]
+                for credential in credentials.values()
+                if credential["retiredFor"] == 0
+            ),
+            "limit": sum(credential["limit"] for credential in credentials.values()),
+            "retirements": retirements,
+            "credentials": credentials,
+        }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,136 @@
+"""
+org/acmsl/licdata/infrastructure/github/write_coalescer.py
+
+This file defines the WriteCoalescer class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from concurrent.futures import Future
+from .pending_write import PendingWrite
+from pythoneda.shared import BaseObject
+import threading
+from typing import Callable, Dict, List, Tuple
+
+
+class WriteCoalescer(BaseObject):
+    """
+    Batches concurrent writes to the same collection into a single commit.
+
+    Class name: WriteCoalescer
+
+    Responsibilities:
+        - Collect the writes submitted for a collection during a short window, or up to a maximum.
+        - Apply each batch at once, and resolve the future of every submitter.
+
+    Collaborators:
+        - GithubAdapter: Provides the function applying a batch of writes.
+        - PendingWrite: The writes.
+    """
+
+    def __init__(
+        self,
+        applyWrites: Callable[[List[PendingWrite]], List[bool]],
+        window: float,
+        maxItems: int,
+    ):
+        """
+        Creates a new WriteCoalescer instance.
+        :param applyWrites: The function applying a batch of writes.
+        :type applyWrites: Callable[[List[org.acmsl.licdata.infrastructure.github.PendingWrite]], List[bool]]
+        :param window: How long, in seconds, to wait for more writes before flushing.
+        :type window: float
+        :param maxItems: How many writes trigger a flush before the window ends.
+        :type maxItems: int
+        """
+        super().__init__()
+        self._apply_writes = applyWrites
+        self._window = window
+        self._max_items = max(1, maxItems)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[List[PendingWrite], Future]]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+
+    def submit(self, key: str, writes: List[PendingWrite]) -> Future:
+        """
+        Queues given writes, which will be applied together, in the next batch for given key.
+        :param key: The batching key (the collection path).
+        :type key: str
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :return: A future resolving to whether each write got committed.
+        :rtype: concurrent.futures.Future
+        """
+        result = Future()
+        flush_now = False
+
+        with self._lock:
+            batch = self._pending.setdefault(key, [])
+            batch.append((writes, result))
+            if sum([len(items) for items, _ in batch]) >= self._max_items:
+                flush_now = True
+            elif len(batch) == 1:
+                timer = threading.Timer(self._window, self.flush, [key])
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+
+        if flush_now:
+            self.flush(key)
+
+        return result
+
+    def flush(self, key: str):
+        """
+        Applies the writes queued for given key.
+        :param key: The batching key.
+        :type key: str
+        """
+        with self._lock:
+            batch = self._pending.pop(key, [])
+            # the timer of this batch must not flush the next one
+            timer = self._timers.pop(key, None)
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+
+        if not batch:
+            return
+
+        writes = [write for items, _ in batch for write in items]
+        WriteCoalescer.logger().debug(
+            f"Applying {len(writes)} writes from {len(batch)} callers on {key}"
+        )
+        try:
+            outcomes = self._apply_writes(writes)
+        except Exception as err:
+            for _, future in batch:
+                future.set_exception(err)
+            return
+
+        offset = 0
+        for items, future in batch:
+            future.set_result(outcomes[offset : offset + len(items)])
+            offset += len(items)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,103 @@
+"""
+org/acmsl/licdata/infrastructure/github/write_metrics.py
+
+This file defines the WriteMetrics class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from typing import Dict
+
+
+class WriteMetrics:
+    """
+    Counters of the optimistic-concurrency write loop.
+
+    Class name: WriteMetrics
+
+    Responsibilities:
+        - Count commit attempts, successful commits, conflicts and exhausted retry budgets.
+
+    Collaborators:
+        - GithubAdapter: Updates them.
+    """
+
+    def __init__(self):
+        """
+        Creates a new WriteMetrics instance.
+        """
+        super().__init__()
+        self._lock = threading.Lock()
+        self._attempts = 0
+        self._commits = 0
+        self._conflicts = 0
+        self._exhausted = 0
+
+    def record_attempt(self):
+        """
+        Annotates a commit attempt.
+        """
+        with self._lock:
+            self._attempts += 1
+
+    def record_commit(self):
+        """
+        Annotates a successful commit.
+        """
+        with self._lock:
+            self._commits += 1
+
+    def record_conflict(self):
+        """
+        Annotates a commit rejected because of a concurrent change.
+        """
+        with self._lock:
+            self._conflicts += 1
+
+    def record_exhausted(self):
+        """
+        Annotates a write abandoned after running out of retries.
+        """
+        with self._lock:
+            self._exhausted += 1
+
+    def to_dict(self) -> Dict:
+        """
+        Retrieves the counters, and the ratio of conflicting attempts.
+        :return: The counters.
+        :rtype: Dict
+        """
+        with self._lock:
+            return {
+                "attempts": self._attempts,
+                "commits": self._commits,
+                "conflicts": self._conflicts,
+                "exhausted": self._exhausted,
+                "conflictRate": (
+                    self._conflicts / self._attempts if self._attempts else 0.0
+                ),
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
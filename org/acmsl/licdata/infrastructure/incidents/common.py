@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import Incident
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.incidents import NewIncidentRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict, List
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> List:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, Incident.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewIncidentRequested:
+    """
+    Builds the event requesting a new incident.
+    :param attributes: The incident's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.incidents.NewIncidentRequested
+    """
+    return NewIncidentRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from org.acmsl.licdata import IncidentRepo
+from org.acmsl.licdata import Incident, IncidentRepo
+from org.acmsl.licdata.events.incidents import (
+    DeleteIncidentRequested,
+    IncidentDeleted,
+    IncidentUpdated,
+    InvalidDeleteIncidentRequest,
+    InvalidUpdateIncidentRequest,
+    NewIncidentCreated,
+    NewIncidentRequested,
+    UpdateIncidentRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubIncidentRepo(IncidentRepo):
@@ -54,15 +65,27 @@ class GithubIncidentRepo(IncidentRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the incident matching given id.
         :param id: The incident id.
         :type id: str
-        :return: The incident.
+        :param fields: The attributes to retrieve, instead of the incident.
+        :type fields: Optional[List[str]]
+        :return: The incident, or its (requested) attributes.
         :rtype: Incident from domain.incident
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> Incident:
+        """
+        Builds a Incident from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The Incident instance.
+        :rtype: org.acmsl.licdata.Incident
+        """
+        return Incident.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,33 @@ class GithubIncidentRepo(IncidentRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newIncidentRequests: List[NewIncidentRequested]
+    ) -> List[Optional[NewIncidentCreated]]:
+        """
+        Inserts many new Incidents, in a few large commits.
+        :param newIncidentRequests: The events.
+        :type newIncidentRequests: List[org.acmsl.licdata.events.incidents.NewIncidentRequested]
+        :return: The event of each new incident, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.incidents.NewIncidentCreated]]
+        """
+        return self._githubRepo.bulk_insert(
+            newIncidentRequests, self._build_new_incident
+        )
+
+    def _build_new_incident(
+        self, newIncidentRequested: NewIncidentRequested
+    ) -> Tuple[Incident, NewIncidentCreated]:
+        """
+        Builds a new Incident.
+        :param newIncidentRequested: The event.
+        :type newIncidentRequested: org.acmsl.licdata.events.incidents.NewIncidentRequested
+        :return: The new incident and the event.
+        :rtype: Tuple[org.acmsl.licdata.Incident, org.acmsl.licdata.events.incidents.NewIncidentCreated]
+        """
+        new_incident = Incident.create_from(newIncidentRequested)
+        return (new_incident, new_incident.created_event)
+
     def update(self, item):
         """
         Updates an Incident.
@@ -92,6 +142,63 @@ class GithubIncidentRepo(IncidentRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateIncidentRequests: List[UpdateIncidentRequested]
+    ) -> List[Optional[IncidentUpdated]]:
+        """
+        Updates many Incidents in a single commit.
+        :param updateIncidentRequests: The events requesting the update of each incident.
+        :type updateIncidentRequests: List[org.acmsl.licdata.events.incidents.UpdateIncidentRequested]
+        :return: The outcome of each request: the incident-updated event, the invalid-update-incident-request event, or None if the incident could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.incidents.IncidentUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateIncidentRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_incident_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_incident_updated(
+        self, incident: Incident, updateIncidentRequested: UpdateIncidentRequested
+    ) -> IncidentUpdated:
+        """
+        Builds the IncidentUpdated event of given incident.
+        :param incident: The incident.
+        :type incident: org.acmsl.licdata.Incident
+        :param updateIncidentRequested: The event requesting the update of the incident.
+        :type updateIncidentRequested: org.acmsl.licdata.events.incidents.UpdateIncidentRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.incidents.IncidentUpdated
+        """
+        return IncidentUpdated(
+            entityId=incident.id,
+            **{
+                name: getattr(updateIncidentRequested, camel_to_snake(name), None)
+                for name in Incident.attributes()
+                if name != "id" and name not in Incident.primary_key()
+            },
+            previousEventIds=(
+                updateIncidentRequested.previous_event_ids
+                + [updateIncidentRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateIncidentRequested: UpdateIncidentRequested
+    ) -> InvalidUpdateIncidentRequest:
+        """
+        Builds an InvalidUpdateIncidentRequest event.
+        :param updateIncidentRequested: The event requesting the update of a incident.
+        :type updateIncidentRequested: org.acmsl.licdata.events.incidents.UpdateIncidentRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.incidents.InvalidUpdateIncidentRequest
+        """
+        return InvalidUpdateIncidentRequest(
+            updateIncidentRequested.entity_id,
+            updateIncidentRequested.previous_event_ids + [updateIncidentRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes an Incident.
@@ -102,6 +209,37 @@ class GithubIncidentRepo(IncidentRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteIncidentRequests: List[DeleteIncidentRequested]
+    ) -> List[Optional[IncidentDeleted]]:
+        """
+        Deletes many Incidents in a single commit.
+        :param deleteIncidentRequests: The events requesting the removal of each incident.
+        :type deleteIncidentRequests: List[org.acmsl.licdata.events.incidents.DeleteIncidentRequested]
+        :return: The outcome of each request: the incident-deleted event, the invalid-delete-incident-request event, or None if the incident could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.incidents.IncidentDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteIncidentRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteIncidentRequested: DeleteIncidentRequested
+    ) -> InvalidDeleteIncidentRequest:
+        """
+        Builds an InvalidDeleteIncidentRequest event.
+        :param deleteIncidentRequested: The event requesting the removal of the incident.
+        :type deleteIncidentRequested: org.acmsl.licdata.events.incidents.DeleteIncidentRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.incidents.InvalidDeleteIncidentRequest
+        """
+        return InvalidDeleteIncidentRequest(
+            deleteIncidentRequested.entity_id,
+            deleteIncidentRequested.previous_event_ids + [deleteIncidentRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves an Incident by its primary key.
@@ -112,10 +250,31 @@ class GithubIncidentRepo(IncidentRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Incidents.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all incidents.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Incidents, loading only the data needed.
+        :param after: The position of the last Incident already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Incidents, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Incidents, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
@@ -20,6 +20,10 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import IncidentRepo, LicenseRepo
+from org.acmsl.licdata.infrastructure.github import (
+    RateLimitScheduler,
+    request_priority,
+)
 import org.acmsl.licdata.infrastructure.mail
 import org.acmsl.licdata.infrastructure.params
 import org.acmsl.licdata.infrastructure.resp
@@ -53,13 +57,15 @@ def handler(event, context):
         productVersion = params.retrieveProductVersion(body, event)
         installationCode = params.retrieveInstallationCode(body, event)
 
-        license = (
-            Ports.instance()
-            .resolve_first(LicenseRepo)
-            .findByEmailProductAndInstallationCode(
-                email, product, productVersion, installationCode
+        # license checks are served ahead of queued background writes
+        with request_priority(RateLimitScheduler.INTERACTIVE):
+            license = (
+                Ports.instance()
+                .resolve_first(LicenseRepo)
+                .findByEmailProductAndInstallationCode(
+                    email, product, productVersion, installationCode
+                )
             )
-        )
 
         if license:
             licenseId = license["id"]
@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import License
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.licenses import NewLicenseRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict, List
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, License.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewLicenseRequested:
+    """
+    Builds the event requesting a new license.
+    :param attributes: The license's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.licenses.NewLicenseRequested
+    """
+    return NewLicenseRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from org.acmsl.licdata import LicenseRepo
+from org.acmsl.licdata import License, LicenseRepo
+from org.acmsl.licdata.events.licenses import (
+    DeleteLicenseRequested,
+    LicenseDeleted,
+    LicenseUpdated,
+    InvalidDeleteLicenseRequest,
+    InvalidUpdateLicenseRequest,
+    NewLicenseCreated,
+    NewLicenseRequested,
+    UpdateLicenseRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubLicenseRepo(LicenseRepo):
@@ -54,15 +65,27 @@ class GithubLicenseRepo(LicenseRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the license matching given id.
         :param id: The license id.
         :type id: str
-        :return: The license.
+        :param fields: The attributes to retrieve, instead of the license.
+        :type fields: Optional[List[str]]
+        :return: The license, or its (requested) attributes.
         :rtype: License from domain.license
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> License:
+        """
+        Builds a License from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The License instance.
+        :rtype: org.acmsl.licdata.License
+        """
+        return License.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,31 @@ class GithubLicenseRepo(LicenseRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newLicenseRequests: List[NewLicenseRequested]
+    ) -> List[Optional[NewLicenseCreated]]:
+        """
+        Inserts many new Licenses, in a few large commits.
+        :param newLicenseRequests: The events.
+        :type newLicenseRequests: List[org.acmsl.licdata.events.licenses.NewLicenseRequested]
+        :return: The event of each new license, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.licenses.NewLicenseCreated]]
+        """
+        return self._githubRepo.bulk_insert(newLicenseRequests, self._build_new_license)
+
+    def _build_new_license(
+        self, newLicenseRequested: NewLicenseRequested
+    ) -> Tuple[License, NewLicenseCreated]:
+        """
+        Builds a new License.
+        :param newLicenseRequested: The event.
+        :type newLicenseRequested: org.acmsl.licdata.events.licenses.NewLicenseRequested
+        :return: The new license and the event.
+        :rtype: Tuple[org.acmsl.licdata.License, org.acmsl.licdata.events.licenses.NewLicenseCreated]
+        """
+        new_license = License.create_from(newLicenseRequested)
+        return (new_license, new_license.created_event)
+
     def update(self, item):
         """
         Updates a License.
@@ -92,6 +140,62 @@ class GithubLicenseRepo(LicenseRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateLicenseRequests: List[UpdateLicenseRequested]
+    ) -> List[Optional[LicenseUpdated]]:
+        """
+        Updates many Licenses in a single commit.
+        :param updateLicenseRequests: The events requesting the update of each license.
+        :type updateLicenseRequests: List[org.acmsl.licdata.events.licenses.UpdateLicenseRequested]
+        :return: The outcome of each request: the license-updated event, the invalid-update-license-request event, or None if the license could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.licenses.LicenseUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateLicenseRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_license_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_license_updated(
+        self, license: License, updateLicenseRequested: UpdateLicenseRequested
+    ) -> LicenseUpdated:
+        """
+        Builds the LicenseUpdated event of given license.
+        :param license: The license.
+        :type license: org.acmsl.licdata.License
+        :param updateLicenseRequested: The event requesting the update of the license.
+        :type updateLicenseRequested: org.acmsl.licdata.events.licenses.UpdateLicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.licenses.LicenseUpdated
+        """
+        return LicenseUpdated(
+            entityId=license.id,
+            **{
+                name: getattr(updateLicenseRequested, camel_to_snake(name), None)
+                for name in License.attributes()
+                if name != "id" and name not in License.primary_key()
+            },
+            previousEventIds=(
+                updateLicenseRequested.previous_event_ids + [updateLicenseRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateLicenseRequested: UpdateLicenseRequested
+    ) -> InvalidUpdateLicenseRequest:
+        """
+        Builds an InvalidUpdateLicenseRequest event.
+        :param updateLicenseRequested: The event requesting the update of a license.
+        :type updateLicenseRequested: org.acmsl.licdata.events.licenses.UpdateLicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.licenses.InvalidUpdateLicenseRequest
+        """
+        return InvalidUpdateLicenseRequest(
+            updateLicenseRequested.entity_id,
+            updateLicenseRequested.previous_event_ids + [updateLicenseRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes a License.
@@ -102,6 +206,37 @@ class GithubLicenseRepo(LicenseRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteLicenseRequests: List[DeleteLicenseRequested]
+    ) -> List[Optional[LicenseDeleted]]:
+        """
+        Deletes many Licenses in a single commit.
+        :param deleteLicenseRequests: The events requesting the removal of each license.
+        :type deleteLicenseRequests: List[org.acmsl.licdata.events.licenses.DeleteLicenseRequested]
+        :return: The outcome of each request: the license-deleted event, the invalid-delete-license-request event, or None if the license could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.licenses.LicenseDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteLicenseRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteLicenseRequested: DeleteLicenseRequested
+    ) -> InvalidDeleteLicenseRequest:
+        """
+        Builds an InvalidDeleteLicenseRequest event.
+        :param deleteLicenseRequested: The event requesting the removal of the license.
+        :type deleteLicenseRequested: org.acmsl.licdata.events.licenses.DeleteLicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.licenses.InvalidDeleteLicenseRequest
+        """
+        return InvalidDeleteLicenseRequest(
+            deleteLicenseRequested.entity_id,
+            deleteLicenseRequested.previous_event_ids + [deleteLicenseRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves a License by its primary key.
@@ -112,10 +247,31 @@ class GithubLicenseRepo(LicenseRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Licenses.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all licenses.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Licenses, loading only the data needed.
+        :param after: The position of the last License already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Licenses, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Licenses, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
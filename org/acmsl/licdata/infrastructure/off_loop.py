@@ -0,0 +1,64 @@
+# vim: set fileencoding=utf-8
+"""
+org/acmsl/licdata/infrastructure/off_loop.py
+
+This file provides the async entry points used by the Azure Functions, which
+run the synchronous repositories outside the event loop.
+
+Copyright (C) 2024-today acm-sl's licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from typing import Any, Callable, List
+
+
+async def run_blocking(function: Callable, *args: Any) -> Any:
+    """
+    Runs a blocking call (e.g. on a repository) in a worker thread, so the
+    event loop keeps serving other requests meanwhile.
+    :param function: The function to call.
+    :type function: Callable
+    :param args: Its arguments.
+    :type args: Any
+    :return: The outcome of the call.
+    :rtype: Any
+    """
+    return await asyncio.to_thread(function, *args)
+
+
+async def accept_off_loop(app, event) -> List:
+    """
+    Dispatches an event to the application in a worker thread, with its own
+    event loop. The repositories the event reaches are synchronous (they're
+    shared with the AWS Lambda handlers), so their Github calls block the
+    worker thread, not the loop of the Azure Functions host.
+    :param app: The application.
+    :type app: pythoneda.shared.application.PythonEDA
+    :param event: The event.
+    :type event: pythoneda.shared.Event
+    :return: The resulting events.
+    :rtype: List[pythoneda.shared.Event]
+    """
+    return await run_blocking(lambda: asyncio.run(app.accept(event)))
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import Order
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.orders import NewOrderRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, Order.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewOrderRequested:
+    """
+    Builds the event requesting a new order.
+    :param attributes: The order's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.orders.NewOrderRequested
+    """
+    return NewOrderRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public Order
 along with this program.  If not, see <https://www.gnu.org/orders/>.
 """
 
-from org.acmsl.licdata import OrderRepo
+from org.acmsl.licdata import Order, OrderRepo
+from org.acmsl.licdata.events.orders import (
+    DeleteOrderRequested,
+    OrderDeleted,
+    OrderUpdated,
+    InvalidDeleteOrderRequest,
+    InvalidUpdateOrderRequest,
+    NewOrderCreated,
+    NewOrderRequested,
+    UpdateOrderRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubOrderRepo(OrderRepo):
@@ -54,15 +65,27 @@ class GithubOrderRepo(OrderRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the order matching given id.
         :param id: The order id.
         :type id: str
-        :return: The order.
+        :param fields: The attributes to retrieve, instead of the order.
+        :type fields: Optional[List[str]]
+        :return: The order, or its (requested) attributes.
         :rtype: Order from domain.order
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> Order:
+        """
+        Builds a Order from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The Order instance.
+        :rtype: org.acmsl.licdata.Order
+        """
+        return Order.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,31 @@ class GithubOrderRepo(OrderRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newOrderRequests: List[NewOrderRequested]
+    ) -> List[Optional[NewOrderCreated]]:
+        """
+        Inserts many new Orders, in a few large commits.
+        :param newOrderRequests: The events.
+        :type newOrderRequests: List[org.acmsl.licdata.events.orders.NewOrderRequested]
+        :return: The event of each new order, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.orders.NewOrderCreated]]
+        """
+        return self._githubRepo.bulk_insert(newOrderRequests, self._build_new_order)
+
+    def _build_new_order(
+        self, newOrderRequested: NewOrderRequested
+    ) -> Tuple[Order, NewOrderCreated]:
+        """
+        Builds a new Order.
+        :param newOrderRequested: The event.
+        :type newOrderRequested: org.acmsl.licdata.events.orders.NewOrderRequested
+        :return: The new order and the event.
+        :rtype: Tuple[org.acmsl.licdata.Order, org.acmsl.licdata.events.orders.NewOrderCreated]
+        """
+        new_order = Order.create_from(newOrderRequested)
+        return (new_order, new_order.created_event)
+
     def update(self, item):
         """
         Updates an Order.
@@ -92,6 +140,62 @@ class GithubOrderRepo(OrderRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateOrderRequests: List[UpdateOrderRequested]
+    ) -> List[Optional[OrderUpdated]]:
+        """
+        Updates many Orders in a single commit.
+        :param updateOrderRequests: The events requesting the update of each order.
+        :type updateOrderRequests: List[org.acmsl.licdata.events.orders.UpdateOrderRequested]
+        :return: The outcome of each request: the order-updated event, the invalid-update-order-request event, or None if the order could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.orders.OrderUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateOrderRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_order_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_order_updated(
+        self, order: Order, updateOrderRequested: UpdateOrderRequested
+    ) -> OrderUpdated:
+        """
+        Builds the OrderUpdated event of given order.
+        :param order: The order.
+        :type order: org.acmsl.licdata.Order
+        :param updateOrderRequested: The event requesting the update of the order.
+        :type updateOrderRequested: org.acmsl.licdata.events.orders.UpdateOrderRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.orders.OrderUpdated
+        """
+        return OrderUpdated(
+            entityId=order.id,
+            **{
+                name: getattr(updateOrderRequested, camel_to_snake(name), None)
+                for name in Order.attributes()
+                if name != "id" and name not in Order.primary_key()
+            },
+            previousEventIds=(
+                updateOrderRequested.previous_event_ids + [updateOrderRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateOrderRequested: UpdateOrderRequested
+    ) -> InvalidUpdateOrderRequest:
+        """
+        Builds an InvalidUpdateOrderRequest event.
+        :param updateOrderRequested: The event requesting the update of a order.
+        :type updateOrderRequested: org.acmsl.licdata.events.orders.UpdateOrderRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.orders.InvalidUpdateOrderRequest
+        """
+        return InvalidUpdateOrderRequest(
+            updateOrderRequested.entity_id,
+            updateOrderRequested.previous_event_ids + [updateOrderRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes an Order.
@@ -102,6 +206,37 @@ class GithubOrderRepo(OrderRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteOrderRequests: List[DeleteOrderRequested]
+    ) -> List[Optional[OrderDeleted]]:
+        """
+        Deletes many Orders in a single commit.
+        :param deleteOrderRequests: The events requesting the removal of each order.
+        :type deleteOrderRequests: List[org.acmsl.licdata.events.orders.DeleteOrderRequested]
+        :return: The outcome of each request: the order-deleted event, the invalid-delete-order-request event, or None if the order could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.orders.OrderDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteOrderRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteOrderRequested: DeleteOrderRequested
+    ) -> InvalidDeleteOrderRequest:
+        """
+        Builds an InvalidDeleteOrderRequest event.
+        :param deleteOrderRequested: The event requesting the removal of the order.
+        :type deleteOrderRequested: org.acmsl.licdata.events.orders.DeleteOrderRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.orders.InvalidDeleteOrderRequest
+        """
+        return InvalidDeleteOrderRequest(
+            deleteOrderRequested.entity_id,
+            deleteOrderRequested.previous_event_ids + [deleteOrderRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves an Order by its primary key.
@@ -112,10 +247,31 @@ class GithubOrderRepo(OrderRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Orders.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all orders.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Orders, loading only the data needed.
+        :param after: The position of the last Order already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Orders, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Orders, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import Pc
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.pcs import NewPcRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, Pc.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewPcRequested:
+    """
+    Builds the event requesting a new pc.
+    :param attributes: The pc's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.pcs.NewPcRequested
+    """
+    return NewPcRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public Pc
 along with this program.  If not, see <https://www.gnu.org/pcs/>.
 """
 
-from org.acmsl.licdata import PcRepo
+from org.acmsl.licdata import Pc, PcRepo
+from org.acmsl.licdata.events.pcs import (
+    DeletePcRequested,
+    PcDeleted,
+    PcUpdated,
+    InvalidDeletePcRequest,
+    InvalidUpdatePcRequest,
+    NewPcCreated,
+    NewPcRequested,
+    UpdatePcRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubPcRepo(PcRepo):
@@ -54,15 +65,27 @@ class GithubPcRepo(PcRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the pc matching given id.
         :param id: The pc id.
         :type id: str
-        :return: The pc.
+        :param fields: The attributes to retrieve, instead of the pc.
+        :type fields: Optional[List[str]]
+        :return: The pc, or its (requested) attributes.
         :rtype: Pc from domain.pc
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> Pc:
+        """
+        Builds a Pc from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The Pc instance.
+        :rtype: org.acmsl.licdata.Pc
+        """
+        return Pc.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,31 @@ class GithubPcRepo(PcRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newPcRequests: List[NewPcRequested]
+    ) -> List[Optional[NewPcCreated]]:
+        """
+        Inserts many new Pcs, in a few large commits.
+        :param newPcRequests: The events.
+        :type newPcRequests: List[org.acmsl.licdata.events.pcs.NewPcRequested]
+        :return: The event of each new pc, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.pcs.NewPcCreated]]
+        """
+        return self._githubRepo.bulk_insert(newPcRequests, self._build_new_pc)
+
+    def _build_new_pc(
+        self, newPcRequested: NewPcRequested
+    ) -> Tuple[Pc, NewPcCreated]:
+        """
+        Builds a new Pc.
+        :param newPcRequested: The event.
+        :type newPcRequested: org.acmsl.licdata.events.pcs.NewPcRequested
+        :return: The new pc and the event.
+        :rtype: Tuple[org.acmsl.licdata.Pc, org.acmsl.licdata.events.pcs.NewPcCreated]
+        """
+        new_pc = Pc.create_from(newPcRequested)
+        return (new_pc, new_pc.created_event)
+
     def update(self, item):
         """
         Updates a Pc.
@@ -92,6 +140,62 @@ class GithubPcRepo(PcRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updatePcRequests: List[UpdatePcRequested]
+    ) -> List[Optional[PcUpdated]]:
+        """
+        Updates many Pcs in a single commit.
+        :param updatePcRequests: The events requesting the update of each pc.
+        :type updatePcRequests: List[org.acmsl.licdata.events.pcs.UpdatePcRequested]
+        :return: The outcome of each request: the pc-updated event, the invalid-update-pc-request event, or None if the pc could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.pcs.PcUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updatePcRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_pc_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_pc_updated(
+        self, pc: Pc, updatePcRequested: UpdatePcRequested
+    ) -> PcUpdated:
+        """
+        Builds the PcUpdated event of given pc.
+        :param pc: The pc.
+        :type pc: org.acmsl.licdata.Pc
+        :param updatePcRequested: The event requesting the update of the pc.
+        :type updatePcRequested: org.acmsl.licdata.events.pcs.UpdatePcRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.pcs.PcUpdated
+        """
+        return PcUpdated(
+            entityId=pc.id,
+            **{
+                name: getattr(updatePcRequested, camel_to_snake(name), None)
+                for name in Pc.attributes()
+                if name != "id" and name not in Pc.primary_key()
+            },
+            previousEventIds=(
+                updatePcRequested.previous_event_ids + [updatePcRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updatePcRequested: UpdatePcRequested
+    ) -> InvalidUpdatePcRequest:
+        """
+        Builds an InvalidUpdatePcRequest event.
+        :param updatePcRequested: The event requesting the update of a pc.
+        :type updatePcRequested: org.acmsl.licdata.events.pcs.UpdatePcRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.pcs.InvalidUpdatePcRequest
+        """
+        return InvalidUpdatePcRequest(
+            updatePcRequested.entity_id,
+            updatePcRequested.previous_event_ids + [updatePcRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes a Pc.
@@ -102,6 +206,37 @@ class GithubPcRepo(PcRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deletePcRequests: List[DeletePcRequested]
+    ) -> List[Optional[PcDeleted]]:
+        """
+        Deletes many Pcs in a single commit.
+        :param deletePcRequests: The events requesting the removal of each pc.
+        :type deletePcRequests: List[org.acmsl.licdata.events.pcs.DeletePcRequested]
+        :return: The outcome of each request: the pc-deleted event, the invalid-delete-pc-request event, or None if the pc could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.pcs.PcDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deletePcRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deletePcRequested: DeletePcRequested
+    ) -> InvalidDeletePcRequest:
+        """
+        Builds an InvalidDeletePcRequest event.
+        :param deletePcRequested: The event requesting the removal of the pc.
+        :type deletePcRequested: org.acmsl.licdata.events.pcs.DeletePcRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.pcs.InvalidDeletePcRequest
+        """
+        return InvalidDeletePcRequest(
+            deletePcRequested.entity_id,
+            deletePcRequested.previous_event_ids + [deletePcRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves a Pc by its primary key.
@@ -112,10 +247,31 @@ class GithubPcRepo(PcRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Pcs.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all pcs.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Pcs, loading only the data needed.
+        :param after: The position of the last Pc already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Pcs, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Pcs, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
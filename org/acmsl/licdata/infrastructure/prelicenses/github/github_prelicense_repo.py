@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public Prelicense
 along with this program.  If not, see <https://www.gnu.org/prelicenses/>.
 """
 
-from org.acmsl.licdata import PrelicenseRepo
+from org.acmsl.licdata import Prelicense, PrelicenseRepo
+from org.acmsl.licdata.events.prelicenses import (
+    DeletePrelicenseRequested,
+    PrelicenseDeleted,
+    PrelicenseUpdated,
+    InvalidDeletePrelicenseRequest,
+    InvalidUpdatePrelicenseRequest,
+    NewPrelicenseCreated,
+    NewPrelicenseRequested,
+    UpdatePrelicenseRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubPrelicenseRepo(PrelicenseRepo):
@@ -54,15 +65,27 @@ class GithubPrelicenseRepo(PrelicenseRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the prelicense matching given id.
         :param id: The prelicense id.
         :type id: str
-        :return: The prelicense.
+        :param fields: The attributes to retrieve, instead of the prelicense.
+        :type fields: Optional[List[str]]
+        :return: The prelicense, or its (requested) attributes.
         :rtype: Prelicense from domain.prelicense
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> Prelicense:
+        """
+        Builds a Prelicense from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The Prelicense instance.
+        :rtype: org.acmsl.licdata.Prelicense
+        """
+        return Prelicense.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,33 @@ class GithubPrelicenseRepo(PrelicenseRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newPrelicenseRequests: List[NewPrelicenseRequested]
+    ) -> List[Optional[NewPrelicenseCreated]]:
+        """
+        Inserts many new Prelicenses, in a few large commits.
+        :param newPrelicenseRequests: The events.
+        :type newPrelicenseRequests: List[org.acmsl.licdata.events.prelicenses.NewPrelicenseRequested]
+        :return: The event of each new prelicense, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.prelicenses.NewPrelicenseCreated]]
+        """
+        return self._githubRepo.bulk_insert(
+            newPrelicenseRequests, self._build_new_prelicense
+        )
+
+    def _build_new_prelicense(
+        self, newPrelicenseRequested: NewPrelicenseRequested
+    ) -> Tuple[Prelicense, NewPrelicenseCreated]:
+        """
+        Builds a new Prelicense.
+        :param newPrelicenseRequested: The event.
+        :type newPrelicenseRequested: org.acmsl.licdata.events.prelicenses.NewPrelicenseRequested
+        :return: The new prelicense and the event.
+        :rtype: Tuple[org.acmsl.licdata.Prelicense, org.acmsl.licdata.events.prelicenses.NewPrelicenseCreated]
+        """
+        new_prelicense = Prelicense.create_from(newPrelicenseRequested)
+        return (new_prelicense, new_prelicense.created_event)
+
     def update(self, item):
         """
         Updates a Prelicense.
@@ -92,6 +142,66 @@ class GithubPrelicenseRepo(PrelicenseRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updatePrelicenseRequests: List[UpdatePrelicenseRequested]
+    ) -> List[Optional[PrelicenseUpdated]]:
+        """
+        Updates many Prelicenses in a single commit.
+        :param updatePrelicenseRequests: The events requesting the update of each prelicense.
+        :type updatePrelicenseRequests: List[org.acmsl.licdata.events.prelicenses.UpdatePrelicenseRequested]
+        :return: The outcome of each request: the prelicense-updated event, the invalid-update-prelicense-request event, or None if the prelicense could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.prelicenses.PrelicenseUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updatePrelicenseRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_prelicense_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_prelicense_updated(
+        self,
+        prelicense: Prelicense,
+        updatePrelicenseRequested: UpdatePrelicenseRequested,
+    ) -> PrelicenseUpdated:
+        """
+        Builds the PrelicenseUpdated event of given prelicense.
+        :param prelicense: The prelicense.
+        :type prelicense: org.acmsl.licdata.Prelicense
+        :param updatePrelicenseRequested: The event requesting the update of the prelicense.
+        :type updatePrelicenseRequested: org.acmsl.licdata.events.prelicenses.UpdatePrelicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.prelicenses.PrelicenseUpdated
+        """
+        return PrelicenseUpdated(
+            entityId=prelicense.id,
+            **{
+                name: getattr(updatePrelicenseRequested, camel_to_snake(name), None)
+                for name in Prelicense.attributes()
+                if name != "id" and name not in Prelicense.primary_key()
+            },
+            previousEventIds=(
+                updatePrelicenseRequested.previous_event_ids
+                + [updatePrelicenseRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updatePrelicenseRequested: UpdatePrelicenseRequested
+    ) -> InvalidUpdatePrelicenseRequest:
+        """
+        Builds an InvalidUpdatePrelicenseRequest event.
+        :param updatePrelicenseRequested: The event requesting the update of a prelicense.
+        :type updatePrelicenseRequested: org.acmsl.licdata.events.prelicenses.UpdatePrelicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.prelicenses.InvalidUpdatePrelicenseRequest
+        """
+        return InvalidUpdatePrelicenseRequest(
+            updatePrelicenseRequested.entity_id,
+            updatePrelicenseRequested.previous_event_ids
+            + [updatePrelicenseRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes a Prelicense.
@@ -102,6 +212,38 @@ class GithubPrelicenseRepo(PrelicenseRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deletePrelicenseRequests: List[DeletePrelicenseRequested]
+    ) -> List[Optional[PrelicenseDeleted]]:
+        """
+        Deletes many Prelicenses in a single commit.
+        :param deletePrelicenseRequests: The events requesting the removal of each prelicense.
+        :type deletePrelicenseRequests: List[org.acmsl.licdata.events.prelicenses.DeletePrelicenseRequested]
+        :return: The outcome of each request: the prelicense-deleted event, the invalid-delete-prelicense-request event, or None if the prelicense could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.prelicenses.PrelicenseDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deletePrelicenseRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deletePrelicenseRequested: DeletePrelicenseRequested
+    ) -> InvalidDeletePrelicenseRequest:
+        """
+        Builds an InvalidDeletePrelicenseRequest event.
+        :param deletePrelicenseRequested: The event requesting the removal of the prelicense.
+        :type deletePrelicenseRequested: org.acmsl.licdata.events.prelicenses.DeletePrelicenseRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.prelicenses.InvalidDeletePrelicenseRequest
+        """
+        return InvalidDeletePrelicenseRequest(
+            deletePrelicenseRequested.entity_id,
+            deletePrelicenseRequested.previous_event_ids
+            + [deletePrelicenseRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves a Prelicense by its primary key.
@@ -112,10 +254,31 @@ class GithubPrelicenseRepo(PrelicenseRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Prelicenses.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all prelicenses.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Prelicenses, loading only the data needed.
+        :param after: The position of the last Prelicense already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Prelicenses, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Prelicenses, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import ProductType
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.product_types import NewProductTypeRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, ProductType.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewProductTypeRequested:
+    """
+    Builds the event requesting a new product type.
+    :param attributes: The product type's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.product_types.NewProductTypeRequested
+    """
+    return NewProductTypeRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public Product
 along with this program.  If not, see <https://www.gnu.org/products/>.
 """
 
-from org.acmsl.licdata import ProductTypeRepo
+from org.acmsl.licdata import ProductType, ProductTypeRepo
+from org.acmsl.licdata.events.product_types import (
+    DeleteProductTypeRequested,
+    ProductTypeDeleted,
+    ProductTypeUpdated,
+    InvalidDeleteProductTypeRequest,
+    InvalidUpdateProductTypeRequest,
+    NewProductTypeCreated,
+    NewProductTypeRequested,
+    UpdateProductTypeRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubProductTypeRepo(ProductTypeRepo):
@@ -54,15 +65,27 @@ class GithubProductTypeRepo(ProductTypeRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the product matching given id.
         :param id: The product id.
         :type id: str
-        :return: The product.
+        :param fields: The attributes to retrieve, instead of the product.
+        :type fields: Optional[List[str]]
+        :return: The product, or its (requested) attributes.
         :rtype: ProductType from domain.product_type
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> ProductType:
+        """
+        Builds a ProductType from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The ProductType instance.
+        :rtype: org.acmsl.licdata.ProductType
+        """
+        return ProductType.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,33 @@ class GithubProductTypeRepo(ProductTypeRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newProductTypeRequests: List[NewProductTypeRequested]
+    ) -> List[Optional[NewProductTypeCreated]]:
+        """
+        Inserts many new ProductTypes, in a few large commits.
+        :param newProductTypeRequests: The events.
+        :type newProductTypeRequests: List[org.acmsl.licdata.events.product_types.NewProductTypeRequested]
+        :return: The event of each new product type, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.product_types.NewProductTypeCreated]]
+        """
+        return self._githubRepo.bulk_insert(
+            newProductTypeRequests, self._build_new_product_type
+        )
+
+    def _build_new_product_type(
+        self, newProductTypeRequested: NewProductTypeRequested
+    ) -> Tuple[ProductType, NewProductTypeCreated]:
+        """
+        Builds a new ProductType.
+        :param newProductTypeRequested: The event.
+        :type newProductTypeRequested: org.acmsl.licdata.events.product_types.NewProductTypeRequested
+        :return: The new product type and the event.
+        :rtype: Tuple[org.acmsl.licdata.ProductType, org.acmsl.licdata.events.product_types.NewProductTypeCreated]
+        """
+        new_product_type = ProductType.create_from(newProductTypeRequested)
+        return (new_product_type, new_product_type.created_event)
+
     def update(self, item):
         """
         Updates a ProductType.
@@ -92,6 +142,66 @@ class GithubProductTypeRepo(ProductTypeRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateProductTypeRequests: List[UpdateProductTypeRequested]
+    ) -> List[Optional[ProductTypeUpdated]]:
+        """
+        Updates many ProductTypes in a single commit.
+        :param updateProductTypeRequests: The events requesting the update of each product type.
+        :type updateProductTypeRequests: List[org.acmsl.licdata.events.product_types.UpdateProductTypeRequested]
+        :return: The outcome of each request: the product-type-updated event, the invalid-update-product-type-request event, or None if the product type could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.product_types.ProductTypeUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateProductTypeRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_product_type_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_product_type_updated(
+        self,
+        product_type: ProductType,
+        updateProductTypeRequested: UpdateProductTypeRequested,
+    ) -> ProductTypeUpdated:
+        """
+        Builds the ProductTypeUpdated event of given product type.
+        :param product_type: The product type.
+        :type product_type: org.acmsl.licdata.ProductType
+        :param updateProductTypeRequested: The event requesting the update of the product type.
+        :type updateProductTypeRequested: org.acmsl.licdata.events.product_types.UpdateProductTypeRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.product_types.ProductTypeUpdated
+        """
+        return ProductTypeUpdated(
+            entityId=product_type.id,
+            **{
+                name: getattr(updateProductTypeRequested, camel_to_snake(name), None)
+                for name in ProductType.attributes()
+                if name != "id" and name not in ProductType.primary_key()
+            },
+            previousEventIds=(
+                updateProductTypeRequested.previous_event_ids
+                + [updateProductTypeRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateProductTypeRequested: UpdateProductTypeRequested
+    ) -> InvalidUpdateProductTypeRequest:
+        """
+        Builds an InvalidUpdateProductTypeRequest event.
+        :param updateProductTypeRequested: The event requesting the update of a product type.
+        :type updateProductTypeRequested: org.acmsl.licdata.events.product_types.UpdateProductTypeRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.product_types.InvalidUpdateProductTypeRequest
+        """
+        return InvalidUpdateProductTypeRequest(
+            updateProductTypeRequested.entity_id,
+            updateProductTypeRequested.previous_event_ids
+            + [updateProductTypeRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes a ProductType.
@@ -102,6 +212,38 @@ class GithubProductTypeRepo(ProductTypeRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteProductTypeRequests: List[DeleteProductTypeRequested]
+    ) -> List[Optional[ProductTypeDeleted]]:
+        """
+        Deletes many ProductTypes in a single commit.
+        :param deleteProductTypeRequests: The events requesting the removal of each product type.
+        :type deleteProductTypeRequests: List[org.acmsl.licdata.events.product_types.DeleteProductTypeRequested]
+        :return: The outcome of each request: the product-type-deleted event, the invalid-delete-product-type-request event, or None if the product type could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.product_types.ProductTypeDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteProductTypeRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteProductTypeRequested: DeleteProductTypeRequested
+    ) -> InvalidDeleteProductTypeRequest:
+        """
+        Builds an InvalidDeleteProductTypeRequest event.
+        :param deleteProductTypeRequested: The event requesting the removal of the product type.
+        :type deleteProductTypeRequested: org.acmsl.licdata.events.product_types.DeleteProductTypeRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.product_types.InvalidDeleteProductTypeRequest
+        """
+        return InvalidDeleteProductTypeRequest(
+            deleteProductTypeRequested.entity_id,
+            deleteProductTypeRequested.previous_event_ids
+            + [deleteProductTypeRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves a ProductType by its primary key.
@@ -112,10 +254,31 @@ class GithubProductTypeRepo(ProductTypeRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all ProductTypes.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all products.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the ProductTypes, loading only the data needed.
+        :param after: The position of the last ProductType already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of ProductTypes, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The ProductTypes, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
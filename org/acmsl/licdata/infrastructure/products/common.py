@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import Product
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.products import NewProductRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, Product.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewProductRequested:
+    """
+    Builds the event requesting a new product.
+    :param attributes: The product's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.products.NewProductRequested
+    """
+    return NewProductRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public Product
 along with this program.  If not, see <https://www.gnu.org/products/>.
 """
 
-from org.acmsl.licdata import ProductRepo
+from org.acmsl.licdata import Product, ProductRepo
+from org.acmsl.licdata.events.products import (
+    DeleteProductRequested,
+    ProductDeleted,
+    ProductUpdated,
+    InvalidDeleteProductRequest,
+    InvalidUpdateProductRequest,
+    NewProductCreated,
+    NewProductRequested,
+    UpdateProductRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubProductRepo(ProductRepo):
@@ -54,15 +65,27 @@ class GithubProductRepo(ProductRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the product matching given id.
         :param id: The product id.
         :type id: str
-        :return: The product.
+        :param fields: The attributes to retrieve, instead of the product.
+        :type fields: Optional[List[str]]
+        :return: The product, or its (requested) attributes.
         :rtype: Product from domain.product
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> Product:
+        """
+        Builds a Product from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The Product instance.
+        :rtype: org.acmsl.licdata.Product
+        """
+        return Product.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,31 @@ class GithubProductRepo(ProductRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newProductRequests: List[NewProductRequested]
+    ) -> List[Optional[NewProductCreated]]:
+        """
+        Inserts many new Products, in a few large commits.
+        :param newProductRequests: The events.
+        :type newProductRequests: List[org.acmsl.licdata.events.products.NewProductRequested]
+        :return: The event of each new product, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.products.NewProductCreated]]
+        """
+        return self._githubRepo.bulk_insert(newProductRequests, self._build_new_product)
+
+    def _build_new_product(
+        self, newProductRequested: NewProductRequested
+    ) -> Tuple[Product, NewProductCreated]:
+        """
+        Builds a new Product.
+        :param newProductRequested: The event.
+        :type newProductRequested: org.acmsl.licdata.events.products.NewProductRequested
+        :return: The new product and the event.
+        :rtype: Tuple[org.acmsl.licdata.Product, org.acmsl.licdata.events.products.NewProductCreated]
+        """
+        new_product = Product.create_from(newProductRequested)
+        return (new_product, new_product.created_event)
+
     def update(self, item):
         """
         Updates a Product.
@@ -92,6 +140,62 @@ class GithubProductRepo(ProductRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateProductRequests: List[UpdateProductRequested]
+    ) -> List[Optional[ProductUpdated]]:
+        """
+        Updates many Products in a single commit.
+        :param updateProductRequests: The events requesting the update of each product.
+        :type updateProductRequests: List[org.acmsl.licdata.events.products.UpdateProductRequested]
+        :return: The outcome of each request: the product-updated event, the invalid-update-product-request event, or None if the product could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.products.ProductUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateProductRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_product_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_product_updated(
+        self, product: Product, updateProductRequested: UpdateProductRequested
+    ) -> ProductUpdated:
+        """
+        Builds the ProductUpdated event of given product.
+        :param product: The product.
+        :type product: org.acmsl.licdata.Product
+        :param updateProductRequested: The event requesting the update of the product.
+        :type updateProductRequested: org.acmsl.licdata.events.products.UpdateProductRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.products.ProductUpdated
+        """
+        return ProductUpdated(
+            entityId=product.id,
+            **{
+                name: getattr(updateProductRequested, camel_to_snake(name), None)
+                for name in Product.attributes()
+                if name != "id" and name not in Product.primary_key()
+            },
+            previousEventIds=(
+                updateProductRequested.previous_event_ids + [updateProductRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateProductRequested: UpdateProductRequested
+    ) -> InvalidUpdateProductRequest:
+        """
+        Builds an InvalidUpdateProductRequest event.
+        :param updateProductRequested: The event requesting the update of a product.
+        :type updateProductRequested: org.acmsl.licdata.events.products.UpdateProductRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.products.InvalidUpdateProductRequest
+        """
+        return InvalidUpdateProductRequest(
+            updateProductRequested.entity_id,
+            updateProductRequested.previous_event_ids + [updateProductRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes a Product.
@@ -102,6 +206,37 @@ class GithubProductRepo(ProductRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteProductRequests: List[DeleteProductRequested]
+    ) -> List[Optional[ProductDeleted]]:
+        """
+        Deletes many Products in a single commit.
+        :param deleteProductRequests: The events requesting the removal of each product.
+        :type deleteProductRequests: List[org.acmsl.licdata.events.products.DeleteProductRequested]
+        :return: The outcome of each request: the product-deleted event, the invalid-delete-product-request event, or None if the product could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.products.ProductDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteProductRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteProductRequested: DeleteProductRequested
+    ) -> InvalidDeleteProductRequest:
+        """
+        Builds an InvalidDeleteProductRequest event.
+        :param deleteProductRequested: The event requesting the removal of the product.
+        :type deleteProductRequested: org.acmsl.licdata.events.products.DeleteProductRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.products.InvalidDeleteProductRequest
+        """
+        return InvalidDeleteProductRequest(
+            deleteProductRequested.entity_id,
+            deleteProductRequested.previous_event_ids + [deleteProductRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves a Product by its primary key.
@@ -112,10 +247,31 @@ class GithubProductRepo(ProductRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Products.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all products.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Products, loading only the data needed.
+        :param after: The position of the last Product already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Products, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Products, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)
@@ -22,9 +22,12 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from pythoneda.shared import Event, Repo
 
 from .resp import build_response
+import base64
 import inspect
 from datetime import datetime
-from typing import Any, Dict, Callable, List, Tuple, Type
+import json
+import os
+from typing import Any, Dict, Callable, List, Optional, Tuple, Type
 
 
 def retrieve_attributes_from_params(body: Dict, event, attributeNames: List) -> Dict:
@@ -69,7 +72,11 @@ def find_by_id(event, context, repo):
     else:
         id = retrieve_id(body, event)
 
-        (item, sha) = repo.find_by_id(id)
+        fields = _fields_param(event.get("queryStringParameters", None) or {})
+        if fields is None:
+            (item, sha) = repo.find_by_id(id)
+        else:
+            (item, sha) = repo.find_by_id(id, fields=fields)
         if item:
             status = 200
             resp_body = item
@@ -152,6 +159,98 @@ def create(
     return result
 
 
+def bulk_create(
+    event,
+    context,
+    retrievePk: Callable,
+    retrieveAttributes: Callable,
+    buildRequest: Callable[[Dict], Event],
+    repo: Repo,
+):
+    """
+    Creates many new entities at once using given repo (POST /{collection}/_bulk).
+    The body is a list of entities, or an object with such list under "items",
+    of up to BULK_MAX_ITEMS entities (5000 by default).
+    :param event: The AWS Lambda event.
+    :type event: event
+    :param context: The AWS Lambda context.
+    :type context: context
+    :param retrievePk: The function to retrieve the primary key.
+    :type retrievePk: Callable
+    :param retrieveAttributes: The function to retrieve the attributes.
+    :type retrieveAttributes: Callable
+    :param buildRequest: The function to build the event requesting each new entity, from its attributes.
+    :type buildRequest: Callable[[Dict], pythoneda.shared.Event]
+    :param repo: The entity repository.
+    :type repo: pythoneda.Repo
+    :return: The response, with the number of entities created and already existing, and the outcome of each one.
+    :rtype: Dict
+    """
+    status = 200
+
+    (body, error) = load_body(event)
+    if isinstance(body, Dict):
+        body = body.get("items", None)
+    max_items = int(os.environ.get("BULK_MAX_ITEMS", "5000"))
+    if error:
+        status = 500
+        resp_body = {"error": "Cannot parse body"}
+        response = build_response(status, resp_body, event, context)
+    elif not isinstance(body, List) or not all(isinstance(x, Dict) for x in body):
+        status = 400
+        resp_body = {"error": "Expected a list of items"}
+        response = build_response(status, resp_body, event, context)
+    elif len(body) > max_items:
+        status = 400
+        resp_body = {"error": f"Too many items: {len(body)} (max {max_items})"}
+        response = build_response(status, resp_body, event, context)
+    else:
+        try:
+            requests = []
+            for item in body:
+                attributes = retrieveAttributes(item, event)
+                attributes.pop("_created", None)
+                attributes.pop("_updated", None)
+                requests.append(buildRequest(attributes))
+
+            outcomes = repo.bulk_insert(requests)
+            resp_items = []
+            for item, outcome in zip(body, outcomes):
+                if outcome:
+                    resp_items.append({"status": 201, "id": _outcome_id(outcome)})
+                else:
+                    resp_items.append({"status": 409, **retrievePk(item, event)})
+            resp_body = {
+                "created": len([x for x in resp_items if x["status"] == 201]),
+                "existing": len([x for x in resp_items if x["status"] == 409]),
+                "items": resp_items,
+            }
+            response = build_response(status, resp_body, event, context)
+        except Exception as e:
+            print(e)
+            status = 500
+            resp_body = {"error": str(e)}
+            response = build_response(status, resp_body, event, context)
+
+    return response
+
+
+def _outcome_id(outcome: Any) -> Optional[str]:
+    """
+    Retrieves the id of the entity created, from the outcome of an insertion.
+    :param outcome: The id itself, the attributes, or the entity-created event.
+    :type outcome: Any
+    :return: The id, if known.
+    :rtype: Optional[str]
+    """
+    if isinstance(outcome, str):
+        return outcome
+    if isinstance(outcome, Dict):
+        return outcome.get("id", None)
+
+    return getattr(outcome, "entity_id", None)
+
+
 def update(event, context, retrieveAttributes: Callable, repo: Repo):
     """
     Updates an existing entity using given repo.
@@ -248,13 +347,22 @@ def list(event, context, repo):
         response = build_response(status, resp_body, event, context)
     else:
         try:
-            (items, sha) = repo.list()
-            if items:
-                resp_body = items
+            params = event.get("queryStringParameters", None) or {}
+            fields = _fields_param(params)
+            if "limit" in params or "cursor" in params:
+                (status, resp_body) = list_page(params, repo)
                 response = build_response(status, resp_body, event, context)
-            else:
-                resp_body = []
+            elif fields is not None:
+                resp_body = repo.list(fields=fields)
                 response = build_response(status, resp_body, event, context)
+            else:
+                (items, sha) = repo.list()
+                if items:
+                    resp_body = items
+                    response = build_response(status, resp_body, event, context)
+                else:
+                    resp_body = []
+                    response = build_response(status, resp_body, event, context)
         except Exception as e:
             print(e)
             status = 500
@@ -262,3 +370,128 @@ def list(event, context, repo):
             response = build_response(status, resp_body, event, context)
 
     return response
+
+
+def list_page(params: Dict, repo) -> Tuple[int, Dict]:
+    """
+    Retrieves the page requested with the "limit", "cursor" and "fields"
+    query parameters, using given repo.
+    :param params: The query parameters.
+    :type params: Dict
+    :param repo: The entity repository.
+    :type repo: pythoneda.Repo
+    :return: A tuple of the status code, and the items along with the cursor of the next page (None if it's the last one).
+    :rtype: Tuple[int, Dict]
+    """
+    try:
+        (limit, after) = _page_params(params)
+        fields = _fields_param(params)
+
+        items = []
+        next_cursor = None
+        position = after
+        for item, item_position in repo.iter_list(after, limit + 1, fields):
+            if len(items) == limit:
+                next_cursor = _encode_cursor(position)
+                break
+            items.append(item)
+            position = item_position
+    except ValueError as e:
+        return (400, {"error": str(e)})
+
+    return (200, {"items": items, "next": next_cursor})
+
+
+def _fields_param(params: Dict) -> Optional[List[str]]:
+    """
+    Retrieves the attributes requested with the "fields" query parameter,
+    as a comma-separated list.
+    :param params: The query parameters.
+    :type params: Dict
+    :return: The attribute names, or None if all of them are requested.
+    :rtype: Optional[List[str]]
+    """
+    fields = params.get("fields", None)
+
+    result = None
+    if fields:
+        result = [name.strip() for name in fields.split(",") if name.strip()]
+
+    return result or None
+
+
+def _encode_cursor(position: Dict) -> str:
+    """
+    Builds the opaque cursor pointing after the item at given position.
+    :param position: The summary file and the id of the item.
+    :type position: Dict
+    :return: The cursor.
+    :rtype: str
+    """
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps({"file": position["file"], "id": position["id"]}).encode(
+                "utf-8"
+            )
+        )
+        .decode("ascii")
+        .rstrip("=")
+    )
+
+
+def _decode_cursor(cursor: str) -> Dict:
+    """
+    Retrieves the position a cursor points after.
+    :param cursor: The cursor.
+    :type cursor: str
+    :return: The summary file and the id of the last item returned.
+    :rtype: Dict
+    :raises ValueError: If the cursor is not valid.
+    """
+    try:
+        result = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        )
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if (
+        not isinstance(result, dict)
+        or not isinstance(result.get("file", None), str)
+        or not isinstance(result.get("id", None), str)
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return {"file": result["file"], "id": result["id"]}
+
+
+def _page_params(params: Dict) -> Tuple[int, Optional[Dict]]:
+    """
+    Retrieves the page requested with the "limit" and "cursor" query
+    parameters.
+    The limit defaults to LIST_DEFAULT_LIMIT (100), and cannot exceed
+    LIST_MAX_LIMIT (1000).
+    :param params: The query parameters.
+    :type params: Dict
+    :return: A tuple of the limit and the position of the last item already returned (None for the first page).
+    :rtype: Tuple[int, Optional[Dict]]
+    :raises ValueError: If the parameters are not valid.
+    """
+    limit = params.get("limit", None)
+    cursor = params.get("cursor", None)
+
+    if limit is None:
+        limit = int(os.environ.get("LIST_DEFAULT_LIMIT", "100"))
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError(f"Invalid limit: {limit}")
+        if limit <= 0:
+            raise ValueError(f"Invalid limit: {limit}")
+    limit = min(limit, int(os.environ.get("LIST_MAX_LIMIT", "1000")))
+
+    after = None
+    if cursor:
+        after = _decode_cursor(cursor)
+
+    return (limit, after)
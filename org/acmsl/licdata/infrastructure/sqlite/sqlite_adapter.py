@@ -0,0 +1,619 @@
+"""
+org/acmsl/licdata/infrastructure/sqlite/sqlite_adapter.py
+
+This file defines the SqliteAdapter class.
+
+Copyright (C) 2023-today ACM S.L. Licdata
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+import json
+from org.acmsl.licdata.infrastructure.crypt_utils import decrypt, encrypt
+from org.acmsl.licdata.infrastructure.github.collection_layout import (
+    CollectionLayout,
+)
+from org.acmsl.licdata.infrastructure.github.github_adapter import GithubAdapter
+from org.acmsl.licdata.infrastructure.github.payload_codec import (
+    decode_payload,
+    encode_payload,
+)
+from org.acmsl.licdata.infrastructure.github.pending_write import PendingWrite
+import os
+from pythoneda.shared import Entity, Event
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class SqliteAdapter(GithubAdapter):
+    """
+    Adapter storing collections in a SQLite database.
+
+    Class name: SqliteAdapter
+
+    Responsibilities:
+        - Keep one table per collection, with the entity, its summary row and its deletion time.
+        - Index the primary key and filter attributes of each collection.
+        - Keep the events of each entity in an append-only table.
+        - Encrypt the entities and events as the Github repository does; only the summary rows are kept in clear.
+        - Apply batches of writes in a single transaction.
+
+    Collaborators:
+        - GithubAdapter: Provides the operations not specific to SQLite.
+        - PendingWrite: The writes, with the same files as in the Github repository.
+    """
+
+    _singleton = None
+
+    _IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def __init__(self):
+        """
+        Creates a new SqliteAdapter instance.
+        """
+        super().__init__()
+        database = os.environ.get("SQLITE_DATABASE", None)
+        if database is None:
+            raise ValueError("SQLITE_DATABASE environment variable not set")
+        self._database = database
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schemas = set()
+        self._connect()
+
+    @property
+    def database(self) -> str:
+        """
+        Retrieves the database file.
+        :return: Such file.
+        :rtype: str
+        """
+        return self._database
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Retrieves the connection of the current thread, opening it if needed.
+        :return: The connection.
+        :rtype: sqlite3.Connection
+        """
+        result = getattr(self._local, "connection", None)
+
+        if result is None:
+            result = sqlite3.connect(
+                self._database,
+                timeout=float(os.environ.get("SQLITE_BUSY_TIMEOUT", "30")),
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            result.execute("PRAGMA journal_mode=WAL")
+            result.execute("PRAGMA synchronous=NORMAL")
+            result.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS _events (
+                  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                  collection TEXT NOT NULL,
+                  entity_id TEXT NOT NULL,
+                  name TEXT NOT NULL,
+                  payload BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS _events__entity
+                  ON _events (collection, entity_id, seq);
+                CREATE TRIGGER IF NOT EXISTS _events__no_update
+                  BEFORE UPDATE ON _events
+                  BEGIN SELECT RAISE(ABORT, 'events are append-only'); END;
+                CREATE TRIGGER IF NOT EXISTS _events__no_delete
+                  BEFORE DELETE ON _events
+                  BEGIN SELECT RAISE(ABORT, 'events are append-only'); END;
+                CREATE TABLE IF NOT EXISTS _versions (
+                  collection TEXT PRIMARY KEY,
+                  version INTEGER NOT NULL
+                );
+                """
+            )
+            self._local.connection = result
+
+        return result
+
+    def _table(self, path: str) -> str:
+        """
+        Retrieves the quoted name of the table of given collection, creating
+        it and its indexes if needed.
+        :param path: The relative path.
+        :type path: str
+        :return: The table name.
+        :rtype: str
+        """
+        name = re.sub(r"[^A-Za-z0-9_]", "_", path)
+
+        if path not in self._schemas:
+            with self._schema_lock:
+                connection = self._connect()
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" ('
+                    "id TEXT NOT NULL UNIQUE, data BLOB NOT NULL, "
+                    "summary TEXT NOT NULL, deleted REAL)"
+                )
+                for attribute_set in self._index_attributes.get(path, []):
+                    if not all(
+                        SqliteAdapter._IDENTIFIER.match(attr) for attr in attribute_set
+                    ):
+                        continue
+                    columns = ", ".join([self._column(attr) for attr in attribute_set])
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{name}__{"__".join(attribute_set)}" '
+                        f'ON "{name}" ({columns}) WHERE deleted IS NULL'
+                    )
+                self._schemas.add(path)
+
+        return f'"{name}"'
+
+    @staticmethod
+    def _seal(content: Optional[str]) -> Optional[bytes]:
+        """
+        Compresses and encrypts given contents, as the files in the Github repository.
+        :param content: The contents.
+        :type content: Optional[str]
+        :return: The encrypted contents, or None.
+        :rtype: Optional[bytes]
+        """
+        if content is None:
+            return None
+        return encrypt(encode_payload(content))
+
+    @staticmethod
+    def _unseal(value: Any) -> str:
+        """
+        Decrypts and decompresses given stored contents.
+        :param value: The stored value: the encrypted contents, or text stored before they were encrypted.
+        :type value: Any
+        :return: The contents.
+        :rtype: str
+        """
+        if isinstance(value, str):
+            return value
+        return decode_payload(decrypt(base64.b64encode(value)))
+
+    def _column(self, attributeName: str) -> str:
+        """
+        Retrieves the SQL expression of given attribute of the summary rows.
+        :param attributeName: The attribute name, a valid identifier.
+        :type attributeName: str
+        :return: The expression.
+        :rtype: str
+        """
+        return f"json_extract(summary, '$.{attributeName}')"
+
+    def _version(self, path: str) -> str:
+        """
+        Retrieves the version of given collection, which changes on every write.
+        :param path: The relative path.
+        :type path: str
+        :return: The version.
+        :rtype: str
+        """
+        row = (
+            self._connect()
+            .execute("SELECT version FROM _versions WHERE collection = ?", (path,))
+            .fetchone()
+        )
+        return str(row[0] if row else 0)
+
+    def register_indexes(self, path: str, attributeSets: List[List]):
+        """
+        Declares the attributes to index for given collection.
+        :param path: The relative path.
+        :type path: str
+        :param attributeSets: The attributes (or their properties) of each index.
+        :type attributeSets: List[List]
+        """
+        attribute_sets = self._index_attributes.setdefault(path, [])
+        for attribute_set in attributeSets:
+            attribute_sets.append(
+                [self.get_property_name(attr) for attr in attribute_set]
+            )
+        # create the new indexes on next use
+        self._schemas.discard(path)
+
+    def layout(self, path: str) -> CollectionLayout:
+        """
+        Retrieves the layout of given collection, whose summary is a single table.
+        :param path: The relative path.
+        :type path: str
+        :return: The layout.
+        :rtype: org.acmsl.licdata.infrastructure.github.CollectionLayout
+        """
+        return CollectionLayout(path)
+
+    def _collection(self, file: str) -> str:
+        """
+        Retrieves the collection of given summary file.
+        :param file: The summary file, as returned by the layout.
+        :type file: str
+        :return: The relative path of the collection.
+        :rtype: str
+        """
+        return file.rsplit("/", 1)[0]
+
+    def _read_summary(self, file: str) -> Tuple[List[Dict], str]:
+        """
+        Reads the summary rows of the collection of given file.
+        :param file: The summary file.
+        :type file: str
+        :return: A tuple of the rows, in insertion order, and the version.
+        :rtype: Tuple[List[Dict], str]
+        """
+        path = self._collection(file)
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT summary FROM {self._table(path)} "
+                "WHERE deleted IS NULL ORDER BY rowid"
+            )
+            .fetchall()
+        )
+        return ([json.loads(summary) for (summary,) in rows], self._version(path))
+
+    def find_by_id(
+        self,
+        id: str,
+        path: str,
+        buildEntity: Callable[[Dict], Entity] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[Dict, str]:
+        """
+        Finds an item matching given id.
+        :param id: The id.
+        :type id: str
+        :param path: The relative path.
+        :type path: str
+        :param buildEntity: A function to build the entity. If None, the attributes are returned.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :param fields: The attributes to retrieve, instead of the entity.
+        :type fields: Optional[List[str]]
+        :return: The tuple (item, sha)
+        :rtype: Tuple[Dict, str]
+        """
+        result = None
+
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT data FROM {self._table(path)} "
+                "WHERE id = ? AND deleted IS NULL",
+                (id,),
+            )
+            .fetchone()
+        )
+        if row is not None:
+            result = self._build_item(self._unseal(row[0]), buildEntity, fields)
+
+        return (result, self._version(path))
+
+    def find_all_by_attributes(self, filter: Dict, path: str) -> Tuple[List[Dict], str]:
+        """
+        Retrieves all items matching given attribute values. Scalar values
+        are matched by SQLite, using the indexes; the rest are checked on the
+        candidate rows.
+        :param filter: The attribute filter.
+        :type filter: Dict
+        :param path: The relative path.
+        :type path: str
+        :return: A tuple of the items and the version.
+        :rtype: Tuple[List[Dict], str]
+        """
+        conditions = ["deleted IS NULL"]
+        parameters = []
+        for name, value in filter.items():
+            if not SqliteAdapter._IDENTIFIER.match(name):
+                continue
+            if value is None:
+                conditions.append(f"{self._column(name)} IS NULL")
+            elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                conditions.append(f"{self._column(name)} = ?")
+                parameters.append(value)
+
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT summary FROM {self._table(path)} "
+                f"WHERE {' AND '.join(conditions)} ORDER BY rowid",
+                parameters,
+            )
+            .fetchall()
+        )
+        result = [
+            x
+            for x in [json.loads(summary) for (summary,) in rows]
+            if self._attributes_match(x, filter, filter.keys())
+        ]
+
+        return (result, self._version(path))
+
+    def iter_list(
+        self,
+        path: str,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the items in id order, letting SQLite seek and limit
+        the rows.
+        :param path: The relative path.
+        :type path: str
+        :param after: The position of the last item already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of items, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The items, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        :raises ValueError: If the position does not belong to the collection.
+        """
+        if after is not None and after["file"] != path:
+            raise ValueError(f"Cursor out of date for {path} collection")
+        cursor = self._connect().execute(
+            f"SELECT id, summary FROM {self._table(path)} "
+            "WHERE deleted IS NULL AND id > ? ORDER BY id LIMIT ?",
+            (
+                "" if after is None else after["id"],
+                -1 if limit is None else max(0, limit),
+            ),
+        )
+        for id, summary in cursor:
+            yield (self.project(json.loads(summary), fields), {"file": path, "id": id})
+
+    def insert(
+        self,
+        newEntityRequested: Event,
+        buildNewEntity: Callable[[Event], Tuple[Entity, Event]],
+        path: str,
+    ) -> Event:
+        """
+        Inserts a new entity.
+        :param newEntityRequested: The event requesting the new entity.
+        :type newEntityRequested: pythoneda.shared.Event
+        :param buildNewEntity: A function to create the new-entity-created e.
+        :type buildNewEntity: callable[[pythoneda.shared.Event], Tuple[pythoneda.shared.Entity, pythoneda.shared.Event]]
+        :param path: The relative path.
+        :type path: str
+        :return: The event representing the new entity has been created, or None if it could not be committed.
+        :rtype: pythoneda.shared.Event
+        """
+        entity, result = buildNewEntity(newEntityRequested)
+
+        target = entity.to_dict()
+        primary_key = {
+            name: target.get(name, None)
+            for name in [
+                self.get_property_name(attr) for attr in entity.__class__.primary_key()
+            ]
+        }
+        (content, sha) = self.find_all_by_attributes(primary_key, path)
+
+        write = self._insert_write(
+            newEntityRequested,
+            entity,
+            result,
+            path,
+            self.layout(path).legacy_file,
+            content,
+            None,
+        )
+        if write is None:
+            SqliteAdapter.logger().info(
+                f"Not creating a new entity under {path} since another copy already exists"
+            )
+        else:
+            (inserted,) = self.submit_writes(path, [write])
+            if not inserted:
+                SqliteAdapter.logger().error(
+                    f"Could not create a new entity under {path}"
+                )
+                result = None
+
+        return result
+
+    def _is_duplicate(self, table: str, primaryKey: Dict) -> bool:
+        """
+        Checks whether an entity with given primary key exists.
+        :param table: The table.
+        :type table: str
+        :param primaryKey: The primary-key values.
+        :type primaryKey: Dict
+        :return: True in such case.
+        :rtype: bool
+        """
+        if not primaryKey:
+            return False
+        conditions = ["deleted IS NULL"]
+        parameters = []
+        for name, value in primaryKey.items():
+            if value is None:
+                conditions.append(f"{self._column(name)} IS NULL")
+            else:
+                conditions.append(f"{self._column(name)} = ?")
+                parameters.append(value)
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT summary FROM {table} WHERE {' AND '.join(conditions)}",
+                parameters,
+            )
+            .fetchall()
+        )
+        return any(
+            self._attributes_match(json.loads(summary), primaryKey, primaryKey.keys())
+            for (summary,) in rows
+        )
+
+    def _read_for_delete(
+        self, id: str, path: str, buildEntity: Callable[[Dict], Entity]
+    ) -> Tuple[Entity, None]:
+        """
+        Reads the entity to delete. The transaction needs no summary.
+        :param id: The id.
+        :type id: str
+        :param path: The relative path.
+        :type path: str
+        :param buildEntity: A function to build the entity.
+        :type buildEntity: callable[[Dict], pythoneda.shared.Entity]
+        :return: The entity (or None), and None.
+        :rtype: Tuple[pythoneda.shared.Entity, None]
+        """
+        (entity, _) = self.find_by_id(id, path, buildEntity)
+        return (entity, None)
+
+    def apply_writes(
+        self,
+        writes: List[PendingWrite],
+        summaries: Optional[List[Tuple[str, List[Dict], str]]] = None,
+    ) -> List[bool]:
+        """
+        Applies given writes in a single transaction. The entity files of
+        each write become the (encrypted) data of its row, its _events/
+        files are appended (encrypted) to the events table, and its
+        ".deleted" marker flags the row as deleted.
+        :param writes: The writes.
+        :type writes: List[org.acmsl.licdata.infrastructure.github.PendingWrite]
+        :param summaries: Ignored; the transaction needs no summary.
+        :type summaries: Optional[List[Tuple[str, List[Dict], str]]]
+        :return: Whether each write got committed.
+        :rtype: List[bool]
+        """
+        result = []
+        connection = self._connect()
+        tables = {
+            write.file: self._table(self._collection(write.file)) for write in writes
+        }
+
+        self._write_metrics.record_attempt()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            new_rows = {}
+            events = []
+            changed = set()
+            for write in writes:
+                path = self._collection(write.file)
+                table = tables[write.file]
+                if write.kind == PendingWrite.APPEND and (
+                    self._is_duplicate(table, write.primary_key)
+                    or any(
+                        self._attributes_match(
+                            row, write.primary_key, write.primary_key.keys()
+                        )
+                        for (_, _, row) in new_rows.get(table, [])
+                    )
+                ):
+                    result.append(False)
+                    continue
+
+                data = self._seal(
+                    write.files.get(f"{path}/{write.id}/data.json", None)
+                )
+                if write.kind == PendingWrite.APPEND:
+                    new_rows.setdefault(table, []).append((write.id, data, write.row))
+                else:
+                    if write.kind == PendingWrite.REPLACE:
+                        cursor = connection.execute(
+                            f"UPDATE {table} SET data = COALESCE(?, data), summary = ? "
+                            "WHERE id = ? AND deleted IS NULL",
+                            (data, json.dumps(write.row), write.id),
+                        )
+                    elif f"{path}/{write.id}.deleted" in write.files:
+                        cursor = connection.execute(
+                            f"UPDATE {table} SET data = COALESCE(?, data), deleted = ? "
+                            "WHERE id = ? AND deleted IS NULL",
+                            (data, time.time(), write.id),
+                        )
+                    else:
+                        cursor = connection.execute(
+                            f"UPDATE {table} SET deleted = ? "
+                            "WHERE id = ? AND deleted IS NULL",
+                            (time.time(), write.id),
+                        )
+                    if cursor.rowcount == 0:
+                        # like a summary without the row, in GithubAdapter
+                        SqliteAdapter.logger().error(
+                            f"{table} does not contain {write.id}"
+                        )
+                        result.append(False)
+                        continue
+                for file, payload in write.files.items():
+                    if f"/{write.id}/_events/" in file:
+                        events.append(
+                            (path, write.id, file.rsplit("/", 1)[1], self._seal(payload))
+                        )
+                changed.add(path)
+                result.append(True)
+
+            for table, rows in new_rows.items():
+                connection.executemany(
+                    f"INSERT INTO {table} (id, data, summary) VALUES (?, ?, ?)",
+                    [(id, data, json.dumps(row)) for id, data, row in rows],
+                )
+            connection.executemany(
+                "INSERT INTO _events (collection, entity_id, name, payload) VALUES (?, ?, ?, ?)",
+                events,
+            )
+            connection.executemany(
+                "INSERT INTO _versions (collection, version) VALUES (?, 1) "
+                "ON CONFLICT (collection) DO UPDATE SET version = version + 1",
+                [(path,) for path in changed],
+            )
+            connection.execute("COMMIT")
+        except Exception as err:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            SqliteAdapter.logger().error(f"Error applying {len(writes)} writes: {err}")
+            return [False for _ in writes]
+
+        self._write_metrics.record_commit()
+        return result
+
+    def events(self, path: str, id: str) -> List[Tuple[str, str]]:
+        """
+        Retrieves the events of given entity, in order.
+        :param path: The relative path.
+        :type path: str
+        :param id: The entity id.
+        :type id: str
+        :return: The name and (decrypted) payload of each event.
+        :rtype: List[Tuple[str, str]]
+        """
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT name, payload FROM _events "
+                "WHERE collection = ? AND entity_id = ? ORDER BY seq",
+                (path, id),
+            )
+            .fetchall()
+        )
+        return [(name, self._unseal(payload)) for name, payload in rows]
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -20,7 +20,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from org.acmsl.licdata import User
-import org.acmsl.licdata.infrastructure.rest
+from org.acmsl.licdata.events.users import NewUserRequested
+from org.acmsl.licdata.infrastructure import rest
 
 from typing import Dict
 
@@ -49,3 +50,14 @@ def retrieve_attributes(body: Dict, event) -> Dict:
     :rtype: Dict
     """
     return rest.retrieve_attributes_from_params(body, event, User.attributes())
+
+
+def build_new_requested(attributes: Dict) -> NewUserRequested:
+    """
+    Builds the event requesting a new user.
+    :param attributes: The user's attributes.
+    :type attributes: Dict
+    :return: The event.
+    :rtype: org.acmsl.licdata.events.users.NewUserRequested
+    """
+    return NewUserRequested(**attributes)
@@ -19,10 +19,21 @@ You should have received a copy of the GNU General Public User
 along with this program.  If not, see <https://www.gnu.org/users/>.
 """
 
-from org.acmsl.licdata import UserRepo
+from org.acmsl.licdata import User, UserRepo
+from org.acmsl.licdata.events.users import (
+    DeleteUserRequested,
+    UserDeleted,
+    UserUpdated,
+    InvalidDeleteUserRequest,
+    InvalidUpdateUserRequest,
+    NewUserCreated,
+    NewUserRequested,
+    UpdateUserRequested,
+)
 from org.acmsl.licdata.infrastructure.github import GithubRepo
+from pythoneda.shared import camel_to_snake
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class GithubUserRepo(UserRepo):
@@ -54,15 +65,27 @@ class GithubUserRepo(UserRepo):
         """
         return self._githubRepo.path
 
-    def find_by_id(self, id: str):
+    def find_by_id(self, id: str, fields: Optional[List[str]] = None):
         """
         Retrieves the user matching given id.
         :param id: The user id.
         :type id: str
-        :return: The user.
+        :param fields: The attributes to retrieve, instead of the user.
+        :type fields: Optional[List[str]]
+        :return: The user, or its (requested) attributes.
         :rtype: User from domain.user
         """
-        return self._githubRepo.find_by_id(id)
+        return self._githubRepo.find_by_id(id, fields=fields)
+
+    def build_entity_from_dict(self, dict: Dict) -> User:
+        """
+        Builds a User from a dictionary.
+        :param dict: The dictionary.
+        :type dict: Dict
+        :return: The User instance.
+        :rtype: org.acmsl.licdata.User
+        """
+        return User.from_dict(dict)
 
     def find_by_attribute(self, attributeName: str, attributeValue: str):
         """
@@ -84,6 +107,31 @@ class GithubUserRepo(UserRepo):
         """
         return self._githubRepo.insert(item)
 
+    def bulk_insert(
+        self, newUserRequests: List[NewUserRequested]
+    ) -> List[Optional[NewUserCreated]]:
+        """
+        Inserts many new Users, in a few large commits.
+        :param newUserRequests: The events.
+        :type newUserRequests: List[org.acmsl.licdata.events.users.NewUserRequested]
+        :return: The event of each new user, or None if it was not persisted.
+        :rtype: List[Optional[org.acmsl.licdata.events.users.NewUserCreated]]
+        """
+        return self._githubRepo.bulk_insert(newUserRequests, self._build_new_user)
+
+    def _build_new_user(
+        self, newUserRequested: NewUserRequested
+    ) -> Tuple[User, NewUserCreated]:
+        """
+        Builds a new User.
+        :param newUserRequested: The event.
+        :type newUserRequested: org.acmsl.licdata.events.users.NewUserRequested
+        :return: The new user and the event.
+        :rtype: Tuple[org.acmsl.licdata.User, org.acmsl.licdata.events.users.NewUserCreated]
+        """
+        new_user = User.create_from(newUserRequested)
+        return (new_user, new_user.created_event)
+
     def update(self, item):
         """
         Updates an User.
@@ -92,6 +140,62 @@ class GithubUserRepo(UserRepo):
         """
         return self._githubRepo.update(item)
 
+    def bulk_update(
+        self, updateUserRequests: List[UpdateUserRequested]
+    ) -> List[Optional[UserUpdated]]:
+        """
+        Updates many Users in a single commit.
+        :param updateUserRequests: The events requesting the update of each user.
+        :type updateUserRequests: List[org.acmsl.licdata.events.users.UpdateUserRequested]
+        :return: The outcome of each request: the user-updated event, the invalid-update-user-request event, or None if the user could not be updated.
+        :rtype: List[Optional[org.acmsl.licdata.events.users.UserUpdated]]
+        """
+        return self._githubRepo.bulk_update(
+            updateEntityRequests=updateUserRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildEntityUpdatedEvent=self._build_user_updated,
+            buildInvalidUpdateEntityRequestEvent=self.build_invalid_update_entity_request_event,
+        )
+
+    def _build_user_updated(
+        self, user: User, updateUserRequested: UpdateUserRequested
+    ) -> UserUpdated:
+        """
+        Builds the UserUpdated event of given user.
+        :param user: The user.
+        :type user: org.acmsl.licdata.User
+        :param updateUserRequested: The event requesting the update of the user.
+        :type updateUserRequested: org.acmsl.licdata.events.users.UpdateUserRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.users.UserUpdated
+        """
+        return UserUpdated(
+            entityId=user.id,
+            **{
+                name: getattr(updateUserRequested, camel_to_snake(name), None)
+                for name in User.attributes()
+                if name != "id" and name not in User.primary_key()
+            },
+            previousEventIds=(
+                updateUserRequested.previous_event_ids + [updateUserRequested.id]
+            ),
+        )
+
+    def build_invalid_update_entity_request_event(
+        self, updateUserRequested: UpdateUserRequested
+    ) -> InvalidUpdateUserRequest:
+        """
+        Builds an InvalidUpdateUserRequest event.
+        :param updateUserRequested: The event requesting the update of a user.
+        :type updateUserRequested: org.acmsl.licdata.events.users.UpdateUserRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.users.InvalidUpdateUserRequest
+        """
+        return InvalidUpdateUserRequest(
+            updateUserRequested.entity_id,
+            updateUserRequested.previous_event_ids + [updateUserRequested.id],
+        )
+
     def delete(self, id: str):
         """
         Deletes an User.
@@ -102,6 +206,37 @@ class GithubUserRepo(UserRepo):
         """
         return self._githubRepo.delete(id)
 
+    def bulk_delete(
+        self, deleteUserRequests: List[DeleteUserRequested]
+    ) -> List[Optional[UserDeleted]]:
+        """
+        Deletes many Users in a single commit.
+        :param deleteUserRequests: The events requesting the removal of each user.
+        :type deleteUserRequests: List[org.acmsl.licdata.events.users.DeleteUserRequested]
+        :return: The outcome of each request: the user-deleted event, the invalid-delete-user-request event, or None if the user could not be removed.
+        :rtype: List[Optional[org.acmsl.licdata.events.users.UserDeleted]]
+        """
+        return self._githubRepo.bulk_delete(
+            deleteEntityRequests=deleteUserRequests,
+            buildEntity=self.build_entity_from_dict,
+            buildInvalidDeleteEntityRequestEvent=self.build_invalid_delete_entity_request_event,
+        )
+
+    def build_invalid_delete_entity_request_event(
+        self, deleteUserRequested: DeleteUserRequested
+    ) -> InvalidDeleteUserRequest:
+        """
+        Builds an InvalidDeleteUserRequest event.
+        :param deleteUserRequested: The event requesting the removal of the user.
+        :type deleteUserRequested: org.acmsl.licdata.events.users.DeleteUserRequested
+        :return: The event.
+        :rtype: org.acmsl.licdata.events.users.InvalidDeleteUserRequest
+        """
+        return InvalidDeleteUserRequest(
+            deleteUserRequested.entity_id,
+            deleteUserRequested.previous_event_ids + [deleteUserRequested.id],
+        )
+
     def find_by_pk(self, pk: Dict):
         """
         Retrieves an User by its primary key.
@@ -112,10 +247,31 @@ class GithubUserRepo(UserRepo):
         """
         return self._githubRepo.find_by_pk(pk)
 
-    def list(self) -> List:
+    def list(self, fields: Optional[List[str]] = None) -> List:
         """
         Lists all Users.
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
         :return: The list of all users.
         :rtype: List
         """
-        return self._githubRepo.list()
+        return self._githubRepo.list(fields)
+
+    def iter_list(
+        self,
+        after: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Iterates over the Users, loading only the data needed.
+        :param after: The position of the last User already returned, or None to start from the first one.
+        :type after: Optional[Dict]
+        :param limit: The maximum number of Users, or None for all of them.
+        :type limit: Optional[int]
+        :param fields: The attributes to retrieve, or None for all of them.
+        :type fields: Optional[List[str]]
+        :return: The Users, along with their positions.
+        :rtype: Iterator[Tuple[Dict, Dict]]
+        """
+        return self._githubRepo.iter_list(after, limit, fields)